@@ -12,10 +12,13 @@ from typing import List, Optional
 import pandas as pd
 import requests
 
+from corpus_colunar import EXTENSOES_ARROW, EXTENSOES_PARQUET, ler_corpus, salvar_corpus
+
 MODEL_NAME = os.environ.get("LLMUSIC_MODEL", "llama3:8b")
 TEMAS_POR_REGISTRO = int(os.environ.get("LLMUSIC_TEMAS_POR_REGISTRO", os.environ.get("LLMUSIC_TEMAS_POR_GRUPO", 1)))
 N_ITERACOES = int(os.environ.get("LLMUSIC_ITERACOES", 3))
 EMBEDDING_DEVICE = os.environ.get("LLMUSIC_EMBEDDING_DEVICE", "cpu")
+LIMIAR_DUPLICADOS = 0.8  # mesmo LIMIAR_SIMILARIDADE de pre_processamento/quase_duplicados.py
 
 
 class DualLogger:
@@ -61,7 +64,7 @@ class TemaSelecionado:
 
 
 def ler_registros(path_csv: Path, log: DualLogger) -> List[Trecho]:
-    df = pd.read_csv(path_csv)
+    df = ler_corpus(path_csv, colunas=["tag_trecho", "tag_musica", "letra", "titulo", "artista", "ano"])
     col_tag = "tag_trecho" if "tag_trecho" in df.columns else ("tag_musica" if "tag_musica" in df.columns else None)
     if col_tag is None:
         raise ValueError("Coluna de tag nao encontrada (esperado 'tag_trecho' ou 'tag_musica').")
@@ -89,6 +92,33 @@ def ler_registros(path_csv: Path, log: DualLogger) -> List[Trecho]:
     return registros
 
 
+def ler_mapa_duplicados(
+    path_csv: Path, log: DualLogger, limiar: float = LIMIAR_DUPLICADOS
+) -> dict[str, str]:
+    """
+    Mapa tag_trecho -> tag_canonico gerado por pre_processamento/quase_duplicados.py.
+    Trechos com similaridade abaixo de `limiar` com o representante ficam fora do mapa
+    (vao ao LLM sozinhos), para o rotulo so ser replicado entre trechos de fato parecidos.
+    """
+    df = pd.read_csv(path_csv, dtype=str)
+    if "similaridade" in df.columns:
+        abaixo = pd.to_numeric(df["similaridade"], errors="coerce") < limiar
+        if abaixo.any():
+            log.log(f"Mapa de quase duplicados: {int(abaixo.sum())} trechos abaixo de {limiar} processados sozinhos.")
+        df = df[~abaixo]
+    mapa = dict(zip(df["tag_trecho"].str.strip(), df["tag_canonico"].str.strip()))
+    log.log(f"Mapa de quase duplicados: {len(mapa)} trechos, {len(set(mapa.values()))} representantes.")
+    return mapa
+
+
+def agrupar_por_canonico(registros: List[Trecho], mapa: dict[str, str]) -> List[List[Trecho]]:
+    """Agrupa os registros pelo representante; o primeiro registro de cada grupo e o classificado."""
+    grupos: dict[str, List[Trecho]] = {}
+    for trecho in registros:
+        grupos.setdefault(mapa.get(trecho.tag, trecho.tag), []).append(trecho)
+    return list(grupos.values())
+
+
 def ler_temas_candidatos(path_csv: Path, log: DualLogger) -> tuple[List[str], dict[str, int | str]]:
     df = pd.read_csv(path_csv)
     col_temas = [c for c in df.columns if c.startswith("tema_")]
@@ -180,7 +210,9 @@ def classificar_temas_para_trecho(trecho: Trecho, temas: List[str]) -> set[str]:
     return selecionados
 
 
-def processar(trechos_csv: Path, temas_csv: Path, log_path: Path | None = None) -> pd.DataFrame:
+def processar(
+    trechos_csv: Path, temas_csv: Path, log_path: Path | None = None, mapa_duplicados: Path | None = None
+) -> pd.DataFrame:
     log_path = log_path or trechos_csv.with_name(f"{trechos_csv.stem}_processar_temas.log")
     logger = DualLogger(log_path)
     logger.log("=== Processar Temas com Base em Lista (Versao 2.0) ===")
@@ -192,32 +224,43 @@ def processar(trechos_csv: Path, temas_csv: Path, log_path: Path | None = None)
 
     registros = ler_registros(trechos_csv, logger)
     temas_global, tema_para_id = ler_temas_candidatos(temas_csv, logger)
+    # Com o mapa, cada grupo de quase duplicados vai ao LLM uma vez e o resultado vale para todos
+    mapa = ler_mapa_duplicados(mapa_duplicados, logger) if mapa_duplicados else {}
+    grupos = agrupar_por_canonico(registros, mapa)
+    if len(grupos) < len(registros):
+        logger.log(
+            f"Quase duplicados: {len(registros)} registros em {len(grupos)} grupos; "
+            f"chamadas ao LLM economizadas: {(len(registros) - len(grupos)) * N_ITERACOES}"
+        )
 
     selecionados: List[TemaSelecionado] = []
-    total_registros = len(registros)
+    total_registros = len(grupos)
     inicio = time.time()
     try:
         for iteracao in range(1, N_ITERACOES + 1):
             logger.log(f"\n=== ITERACAO {iteracao}/{N_ITERACOES} ===")
-            for idx, trecho in enumerate(registros, start=1):
+            for idx, grupo in enumerate(grupos, start=1):
+                trecho = grupo[0]
                 ts = datetime.now().isoformat(timespec="milliseconds")
                 largura = len(str(total_registros))
                 logger.log(
                     f"{ts} | Registro [{idx:0{largura}d}/{total_registros}] | tag={trecho.tag} | temas_candidatos={len(temas_global)}"
+                    + (f" | duplicados={len(grupo) - 1}" if len(grupo) > 1 else "")
                 )
                 try:
                     temas_aplicaveis = classificar_temas_para_trecho(trecho, temas_global)
                     linhas_local = []
-                    for tema in temas_global:
-                        linhas_local.append(
-                            {
-                                "tag_trecho": trecho.tag,
-                                "letra": trecho.letra,
-                                "topico_id": tema_para_id.get(tema),
-                                "topicos_temas": tema,
-                                "classificado_positivo": 1 if tema in temas_aplicaveis else 0,
-                            }
-                        )
+                    for membro in grupo:
+                        for tema in temas_global:
+                            linhas_local.append(
+                                {
+                                    "tag_trecho": membro.tag,
+                                    "letra": membro.letra,
+                                    "topico_id": tema_para_id.get(tema),
+                                    "topicos_temas": tema,
+                                    "classificado_positivo": 1 if tema in temas_aplicaveis else 0,
+                                }
+                            )
                     selecionados.extend(linhas_local)
                     logger.log(f"    Temas marcados como positivos: {sorted(list(temas_aplicaveis))}")
                 except Exception as exc:
@@ -229,8 +272,9 @@ def processar(trechos_csv: Path, temas_csv: Path, log_path: Path | None = None)
         df_local = pd.DataFrame(
             selecionados, columns=["tag_trecho", "letra", "topico_id", "topicos_temas", "classificado_positivo"]
         )
-        out_path = trechos_csv.with_name(f"{trechos_csv.stem}_temas_classificados.csv")
-        df_local.to_csv(out_path, index=False)
+        # Mesmo formato da entrada: em Parquet a letra repetida por tema vira dicionario
+        sufixo = trechos_csv.suffix if trechos_csv.suffix in EXTENSOES_PARQUET + EXTENSOES_ARROW else ".csv"
+        out_path = salvar_corpus(df_local, trechos_csv.with_name(f"{trechos_csv.stem}_temas_classificados{sufixo}"))
         logger.log(f"Arquivo salvo: {out_path.name}")
     finally:
         logger.log(f"\n--- Script Concluido ---")
@@ -245,18 +289,30 @@ def parse_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser(
         description="Classifica cada registro (ex: rodar_llmusic_parteii.csv) usando apenas temas fornecidos."
     )
-    parser.add_argument("trechos_csv", help="CSV com colunas tag_trecho/tag_musica e letra (ex: rodar_llmusic_parteii.csv).")
+    parser.add_argument(
+        "trechos_csv",
+        help="CSV, Parquet ou Arrow com colunas tag_trecho/tag_musica e letra (ex: rodar_llmusic_parteii.csv).",
+    )
     parser.add_argument(
         "temas_csv",
         help="CSV de temas base (saida normalizada do script 05 ou arquivo simples como Topicos_tema.csv).",
     )
     parser.add_argument("--log", help="Caminho opcional para o log (padrao: <trechos>_processar_temas.log).")
+    parser.add_argument(
+        "--mapa-duplicados",
+        help="CSV tag_trecho -> tag_canonico (pre_processamento/quase_duplicados.py): classifica cada grupo uma vez.",
+    )
     return parser.parse_args()
 
 
 def main() -> None:
     args = parse_args()
-    processar(Path(args.trechos_csv), Path(args.temas_csv), Path(args.log) if args.log else None)
+    processar(
+        Path(args.trechos_csv),
+        Path(args.temas_csv),
+        Path(args.log) if args.log else None,
+        Path(args.mapa_duplicados) if args.mapa_duplicados else None,
+    )
 
 
 if __name__ == "__main__":
@@ -15,10 +15,13 @@ import numpy as np
 import pandas as pd
 import requests
 
+from corpus_colunar import EXTENSOES_ARROW, EXTENSOES_PARQUET, ler_corpus, salvar_corpus
+
 MODEL_NAME = os.environ.get("LLMUSIC_MODEL", "llama3:8b")
 N_INFERENCIAS = int(os.environ.get("LLMUSIC_INFERENCIAS", 5))
 TEMPERATURAS = [float(t) for t in os.environ.get("LLMUSIC_TEMPERATURAS", "0.1,0.4,0.7,0.9,1.0").split(",")]
 NUM_PREDICT = int(os.environ.get("LLMUSIC_NUM_PREDICT", 5))  # mantém respostas curtas
+LIMIAR_DUPLICADOS = 0.8  # mesmo LIMIAR_SIMILARIDADE de pre_processamento/quase_duplicados.py
 
 
 class DualLogger:
@@ -51,7 +54,7 @@ class Topico:
 
 
 def carregar_trechos(path_csv: Path, sample: Optional[int], log: DualLogger) -> List[Trecho]:
-    df = pd.read_csv(path_csv)
+    df = ler_corpus(path_csv, colunas=["tag_trecho", "tag_musica", "ranking_posicao", "letra"])
     col_tag = "tag_trecho" if "tag_trecho" in df.columns else ("tag_musica" if "tag_musica" in df.columns else None)
     if col_tag is None:
         col_tag = "ranking_posicao" if "ranking_posicao" in df.columns else None
@@ -74,6 +77,33 @@ def carregar_trechos(path_csv: Path, sample: Optional[int], log: DualLogger) ->
     return trechos
 
 
+def carregar_mapa_duplicados(
+    path_csv: Path, log: DualLogger, limiar: float = LIMIAR_DUPLICADOS
+) -> dict[str, str]:
+    """
+    Mapa tag_trecho -> tag_canonico gerado por pre_processamento/quase_duplicados.py.
+    Trechos com similaridade abaixo de `limiar` com o representante ficam fora do mapa
+    (vao ao LLM sozinhos), para o rotulo so ser replicado entre trechos de fato parecidos.
+    """
+    df = pd.read_csv(path_csv, dtype=str)
+    if "similaridade" in df.columns:
+        abaixo = pd.to_numeric(df["similaridade"], errors="coerce") < limiar
+        if abaixo.any():
+            log.log(f"Mapa de quase duplicados: {int(abaixo.sum())} trechos abaixo de {limiar} processados sozinhos.")
+        df = df[~abaixo]
+    mapa = dict(zip(df["tag_trecho"].str.strip(), df["tag_canonico"].str.strip()))
+    log.log(f"Mapa de quase duplicados: {len(mapa)} trechos, {len(set(mapa.values()))} representantes.")
+    return mapa
+
+
+def agrupar_por_canonico(trechos: List[Trecho], mapa: dict[str, str]) -> List[List[Trecho]]:
+    """Agrupa os trechos pelo representante; o primeiro trecho de cada grupo e o enviado ao LLM."""
+    grupos: dict[str, List[Trecho]] = {}
+    for trecho in trechos:
+        grupos.setdefault(mapa.get(trecho.id, trecho.id), []).append(trecho)
+    return list(grupos.values())
+
+
 def carregar_topicos(path_csv: Path, log: DualLogger) -> List[Topico]:
     df = pd.read_csv(path_csv)
     col_id = next((c for c in df.columns if c.strip().lower() == "id"), None)
@@ -160,15 +190,28 @@ def consolidar_scores(scores: List[int]) -> tuple[float, int, float, int, str]:
     return media, moda_val, desvio, classificado, confianca
 
 
-def gerar_relatorio(trechos: List[Trecho], topicos: List[Topico], log: DualLogger) -> pd.DataFrame:
+def gerar_relatorio(
+    trechos: List[Trecho], topicos: List[Topico], log: DualLogger, mapa: Optional[dict[str, str]] = None
+) -> pd.DataFrame:
     log.log(f"\nIniciando classificacao de {len(trechos)} trechos contra {len(topicos)} topicos...")
-    total_chamadas = len(trechos) * len(topicos) * N_INFERENCIAS
+    # Com o mapa, cada grupo de quase duplicados vai ao LLM uma vez e o resultado vale para todos
+    grupos = agrupar_por_canonico(trechos, mapa or {})
+    total_chamadas = len(grupos) * len(topicos) * N_INFERENCIAS
     log.log(f"Total estimado de chamadas ao LLM: {total_chamadas}")
+    if len(grupos) < len(trechos):
+        log.log(
+            f"Quase duplicados: {len(trechos)} trechos em {len(grupos)} grupos; "
+            f"chamadas ao LLM economizadas: {(len(trechos) - len(grupos)) * len(topicos) * N_INFERENCIAS}"
+        )
 
     resultados = []
     inicio = time.time()
-    for idx_trecho, trecho in enumerate(trechos, start=1):
-        log.log(f"\nProcessando trecho {idx_trecho}/{len(trechos)} (id={trecho.id})")
+    for idx_trecho, grupo in enumerate(grupos, start=1):
+        trecho = grupo[0]
+        log.log(
+            f"\nProcessando trecho {idx_trecho}/{len(grupos)} (id={trecho.id})"
+            + (f" + {len(grupo) - 1} quase duplicados" if len(grupo) > 1 else "")
+        )
         for topico in topicos:
             scores: List[int] = []
             temps = TEMPERATURAS if TEMPERATURAS else [0.0]
@@ -186,21 +229,22 @@ def gerar_relatorio(trechos: List[Trecho], topicos: List[Topico], log: DualLogge
 
             if scores:
                 media, moda_val, desvio, classificado, confianca = consolidar_scores(scores)
-                resultados.append(
-                    {
-                        "trecho_id": trecho.id,
-                        "trecho_texto": (trecho.texto[:50] + "...") if len(trecho.texto) > 53 else trecho.texto,
-                        "topico_id": topico.id,
-                        "topico_nome": topico.nome,
-                        "scores_raw": json.dumps(scores),
-                        "n_validos": len(scores),
-                        "media_score": round(media, 2),
-                        "moda_score": moda_val,
-                        "desvio_padrao": round(desvio, 2),
-                        "classificado_positivo": classificado,
-                        "confianca": confianca,
-                    }
-                )
+                for membro in grupo:
+                    resultados.append(
+                        {
+                            "trecho_id": membro.id,
+                            "trecho_texto": (membro.texto[:50] + "...") if len(membro.texto) > 53 else membro.texto,
+                            "topico_id": topico.id,
+                            "topico_nome": topico.nome,
+                            "scores_raw": json.dumps(scores),
+                            "n_validos": len(scores),
+                            "media_score": round(media, 2),
+                            "moda_score": moda_val,
+                            "desvio_padrao": round(desvio, 2),
+                            "classificado_positivo": classificado,
+                            "confianca": confianca,
+                        }
+                    )
             else:
                 log.log(f"  -> nenhuma resposta valida para topico {topico.id} ({topico.nome})")
 
@@ -212,7 +256,9 @@ def parse_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser(
         description="Gera relatorio final classificando trechos por topicos com autoconsistencia."
     )
-    parser.add_argument("trechos_csv", help="CSV com colunas 'letra' e tag_trecho/tag_musica/ranking_posicao.")
+    parser.add_argument(
+        "trechos_csv", help="CSV, Parquet ou Arrow com colunas 'letra' e tag_trecho/tag_musica/ranking_posicao."
+    )
     parser.add_argument("topicos_csv", help="CSV de topicos (ex: Topicos_tema.csv).")
     parser.add_argument(
         "--sample",
@@ -224,7 +270,7 @@ def parse_args() -> argparse.Namespace:
         "--saida",
         type=str,
         default=None,
-        help="CSV de saida (padrao: <trechos>_relatorio_final.csv).",
+        help="Arquivo de saida .csv, .parquet ou .arrow (padrao: <trechos>_relatorio_final, no formato da entrada).",
     )
     parser.add_argument(
         "--log",
@@ -232,6 +278,12 @@ def parse_args() -> argparse.Namespace:
         default=None,
         help="Arquivo de log (padrao: <trechos>_relatorio_final.log).",
     )
+    parser.add_argument(
+        "--mapa-duplicados",
+        type=str,
+        default=None,
+        help="CSV tag_trecho -> tag_canonico (pre_processamento/quase_duplicados.py): consulta o LLM uma vez por grupo.",
+    )
     return parser.parse_args()
 
 
@@ -254,9 +306,11 @@ def main() -> None:
     try:
         trechos = carregar_trechos(trechos_path, args.sample, logger)
         topicos = carregar_topicos(topicos_path, logger)
-        df_resultados = gerar_relatorio(trechos, topicos, logger)
-        out_path = Path(args.saida) if args.saida else trechos_path.with_name(f"{trechos_path.stem}_relatorio_final.csv")
-        df_resultados.to_csv(out_path, index=False)
+        mapa = carregar_mapa_duplicados(Path(args.mapa_duplicados), logger) if args.mapa_duplicados else None
+        df_resultados = gerar_relatorio(trechos, topicos, logger, mapa)
+        sufixo = trechos_path.suffix if trechos_path.suffix in EXTENSOES_PARQUET + EXTENSOES_ARROW else ".csv"
+        out_path = Path(args.saida) if args.saida else trechos_path.with_name(f"{trechos_path.stem}_relatorio_final{sufixo}")
+        salvar_corpus(df_resultados, out_path)
         logger.log(f"Resultados salvos em: {out_path}")
         logger.log("\nExemplo dos primeiros resultados:")
         logger.log(df_resultados.head().to_string(index=False))
@@ -1,39 +1,307 @@
+from __future__ import annotations
+
+import argparse
+import ast
+import sys
+import time
+from dataclasses import dataclass
+from itertools import combinations
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
 import pandas as pd
+from scipy import sparse
+from scipy.optimize import linear_sum_assignment
+
+PASTA = Path(__file__).resolve().parent
+sys.path.append(str(PASTA.parent))
+
+# Sem argumentos, compara as duas execucoes de sempre
+EXECUCOES_PADRAO = [PASTA / "resultados_bertopic_baseline.csv", PASTA / "resultados_bertopic_com_stopwords.csv"]
+# Par de topicos com cosseno a partir disto conta como "o mesmo topico" na cobertura
+LIMIAR_CORRESPONDENCIA = 0.3
+# Com mais execucoes que isto, o relatorio resume cada matriz por execucao (as matrizes vao para --saida)
+MAXIMO_MATRIZES_IMPRESSAS = 8
+
+
+@dataclass
+class Execucao:
+    """Um resultado de topicos: o topic_info (resultados_*.csv) e, se houver, o topico de cada documento."""
+
+    nome: str
+    topicos: np.ndarray  # ids dos topicos, sem o -1, na ordem do topic_info
+    contagens: np.ndarray
+    palavras: List[List[str]]
+    outliers: int
+    documentos: Optional[np.ndarray] = None  # topico de cada documento (documentos_*.csv da varredura)
+
+    @property
+    def total_documentos(self) -> int:
+        return int(self.contagens.sum()) + self.outliers
+
+
+def ler_execucao(caminho: Path) -> Execucao:
+    caminho = Path(caminho)
+    info = pd.read_csv(caminho)
+    outliers = info["Topic"] == -1
+    validos = info[~outliers]
+    nome = caminho.stem.removeprefix("resultados_")
+    atribuicoes = caminho.with_name(f"documentos_{nome}.csv")
+    documentos = None
+    if atribuicoes.exists():
+        documentos = pd.read_csv(atribuicoes).sort_values("documento")["topico"].to_numpy(dtype=np.int64)
+    return Execucao(
+        nome=nome,
+        topicos=validos["Topic"].to_numpy(dtype=np.int64),
+        contagens=validos["Count"].to_numpy(dtype=np.int64),
+        palavras=[[str(p) for p in ast.literal_eval(r) if str(p)] for r in validos["Representation"]],
+        outliers=int(info.loc[outliers, "Count"].sum()),
+        documentos=documentos,
+    )
+
+
+def encontrar_execucoes(entradas: Sequence[str]) -> List[Path]:
+    """Arquivos resultados_*.csv informados diretamente, ou todos os de cada pasta (ex.: a saida da varredura)."""
+    caminhos = []
+    for entrada in entradas:
+        entrada = Path(entrada)
+        caminhos.extend(sorted(entrada.glob("resultados_*.csv")) if entrada.is_dir() else [entrada])
+    return caminhos
+
+
+def _normalizar(matriz: sparse.csr_matrix) -> sparse.csr_matrix:
+    normas = np.sqrt(np.asarray(matriz.multiply(matriz).sum(axis=1)).ravel())
+    return sparse.diags(1 / np.maximum(normas, 1e-12)) @ matriz
+
+
+def vetores_palavras(execucoes: List[Execucao]) -> List[sparse.csr_matrix]:
+    """Conjunto de palavras-chave de cada topico como vetor binario (normalizado) num vocabulario comum."""
+    todas = [p for e in execucoes for palavras in e.palavras for p in palavras]
+    vocabulario, colunas = np.unique(np.array(todas, dtype=object), return_inverse=True)
+    total_topicos = sum(len(e.palavras) for e in execucoes)
+    linhas = np.repeat(np.arange(total_topicos), [len(p) for e in execucoes for p in e.palavras])
+    matriz = sparse.csr_matrix((np.ones(len(todas)), (linhas, colunas.ravel())), shape=(total_topicos, len(vocabulario)))
+    # Palavra repetida na representacao conta uma vez
+    matriz.data[:] = 1.0
+    return _separar(_normalizar(matriz), execucoes)
+
+
+def vetores_ctfidf(execucoes: List[Execucao], textos: Sequence[str]) -> List[sparse.csr_matrix]:
+    """
+    c-TF-IDF de cada topico, recalculado a partir dos documentos atribuidos a ele, num vocabulario
+    comum a todas as execucoes (a mesma formula do ClassTfidfTransformer do BERTopic).
+    """
+    from sklearn.feature_extraction.text import CountVectorizer
+
+    contagens = CountVectorizer().fit_transform(textos).tocsr()
+    blocos = []
+    for e in execucoes:
+        if e.documentos is None or len(e.documentos) != contagens.shape[0]:
+            raise ValueError(f"'{e.nome}' nao tem o topico de cada um dos {contagens.shape[0]} trechos (documentos_{e.nome}.csv).")
+        if not len(e.topicos):
+            blocos.append(sparse.csr_matrix((0, contagens.shape[1])))
+            continue
+        ordem = np.argsort(e.topicos)
+        posicao = np.minimum(np.searchsorted(e.topicos, e.documentos, sorter=ordem), len(ordem) - 1)
+        no_topico = e.topicos[ordem[posicao]] == e.documentos
+        pertence = sparse.csr_matrix(
+            (np.ones(no_topico.sum()), (ordem[posicao[no_topico]], np.flatnonzero(no_topico))),
+            shape=(len(e.topicos), contagens.shape[0]),
+        )
+        por_topico = (pertence @ contagens).tocsr()
+        df = np.asarray(por_topico.sum(axis=0)).ravel()
+        media_palavras = por_topico.sum(axis=1).mean()
+        idf = np.log(media_palavras / np.maximum(df, 1) + 1) * (df > 0)
+        tf = sparse.diags(1 / np.maximum(np.asarray(por_topico.sum(axis=1)).ravel(), 1)) @ por_topico
+        blocos.append(_normalizar((tf @ sparse.diags(idf)).tocsr()))
+    return blocos
+
+
+def _separar(matriz: sparse.csr_matrix, execucoes: List[Execucao]) -> List[sparse.csr_matrix]:
+    limites = np.cumsum([0] + [len(e.topicos) for e in execucoes])
+    return [matriz[inicio:fim] for inicio, fim in zip(limites[:-1], limites[1:])]
+
+
+def alinhar(similaridade: np.ndarray):
+    """Pareamento um-para-um de topicos que maximiza a similaridade total (algoritmo hungaro)."""
+    linhas, colunas = linear_sum_assignment(similaridade, maximize=True)
+    return linhas, colunas, similaridade[linhas, colunas]
+
+
+def _codigos(rotulos: np.ndarray) -> np.ndarray:
+    """Rotulos renumerados 0..k-1 (calculado uma vez por execucao, nao uma vez por par)."""
+    return np.unique(rotulos, return_inverse=True)[1].ravel()
+
+
+def _entropia(contagens: np.ndarray) -> float:
+    p = contagens[contagens > 0] / contagens.sum()
+    return float(-(p * np.log(p)).sum())
+
+
+def _ari_nmi_codigos(codigo_a: np.ndarray, codigo_b: np.ndarray) -> tuple:
+    # Tabela de contingencia esparsa: so as celulas nao vazias, contadas com um np.unique
+    linhas, colunas = np.bincount(codigo_a), np.bincount(codigo_b)
+    celulas, tabela = np.unique(codigo_a * len(colunas) + codigo_b, return_counts=True)
+    i, j = np.divmod(celulas, len(colunas))
+    n = len(codigo_a)
+
+    pares = lambda x: float((x * (x - 1)).sum()) / 2  # noqa: E731
+    soma_celulas, soma_linhas, soma_colunas, total = pares(tabela), pares(linhas), pares(colunas), n * (n - 1) / 2
+    esperado = soma_linhas * soma_colunas / total
+    maximo = (soma_linhas + soma_colunas) / 2
+    ari = 1.0 if maximo == esperado else (soma_celulas - esperado) / (maximo - esperado)
+
+    h_a, h_b = _entropia(linhas), _entropia(colunas)
+    conjunta = tabela / n
+    informacao_mutua = float((conjunta * np.log(tabela * n / (linhas[i] * colunas[j]))).sum())
+    nmi = 1.0 if h_a == h_b == 0 else informacao_mutua / max((h_a + h_b) / 2, 1e-12)
+    return float(ari), float(nmi)
+
+
+def ari_nmi(a: np.ndarray, b: np.ndarray) -> tuple:
+    """ARI e NMI (media aritmetica das entropias, como no scikit-learn) de duas atribuicoes de documentos."""
+    return _ari_nmi_codigos(_codigos(a), _codigos(b))
+
+
+def comparar(
+    execucoes: List[Execucao], vetores: List[sparse.csr_matrix], limiar: float = LIMIAR_CORRESPONDENCIA
+) -> Dict[str, pd.DataFrame]:
+    """
+    Tabelas da comparacao de todas as execucoes entre si:
+    - resumo: topicos, documentos e outliers de cada execucao;
+    - alinhamento: cosseno medio dos pares de topicos do pareamento hungaro;
+    - cobertura: fracao dos topicos da execucao menor com par de cosseno >= limiar;
+    - ari / nmi: concordancia das atribuicoes de documentos (quando as duas execucoes as tem).
+    """
+    nomes = [e.nome for e in execucoes]
+    resumo = pd.DataFrame(
+        {
+            "topicos": [len(e.topicos) for e in execucoes],
+            "documentos": [e.total_documentos for e in execucoes],
+            "outliers": [e.outliers for e in execucoes],
+            "taxa_outliers": [e.outliers / max(e.total_documentos, 1) for e in execucoes],
+        },
+        index=pd.Index(nomes, name="execucao"),
+    )
+    tabelas = {chave: pd.DataFrame(np.eye(len(execucoes)), index=nomes, columns=nomes) for chave in ("alinhamento", "cobertura", "ari", "nmi")}
+    for chave in ("ari", "nmi"):
+        sem_documentos = [e.nome for e in execucoes if e.documentos is None]
+        tabelas[chave].loc[sem_documentos, :] = np.nan
+        tabelas[chave].loc[:, sem_documentos] = np.nan
+
+    codigos = [None if e.documentos is None else _codigos(e.documentos) for e in execucoes]
+    for i, j in combinations(range(len(execucoes)), 2):
+        similaridade = (vetores[i] @ vetores[j].T).toarray()
+        if similaridade.size:
+            _, _, valores = alinhar(similaridade)
+            alinhamento, cobertura = valores.mean(), (valores >= limiar).mean()
+        else:
+            alinhamento = cobertura = np.nan
+        valores_par = {"alinhamento": alinhamento, "cobertura": cobertura}
+        if codigos[i] is not None and codigos[j] is not None and len(codigos[i]) == len(codigos[j]):
+            valores_par["ari"], valores_par["nmi"] = _ari_nmi_codigos(codigos[i], codigos[j])
+        for chave, valor in valores_par.items():
+            tabelas[chave].iat[i, j] = tabelas[chave].iat[j, i] = valor
+    return {"resumo": resumo, **tabelas}
+
+
+def resumir_matrizes(matrizes: Dict[str, pd.DataFrame]) -> pd.DataFrame:
+    """Uma linha por execucao: media e maximo de cada matriz fora da diagonal, e a execucao mais parecida."""
+    colunas = {}
+    for chave, tabela in matrizes.items():
+        valores = tabela.to_numpy(dtype=float, copy=True)
+        np.fill_diagonal(valores, np.nan)
+        colunas[f"{chave}_medio"] = np.nanmean(valores, axis=1)
+        colunas[f"{chave}_max"] = np.nanmax(valores, axis=1)
+        if chave == "alinhamento":
+            colunas["mais_parecida"] = tabela.columns[np.nanargmax(valores, axis=1)]
+    return pd.DataFrame(colunas, index=next(iter(matrizes.values())).index)
+
+
+def pares_alinhados(a: Execucao, b: Execucao, vetores_a: sparse.csr_matrix, vetores_b: sparse.csr_matrix) -> pd.DataFrame:
+    """Topicos pareados entre duas execucoes, do par mais parecido ao menos parecido."""
+    linhas, colunas, valores = alinhar((vetores_a @ vetores_b.T).toarray())
+    pares = pd.DataFrame(
+        {
+            f"topico_{a.nome}": a.topicos[linhas],
+            f"docs_{a.nome}": a.contagens[linhas],
+            f"palavras_{a.nome}": [" ".join(a.palavras[k][:4]) for k in linhas],
+            "cosseno": valores,
+            f"topico_{b.nome}": b.topicos[colunas],
+            f"docs_{b.nome}": b.contagens[colunas],
+            f"palavras_{b.nome}": [" ".join(b.palavras[k][:4]) for k in colunas],
+        }
+    )
+    return pares.sort_values("cosseno", ascending=False, ignore_index=True)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Compara execucoes de topicos (BERTopic, LLMusic, varreduras): alinhamento hungaro, outliers e ARI/NMI."
+    )
+    parser.add_argument("entradas", nargs="*", help="Arquivos resultados_*.csv ou pastas com eles (padrao: baseline x com stopwords).")
+    parser.add_argument("--metodo", choices=["palavras", "ctfidf"], default="palavras", help="Vetor de cada topico para o cosseno.")
+    parser.add_argument("--trechos", help="Corpus dos trechos (necessario para --metodo ctfidf).")
+    parser.add_argument("--limiar", type=float, default=LIMIAR_CORRESPONDENCIA, help="Cosseno minimo para a cobertura.")
+    parser.add_argument("--detalhar", nargs=2, metavar=("A", "B"), help="Mostra os topicos pareados entre duas execucoes.")
+    parser.add_argument("--saida", help="Pasta onde gravar as tabelas em CSV.")
+    args = parser.parse_args()
+
+    inicio = time.perf_counter()
+    execucoes = [ler_execucao(c) for c in encontrar_execucoes(args.entradas or [str(c) for c in EXECUCOES_PADRAO])]
+    if len(execucoes) < 2:
+        parser.error("Informe pelo menos duas execucoes.")
+    if args.metodo == "ctfidf":
+        if not args.trechos:
+            parser.error("--metodo ctfidf requer --trechos.")
+        from corpus_colunar import ler_corpus
+
+        textos = ler_corpus(args.trechos, colunas=["letra"])["letra"].dropna().astype(str).tolist()
+        vetores = vetores_ctfidf(execucoes, textos)
+    else:
+        vetores = vetores_palavras(execucoes)
+    tabelas = comparar(execucoes, vetores, args.limiar)
+
+    pd.set_option("display.width", 200)
+    print("=" * 80)
+    print(f"COMPARACAO DE {len(execucoes)} EXECUCOES DE TOPICOS (cosseno por {args.metodo})")
+    print("=" * 80)
+    print(tabelas["resumo"].to_string(formatters={"taxa_outliers": "{:.1%}".format}))
+    titulos = {
+        "alinhamento": "Alinhamento (cosseno medio dos topicos pareados pelo hungaro)",
+        "cobertura": f"Cobertura (fracao de topicos pareados com cosseno >= {args.limiar})",
+        "ari": "ARI (atribuicao dos documentos)",
+        "nmi": "NMI (atribuicao dos documentos)",
+    }
+    matrizes = [chave for chave in titulos if not tabelas[chave].isna().all().all()]
+    if len(execucoes) <= MAXIMO_MATRIZES_IMPRESSAS:
+        for chave in matrizes:
+            print(f"\n### {titulos[chave]} ###")
+            print(tabelas[chave].round(3).to_string())
+    else:
+        print(f"\n### Media e maximo de cada execucao contra as demais ({', '.join(matrizes)}) ###")
+        print(resumir_matrizes({chave: tabelas[chave] for chave in matrizes}).round(3).to_string())
+
+    detalhar = args.detalhar or ([execucoes[0].nome, execucoes[1].nome] if len(execucoes) == 2 else None)
+    if detalhar:
+        indices = {e.nome: k for k, e in enumerate(execucoes)}
+        desconhecidas = [n for n in detalhar if n not in indices]
+        if desconhecidas:
+            parser.error(f"Execucao desconhecida: {', '.join(desconhecidas)}")
+        i, j = indices[detalhar[0]], indices[detalhar[1]]
+        pares = pares_alinhados(execucoes[i], execucoes[j], vetores[i], vetores[j])
+        print(f"\n### Topicos pareados: {detalhar[0]} x {detalhar[1]} (10 mais e 5 menos parecidos) ###")
+        print(pd.concat([pares.head(10), pares.tail(5)]).to_string(index=False, formatters={"cosseno": "{:.3f}".format}))
+
+    if args.saida:
+        pasta = Path(args.saida)
+        pasta.mkdir(parents=True, exist_ok=True)
+        for chave, tabela in tabelas.items():
+            tabela.to_csv(pasta / f"{chave}.csv")
+        print(f"\nTabelas salvas em: {pasta}")
+    print(f"\nTempo: {time.perf_counter() - inicio:.2f}s")
+
 
-# Carregar os dois resultados
-df_baseline = pd.read_csv('resultados_bertopic_baseline.csv')
-df_stopwords = pd.read_csv('resultados_bertopic_com_stopwords.csv')
-
-print("="*80)
-print("COMPARAÇÃO: BASELINE (SEM STOPWORDS) vs COM STOPWORDS")
-print("="*80)
-
-print("\n### BASELINE (SEM STOPWORDS) ###")
-print(f"Total de tópicos: {len(df_baseline)}")
-print(f"Total de documentos: {df_baseline['Count'].sum()}")
-print(f"Documentos no tópico -1 (outliers): {df_baseline[df_baseline['Topic'] == -1]['Count'].sum()}")
-print("\nPrimeiros 15 tópicos:")
-print(df_baseline[['Topic', 'Count', 'Name']].head(15).to_string())
-
-print("\n" + "="*80)
-print("\n### COM STOPWORDS ###")
-print(f"Total de tópicos: {len(df_stopwords)}")
-print(f"Total de documentos: {df_stopwords['Count'].sum()}")
-print(f"Documentos no tópico -1 (outliers): {df_stopwords[df_stopwords['Topic'] == -1]['Count'].sum()}")
-print("\nPrimeiros 15 tópicos:")
-print(df_stopwords[['Topic', 'Count', 'Name']].head(15).to_string())
-
-print("\n" + "="*80)
-print("\n### DIFERENÇAS ###")
-print(f"Mudança no número de tópicos: {len(df_stopwords) - len(df_baseline)}")
-outliers_baseline = df_baseline[df_baseline['Topic'] == -1]['Count'].sum()
-outliers_stopwords = df_stopwords[df_stopwords['Topic'] == -1]['Count'].sum()
-print(f"Mudança nos outliers: {outliers_stopwords - outliers_baseline} ({outliers_stopwords/10722*100:.1f}% vs {outliers_baseline/10722*100:.1f}%)")
-
-print("\n### PRINCIPAIS TÓPICOS - BASELINE ###")
-for i, row in df_baseline[df_baseline['Topic'] != -1].head(5).iterrows():
-    print(f"\nTópico {row['Topic']} ({row['Count']} docs): {row['Name']}")
-
-print("\n### PRINCIPAIS TÓPICOS - COM STOPWORDS ###")
-for i, row in df_stopwords[df_stopwords['Topic'] != -1].head(5).iterrows():
-    print(f"\nTópico {row['Topic']} ({row['Count']} docs): {row['Name']}")
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,28 @@
-import pandas as pd
+import sys
+from pathlib import Path
+
 from bertopic import BERTopic
 from sentence_transformers import SentenceTransformer
 # Importação necessária para stopwords
 from sklearn.feature_extraction.text import CountVectorizer 
 
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from cache_embeddings import codificar_com_cache
+from corpus_colunar import ler_corpus
+from stopwords_sertanejo import lista_final_stopwords
+
+# CSV, Parquet ou Arrow; pode ser passado como argumento
+ARQUIVO_TRECHOS = sys.argv[1] if len(sys.argv) > 1 else "../pre_processamento/musicas_por_trechos_limpo_20251116_112423.csv"
+# Pasta onde o CSV de tópicos é gravado (segundo argumento; padrão: diretório atual)
+PASTA_SAIDA = Path(sys.argv[2]) if len(sys.argv) > 2 else Path(".")
+
 print("--- Iniciando o pipeline BERTopic (com Stopwords) ---")
 
 # --- 1. Carregar os Dados ---
 try:
     # Carrega o dataset de trechos pré-processados
-    df = pd.read_csv("../pre_processamento/musicas_por_trechos_limpo_20251116_112423.csv")
+    # Só a coluna 'letra' é lida (no Parquet/Arrow as demais nem saem do disco)
+    df = ler_corpus(ARQUIVO_TRECHOS, colunas=["letra"])
     
     # Usa a coluna 'letra' que contém os trechos das músicas
     trechos = df['letra'].dropna().astype(str).tolist()
@@ -17,8 +30,8 @@ try:
     print(f"Carregados {len(trechos)} trechos únicos.")
     print(f"Exemplo do primeiro trecho: {trechos[0]}")
 except FileNotFoundError:
-    print("Erro: Arquivo CSV não encontrado.")
-    print("Verifique se o arquivo está em '../pre_processamento/musicas_por_trechos_limpo_20251116_112423.csv'")
+    print("Erro: Arquivo de trechos não encontrado.")
+    print(f"Verifique se o arquivo está em '{ARQUIVO_TRECHOS}'")
     exit()
 except KeyError:
     print("Erro: A coluna 'letra' não foi encontrada no CSV.")
@@ -29,32 +42,15 @@ except Exception as e:
     exit()
 
 # --- 2. Configurar o Modelo de Embedding ---
+MODELO_EMBEDDING = "paraphrase-multilingual-MiniLM-L12-v2"
 print("Carregando modelo de embedding (isso pode levar um momento)...")
 # Este é um bom modelo multilíngue que entende bem o português.
-embedding_model = SentenceTransformer("paraphrase-multilingual-MiniLM-L12-v2")
+embedding_model = SentenceTransformer(MODELO_EMBEDDING)
 
 # --- 3. Definir Stopwords e Vectorizer ---
 print("Configurando o Vectorizer com stopwords...")
 
-# Lista de interjeições e "lixo" que você identificou no Tópico 13
-interjeicoes = [
-    'oh', 'uou', 'ah', 'ooh', 'uô', 'oi', 'iê', 'ha', 'eh', 'uôu', 
-    'nanana', 'ererê', 'uh', 'hmm', 'hey', 'laia'
-]
-
-# Stopwords comuns do português (incluindo as vistas no Tópico -1)
-stopwords_pt = [
-        'ser','sou','é','era','foi','estou','tô','ta','tá','tava','estar','vamos','vou','ia','ir','ver','vi','vendo', 'tipo',
-        'dizer','disse','fala','falar','falou','diz','quer','querer','quero','pode','poder','podia','deve','dever', 'qual', 'está',
-        'tem','têm','tenho','tinha','ter','ficar','fica','ficou','ficando','deixar','deixa','deixou', 'nóis', 'eu', 'demais', 'alguém',
-        'pra','pro','pros','q','pq','porque','que','se','me','te','lhe','ela','ele','elas','eles','cê','você','vocês','tb', 'oi',
-        'iê','ê','ô','ah','oh','ei','uai','oxe','porra','pá','opa','oba','aê','ae','yeah','la','lá', 'aí', 'ai', 'não', 'todo',
-        'a','o','as','os','de','do','da','dos','das','em','no','na','nos','nas','por','para','com','sem','sobre','entre'
-]
-
-# Combinar as duas listas (usando 'set' para garantir palavras únicas)
-lista_final_stopwords = list(set(interjeicoes + stopwords_pt))
-
+# lista_final_stopwords (interjeições + stopwords comuns do português) vem de stopwords_sertanejo.py
 # Criar um modelo de vetorização que USA essa lista de stopwords
 # min_df=2 significa que a palavra deve aparecer em pelo menos 2 documentos
 # para ser considerada parte da representação do tópico.
@@ -71,7 +67,9 @@ topic_model = BERTopic(
 )
 
 print("Iniciando o treinamento do modelo... (Isso pode levar vários minutos)")
-topics, probabilities = topic_model.fit_transform(trechos)
+# Só os textos que ainda não estão no cache são codificados; o BERTopic recebe os embeddings prontos
+embeddings = codificar_com_cache(trechos, MODELO_EMBEDDING, embedding_model)
+topics, probabilities = topic_model.fit_transform(trechos, embeddings=embeddings)
 
 # --- 5. Visualizar os Resultados ---
 print("\n--- TÓPICOS ENCONTRADOS (BERTopic com Stopwords) ---")
@@ -79,7 +77,8 @@ topic_info = topic_model.get_topic_info()
 print(topic_info)
 
 # Salva os resultados para análise posterior
-topic_info.to_csv("resultados_bertopic_com_stopwords.csv", index=False)
+PASTA_SAIDA.mkdir(parents=True, exist_ok=True)
+topic_info.to_csv(PASTA_SAIDA / "resultados_bertopic_com_stopwords.csv", index=False)
 
 print("\n--- Detalhes dos 5 Tópicos Mais Frequentes ---")
 # Mostra as palavras-chave dos 5 tópicos principais (sem contar o -1, que são outliers)
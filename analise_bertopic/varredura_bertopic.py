@@ -0,0 +1,296 @@
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+PASTA = Path(__file__).resolve().parent
+sys.path.append(str(PASTA.parent))
+
+from corpus_colunar import ler_corpus  # noqa: E402
+from stopwords_sertanejo import lista_final_stopwords  # noqa: E402
+
+PASTA_CACHE = PASTA / "cache_varredura"
+MODELO_EMBEDDING = "paraphrase-multilingual-MiniLM-L12-v2"
+
+# Padroes do BERTopic, com random_state fixo (sem ele o UMAP muda a cada execucao e nao ha o que reaproveitar)
+UMAP_PADRAO = {"n_neighbors": 15, "n_components": 5, "min_dist": 0.0, "metric": "cosine", "random_state": 42}
+HDBSCAN_PADRAO = {"min_cluster_size": 10, "metric": "euclidean", "cluster_selection_method": "eom"}
+STOPWORDS = {"sertanejo": lista_final_stopwords}
+
+
+@dataclass
+class ConfigBertopic:
+    """
+    Uma configuracao da varredura. `umap` e `hdbscan` sobrescrevem os padroes acima;
+    `vetorizador` vai para o CountVectorizer, e `stopwords` e o nome de uma lista de STOPWORDS.
+    """
+
+    nome: str
+    umap: Dict = field(default_factory=dict)
+    hdbscan: Dict = field(default_factory=dict)
+    vetorizador: Dict = field(default_factory=dict)
+    stopwords: Optional[str] = None
+
+    def parametros_umap(self) -> Dict:
+        return {**UMAP_PADRAO, **self.umap}
+
+    def parametros_hdbscan(self) -> Dict:
+        return {**HDBSCAN_PADRAO, **self.hdbscan}
+
+
+# baseline e com_stopwords reproduzem os dois resultados_bertopic_*.csv; as demais variam uma coisa de cada vez
+GRADE_PADRAO = [
+    ConfigBertopic("baseline"),
+    ConfigBertopic("com_stopwords", stopwords="sertanejo", vetorizador={"min_df": 2}),
+    ConfigBertopic("com_stopwords_bigramas", stopwords="sertanejo", vetorizador={"min_df": 2, "ngram_range": [1, 2]}),
+    ConfigBertopic("com_stopwords_cluster20", hdbscan={"min_cluster_size": 20}, stopwords="sertanejo", vetorizador={"min_df": 2}),
+    ConfigBertopic("com_stopwords_vizinhos30", umap={"n_neighbors": 30}, stopwords="sertanejo", vetorizador={"min_df": 2}),
+]
+
+
+def ler_grade(caminho: Path) -> List[ConfigBertopic]:
+    """Grade em JSON: lista de objetos com os campos de ConfigBertopic."""
+    configs = [ConfigBertopic(**item) for item in json.loads(Path(caminho).read_text(encoding="utf-8"))]
+    nomes = [c.nome for c in configs]
+    repetidos = sorted({n for n in nomes if nomes.count(n) > 1})
+    if repetidos:
+        raise ValueError(f"Nomes repetidos na grade: {', '.join(repetidos)}")
+    for config in configs:
+        if config.stopwords is not None and config.stopwords not in STOPWORDS:
+            raise ValueError(f"Lista de stopwords desconhecida em '{config.nome}': {config.stopwords}")
+    return configs
+
+
+def _chave(*partes) -> str:
+    return hashlib.sha256(json.dumps(partes, sort_keys=True).encode("utf-8")).hexdigest()[:20]
+
+
+def _salvar_npy(caminho: Path, dados: np.ndarray) -> None:
+    caminho.parent.mkdir(parents=True, exist_ok=True)
+    temporario = caminho.with_name(f"{caminho.name}.{os.getpid()}.tmp")
+    with open(temporario, "wb") as fh:
+        np.save(fh, dados)
+    os.replace(temporario, caminho)
+
+
+# --- Trabalhos executados nos processos filhos ---
+
+_documentos: List[str] = []
+
+
+def _iniciar_processo(documentos: List[str]) -> None:
+    global _documentos
+    _documentos = documentos
+
+
+def _reduzir(caminho_embeddings: str, parametros: Dict, destino: str) -> float:
+    from umap import UMAP
+
+    inicio = time.perf_counter()
+    embeddings = np.load(caminho_embeddings, mmap_mode="r")
+    projecao = UMAP(**parametros, low_memory=False).fit_transform(np.asarray(embeddings))
+    _salvar_npy(Path(destino), np.asarray(projecao, dtype=np.float32))
+    return time.perf_counter() - inicio
+
+
+def _agrupar(caminho_projecao: str, parametros: Dict, destino: str) -> float:
+    from hdbscan import HDBSCAN
+
+    inicio = time.perf_counter()
+    rotulos = HDBSCAN(**parametros).fit(np.load(caminho_projecao)).labels_
+    _salvar_npy(Path(destino), rotulos.astype(np.int64))
+    return time.perf_counter() - inicio
+
+
+def _representar(config: ConfigBertopic, caminho_embeddings: str, caminho_rotulos: str, pasta_saida: str) -> Dict:
+    """
+    So o passo de representacao (c-TF-IDF): o BERTopic recebe a projecao e os rotulos prontos
+    (BaseDimensionalityReduction + BaseCluster, com os rotulos em y).
+    """
+    from bertopic import BERTopic
+    from bertopic.cluster import BaseCluster
+    from bertopic.dimensionality import BaseDimensionalityReduction
+    from sklearn.feature_extraction.text import CountVectorizer
+
+    inicio = time.perf_counter()
+    opcoes = dict(config.vetorizador)
+    if "ngram_range" in opcoes:
+        opcoes["ngram_range"] = tuple(opcoes["ngram_range"])
+    if config.stopwords:
+        opcoes["stop_words"] = STOPWORDS[config.stopwords]
+    modelo = BERTopic(
+        # Como no rodar_bertopic.py: com o padrao ("english") o BERTopic tira os acentos antes do c-TF-IDF
+        language="multilingual",
+        umap_model=BaseDimensionalityReduction(),
+        hdbscan_model=BaseCluster(),
+        vectorizer_model=CountVectorizer(**opcoes),
+    )
+    topicos, _ = modelo.fit_transform(
+        _documentos, embeddings=np.asarray(np.load(caminho_embeddings, mmap_mode="r")), y=np.load(caminho_rotulos)
+    )
+
+    pasta = Path(pasta_saida)
+    info = modelo.get_topic_info()
+    info.to_csv(pasta / f"resultados_{config.nome}.csv", index=False)
+    pd.DataFrame({"documento": np.arange(len(topicos)), "topico": topicos}).to_csv(
+        pasta / f"documentos_{config.nome}.csv", index=False
+    )
+    return {
+        "topicos": int((info["Topic"] != -1).sum()),
+        "outliers": int(info.loc[info["Topic"] == -1, "Count"].sum()),
+        "segundos_representacao": time.perf_counter() - inicio,
+    }
+
+
+def _mapear(trabalho, argumentos: List[tuple], paralelo: int, documentos: Optional[List[str]] = None) -> list:
+    """Roda os trabalhos independentes em processos separados (ou aqui mesmo, com paralelo=1)."""
+    if not argumentos:
+        return []
+    if paralelo <= 1 or len(argumentos) == 1:
+        _iniciar_processo(documentos or [])
+        return [trabalho(*a) for a in argumentos]
+    with ProcessPoolExecutor(min(paralelo, len(argumentos)), initializer=_iniciar_processo, initargs=(documentos or [],)) as pool:
+        return list(pool.map(trabalho, *zip(*argumentos)))
+
+
+def varrer(
+    documentos: List[str],
+    embeddings: np.ndarray,
+    configs: List[ConfigBertopic],
+    pasta_saida: Path,
+    pasta_cache: Path = PASTA_CACHE,
+    paralelo: int = 1,
+) -> pd.DataFrame:
+    """
+    Roda cada configuracao reaproveitando o que ja foi calculado:
+    - projecao UMAP: chave = embeddings + parametros do UMAP;
+    - rotulos HDBSCAN: chave = projecao + parametros do HDBSCAN;
+    - representacao (c-TF-IDF): sempre refeita, e a unica etapa que depende do vetorizador.
+    Projecoes e agrupamentos distintos que faltam, e depois as representacoes, rodam em paralelo.
+    """
+    pasta_saida.mkdir(parents=True, exist_ok=True)
+    embeddings = np.ascontiguousarray(embeddings, dtype=np.float32)
+    chave_embeddings = hashlib.sha256(embeddings.tobytes()).hexdigest()[:20]
+    caminho_embeddings = pasta_cache / "embeddings" / f"{chave_embeddings}.npy"
+    if not caminho_embeddings.exists():
+        _salvar_npy(caminho_embeddings, embeddings)
+
+    chaves_umap, chaves_hdbscan = {}, {}
+    for config in configs:
+        chaves_umap[config.nome] = _chave(chave_embeddings, config.parametros_umap())
+        chaves_hdbscan[config.nome] = _chave(chaves_umap[config.nome], config.parametros_hdbscan())
+
+    def caminho(tipo: str, chave: str) -> Path:
+        return pasta_cache / tipo / f"{chave}.npy"
+
+    # 1. Projecoes UMAP que ainda nao estao no cache (uma por conjunto distinto de parametros)
+    faltando_umap = {}
+    for config in configs:
+        chave = chaves_umap[config.nome]
+        if not caminho("umap", chave).exists():
+            faltando_umap.setdefault(chave, config.parametros_umap())
+    print(f"UMAP: {len(set(chaves_umap.values()))} projecoes distintas, {len(faltando_umap)} a calcular.")
+    tempos_umap = dict(
+        zip(
+            faltando_umap,
+            _mapear(_reduzir, [(str(caminho_embeddings), p, str(caminho("umap", c))) for c, p in faltando_umap.items()], paralelo),
+        )
+    )
+
+    # 2. Agrupamentos HDBSCAN que faltam
+    faltando_hdbscan = {}
+    for config in configs:
+        chave = chaves_hdbscan[config.nome]
+        if not caminho("hdbscan", chave).exists():
+            faltando_hdbscan.setdefault(chave, (chaves_umap[config.nome], config.parametros_hdbscan()))
+    print(f"HDBSCAN: {len(set(chaves_hdbscan.values()))} agrupamentos distintos, {len(faltando_hdbscan)} a calcular.")
+    tempos_hdbscan = dict(
+        zip(
+            faltando_hdbscan,
+            _mapear(
+                _agrupar,
+                [(str(caminho("umap", u)), p, str(caminho("hdbscan", c))) for c, (u, p) in faltando_hdbscan.items()],
+                paralelo,
+            ),
+        )
+    )
+
+    # 3. Representacao de cada configuracao
+    print(f"Representacao (c-TF-IDF): {len(configs)} configuracoes.")
+    argumentos = [(c, str(caminho_embeddings), str(caminho("hdbscan", chaves_hdbscan[c.nome])), str(pasta_saida)) for c in configs]
+    representacoes = _mapear(_representar, argumentos, paralelo, documentos)
+
+    linhas = []
+    for config, representacao in zip(configs, representacoes):
+        chave_u, chave_h = chaves_umap[config.nome], chaves_hdbscan[config.nome]
+        linhas.append(
+            {
+                "nome": config.nome,
+                **representacao,
+                "umap": chave_u,
+                "umap_do_cache": chave_u not in tempos_umap,
+                "segundos_umap": tempos_umap.pop(chave_u, 0.0),
+                "hdbscan": chave_h,
+                "hdbscan_do_cache": chave_h not in tempos_hdbscan,
+                "segundos_hdbscan": tempos_hdbscan.pop(chave_h, 0.0),
+                "config": json.dumps(asdict(config), ensure_ascii=False),
+            }
+        )
+    resumo = pd.DataFrame(linhas)
+    resumo.to_csv(pasta_saida / "resumo_varredura.csv", index=False)
+    return resumo
+
+
+def calcular_embeddings(documentos: List[str], backend: str) -> np.ndarray:
+    from cache_embeddings import codificar_com_cache
+
+    if backend == "onnx":
+        from embeddings_onnx import ModeloOnnx
+
+        modelo = ModeloOnnx(MODELO_EMBEDDING)
+        return codificar_com_cache(documentos, modelo.nome_cache, modelo)
+    from sentence_transformers import SentenceTransformer
+
+    return codificar_com_cache(documentos, MODELO_EMBEDDING, SentenceTransformer(MODELO_EMBEDDING))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Varredura de configuracoes do BERTopic com UMAP e HDBSCAN em cache: so o c-TF-IDF e refeito quando muda o vetorizador."
+    )
+    parser.add_argument(
+        "trechos", nargs="?", default=str(PASTA.parent / "pre_processamento" / "musicas_por_trechos_limpo_20251116_112423.csv")
+    )
+    parser.add_argument("--grade", help="JSON com a lista de configuracoes (padrao: GRADE_PADRAO).")
+    parser.add_argument("--saida", default=str(PASTA / "varredura"), help="Pasta dos resultados (padrao: analise_bertopic/varredura).")
+    parser.add_argument("--cache", default=str(PASTA_CACHE), help="Pasta do cache de projecoes e rotulos.")
+    parser.add_argument("--paralelo", type=int, default=os.cpu_count() or 1, help="Processos simultaneos (padrao: numero de CPUs).")
+    parser.add_argument("--backend", choices=["sentence-transformers", "onnx"], default="sentence-transformers")
+    args = parser.parse_args()
+
+    configs = ler_grade(Path(args.grade)) if args.grade else GRADE_PADRAO
+    documentos = ler_corpus(args.trechos, colunas=["letra"])["letra"].dropna().astype(str).tolist()
+    print(f"{len(documentos)} trechos, {len(configs)} configuracoes, ate {args.paralelo} processos.")
+
+    inicio = time.perf_counter()
+    embeddings = calcular_embeddings(documentos, args.backend)
+    resumo = varrer(documentos, embeddings, configs, Path(args.saida), Path(args.cache), args.paralelo)
+
+    print()
+    print(resumo[["nome", "topicos", "outliers", "umap_do_cache", "hdbscan_do_cache", "segundos_umap", "segundos_hdbscan", "segundos_representacao"]].to_string(index=False))
+    print(f"\nTempo total: {time.perf_counter() - inicio:.1f}s. Resultados em: {args.saida}")
+
+
+if __name__ == "__main__":
+    main()
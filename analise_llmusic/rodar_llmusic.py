@@ -3,10 +3,16 @@ import requests # Usaremos 'requests' para chamar a API local do Ollama
 import json
 import time
 import random
+import sys
+from pathlib import Path
 from bertopic import BERTopic
 from sentence_transformers import SentenceTransformer
 # A biblioteca do Google NÃO é mais necessária aqui
 
+# Cache de embeddings compartilhado (cache_embeddings.py na raiz do projeto)
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from cache_embeddings import codificar_com_cache
+
 print("--- Iniciando o pipeline LLMusic (Versão Local com Ollama) ---")
 
 # --- 1. Carregar os Dados ---
@@ -84,8 +90,9 @@ pd.DataFrame(lista_de_temas_gerados, columns=["tema"]).to_csv("temas_gerados_llm
 # --- 3. Etapa 2: Agrupamento de Temas (BERTopic) ---
 print("\n--- ETAPA 2: Agrupando temas com BERTopic ---")
 
+MODELO_EMBEDDING = "paraphrase-multilingual-MiniLM-L12-v2"
 print("Carregando modelo de embedding...")
-embedding_model = SentenceTransformer("paraphrase-multilingual-MiniLM-L12-v2")
+embedding_model = SentenceTransformer(MODELO_EMBEDDING)
 
 print("Instanciando o modelo BERTopic...")
 topic_model_llmusic = BERTopic(
@@ -95,7 +102,9 @@ topic_model_llmusic = BERTopic(
 )
 
 print("Iniciando o treinamento do modelo nos temas gerados...")
-topics, probabilities = topic_model_llmusic.fit_transform(lista_de_temas_gerados)
+# Só os textos que ainda não estão no cache são codificados; o BERTopic recebe os embeddings prontos
+embeddings = codificar_com_cache(lista_de_temas_gerados, MODELO_EMBEDDING, embedding_model)
+topics, probabilities = topic_model_llmusic.fit_transform(lista_de_temas_gerados, embeddings=embeddings)
 
 # --- 4. Visualizar os Resultados ---
 print("\n--- TÓPICOS ENCONTRADOS (Pipeline LLMusic - Local) ---")
@@ -4,26 +4,38 @@ import requests # Usaremos 'requests' para chamar a API local do Ollama
 import json
 import time
 import random
+import sys
 from pathlib import Path
 from bertopic import BERTopic
 from sentence_transformers import SentenceTransformer
 # A biblioteca do Google NÃO é mais necessária aqui
 
+# Cache de embeddings compartilhado (cache_embeddings.py na raiz do projeto)
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from cache_embeddings import codificar_com_cache
+from embeddings_onnx import ModeloOnnx, backend_bertopic
+
 MODEL_NAME = os.environ.get("LLMUSIC_MODEL", "llama3:8b")
 N_ITERACOES = int(os.environ.get("LLMUSIC_ITERACOES", 10))
 TRECHOS_POR_LOTE = int(os.environ.get("LLMUSIC_TRECHOS_LOTE", 20))
 TEMAS_POR_LOTE = int(os.environ.get("LLMUSIC_TEMAS_POR_LOTE", 5))
 EMBEDDING_DEVICE = os.environ.get("LLMUSIC_EMBEDDING_DEVICE", "cuda")
+# "onnx": modelo int8 no ONNX Runtime, para máquinas sem GPU (exportar antes com embeddings_onnx.py --exportar)
+EMBEDDING_BACKEND = os.environ.get("LLMUSIC_EMBEDDING_BACKEND", "sentence-transformers")
 
 print("--- Iniciando o pipeline LLMusic (Versão Local com Ollama) ---")
 print(
     f"Configuração: modelo={MODEL_NAME}, iteracoes={N_ITERACOES}, "
     f"lote={TRECHOS_POR_LOTE}, temas_por_lote={TEMAS_POR_LOTE}, "
-    f"device_embedding={EMBEDDING_DEVICE}"
+    f"device_embedding={EMBEDDING_DEVICE}, backend_embedding={EMBEDDING_BACKEND}"
 )
 
 # --- 1. Carregar os Dados ---
-data_path = Path(__file__).resolve().parent.parent / "pre_processamento" / "musicas_por_trechos_limpo_20251116_112423.csv"
+# Pode ser passado como argumento (ex.: pelo executar_pipeline.py)
+data_path = Path(sys.argv[1]) if len(sys.argv) > 1 else Path(__file__).resolve().parent.parent / "pre_processamento" / "musicas_por_trechos_limpo_20251116_112423.csv"
+# Pasta onde os CSVs de temas e tópicos são gravados (segundo argumento; padrão: diretório atual)
+pasta_saida = Path(sys.argv[2]) if len(sys.argv) > 2 else Path(".")
+pasta_saida.mkdir(parents=True, exist_ok=True)
 print(f"Lendo dados de: {data_path}")
 try:
     df = pd.read_csv(data_path)
@@ -107,16 +119,24 @@ for i in range(N_ITERACOES):
 print(f"\n--- Geração de Temas Concluída ---")
 print(f"Total de temas gerados: {len(lista_de_temas_gerados)}")
 
-pd.DataFrame(lista_de_temas_gerados, columns=["tema"]).to_csv("temas_gerados_llmusic_local.csv", index=False)
+pd.DataFrame(lista_de_temas_gerados, columns=["tema"]).to_csv(pasta_saida / "temas_gerados_llmusic_local.csv", index=False)
 
 # --- 3. Etapa 2: Agrupamento de Temas (BERTopic) ---
 print("\n--- ETAPA 2: Agrupando temas com BERTopic ---")
 
+MODELO_EMBEDDING = "paraphrase-multilingual-MiniLM-L12-v2"
 print("Carregando modelo de embedding...")
-embedding_model = SentenceTransformer(
-    "paraphrase-multilingual-MiniLM-L12-v2",
-    device=EMBEDDING_DEVICE
-)
+if EMBEDDING_BACKEND == "onnx":
+    modelo_onnx = ModeloOnnx(MODELO_EMBEDDING)
+    nome_cache = modelo_onnx.nome_cache
+    embedding_model = backend_bertopic(modelo_onnx)
+else:
+    modelo_onnx = None
+    nome_cache = MODELO_EMBEDDING
+    embedding_model = SentenceTransformer(
+        MODELO_EMBEDDING,
+        device=EMBEDDING_DEVICE
+    )
 
 print("Instanciando o modelo BERTopic...")
 topic_model_llmusic = BERTopic(
@@ -126,13 +146,15 @@ topic_model_llmusic = BERTopic(
 )
 
 print("Iniciando o treinamento do modelo nos temas gerados...")
-topics, probabilities = topic_model_llmusic.fit_transform(lista_de_temas_gerados)
+# Só os textos que ainda não estão no cache são codificados; o BERTopic recebe os embeddings prontos
+embeddings = codificar_com_cache(lista_de_temas_gerados, nome_cache, modelo_onnx or embedding_model)
+topics, probabilities = topic_model_llmusic.fit_transform(lista_de_temas_gerados, embeddings=embeddings)
 
 # --- 4. Visualizar os Resultados ---
 print("\n--- TÓPICOS ENCONTRADOS (Pipeline LLMusic - Local) ---")
 topic_info_llmusic = topic_model_llmusic.get_topic_info()
 print(topic_info_llmusic)
 
-topic_info_llmusic.to_csv("resultados_llmusic_pipeline_local.csv", index=False)
+topic_info_llmusic.to_csv(pasta_saida / "resultados_llmusic_pipeline_local.csv", index=False)
 
 print("\n--- Script Concluído ---")
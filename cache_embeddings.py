@@ -0,0 +1,167 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import re
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterable, Optional
+
+import numpy as np
+
+PASTA_PADRAO = Path(__file__).resolve().parent / "cache_embeddings"
+CAPACIDADE_INICIAL = 4096
+TRAVA_EXPIRA_SEGUNDOS = 600
+
+
+def hash_textos(textos: Iterable[str]) -> np.ndarray:
+    """Hash de 64 bits (blake2b) de cada texto: a chave do texto dentro do cache de um modelo."""
+    textos = list(textos)
+    return np.fromiter(
+        (int.from_bytes(hashlib.blake2b(t.encode("utf-8"), digest_size=8).digest(), "little") for t in textos),
+        dtype=np.uint64,
+        count=len(textos),
+    )
+
+
+class CacheEmbeddings:
+    """
+    Embeddings de um modelo guardados em disco:
+    - vetores.npy: matriz float16 (capacidade x dimensao), aberta com memmap;
+    - chaves.npy: hash de cada linha, na ordem em que foram gravadas;
+    - meta.json: modelo, dimensao e quantas linhas valem (gravado por ultimo, e o ponto de confirmacao).
+    A busca e vetorizada (searchsorted sobre as chaves ordenadas). Gravacoes de processos
+    diferentes (ex.: BERTopic e LLMusic em paralelo no executar_pipeline.py) passam por uma trava.
+    """
+
+    def __init__(self, nome_modelo: str, pasta: Optional[Path | str] = None):
+        self.nome_modelo = nome_modelo
+        self.pasta = Path(pasta or PASTA_PADRAO) / re.sub(r"[^A-Za-z0-9_.-]+", "_", nome_modelo)
+        self._vetores = None
+        self._carregar()
+
+    @property
+    def tamanho(self) -> int:
+        return self._n
+
+    def _carregar(self) -> None:
+        caminho_meta = self.pasta / "meta.json"
+        self._vetores = None
+        if not caminho_meta.exists():
+            self._n, self.dimensao = 0, None
+            self._chaves = np.empty(0, dtype=np.uint64)
+        else:
+            meta = json.loads(caminho_meta.read_text(encoding="utf-8"))
+            if meta["modelo"] != self.nome_modelo:
+                raise ValueError(f"Cache em {self.pasta} e do modelo {meta['modelo']}, nao de {self.nome_modelo}")
+            self._n, self.dimensao = meta["n"], meta["dimensao"]
+            self._chaves = np.load(self.pasta / "chaves.npy")[: self._n]
+            if self._n:
+                self._vetores = np.load(self.pasta / "vetores.npy", mmap_mode="r")
+        self._ordem = np.argsort(self._chaves, kind="stable")
+        self._chaves_ordenadas = self._chaves[self._ordem]
+
+    def buscar(self, chaves: np.ndarray) -> np.ndarray:
+        """Linha de cada chave no cache, ou -1 quando nao esta."""
+        posicoes = np.full(len(chaves), -1, dtype=np.int64)
+        if not self._n or not len(chaves):
+            return posicoes
+        idx = np.minimum(np.searchsorted(self._chaves_ordenadas, chaves), self._n - 1)
+        achou = self._chaves_ordenadas[idx] == chaves
+        posicoes[achou] = self._ordem[idx[achou]]
+        return posicoes
+
+    def vetores(self, posicoes: np.ndarray) -> np.ndarray:
+        """Copia (float16) das linhas pedidas; so essas paginas do arquivo sao lidas."""
+        return np.asarray(self._vetores[posicoes])
+
+    @contextmanager
+    def _trava(self):
+        self.pasta.mkdir(parents=True, exist_ok=True)
+        caminho = self.pasta / "gravando.lock"
+        while True:
+            try:
+                fd = os.open(caminho, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+                break
+            except FileExistsError:
+                # Trava esquecida por um processo que morreu no meio
+                try:
+                    if time.time() - caminho.stat().st_mtime > TRAVA_EXPIRA_SEGUNDOS:
+                        caminho.unlink()
+                except FileNotFoundError:
+                    pass
+                time.sleep(0.1)
+        try:
+            os.write(fd, str(os.getpid()).encode())
+            os.close(fd)
+            yield
+        finally:
+            caminho.unlink(missing_ok=True)
+
+    def adicionar(self, chaves: np.ndarray, vetores: np.ndarray) -> None:
+        """Acrescenta embeddings novos (chaves que ja estao no cache sao ignoradas)."""
+        with self._trava():
+            # Outro processo pode ter gravado desde a leitura: recarrega antes de acrescentar
+            self._carregar()
+            novas = self.buscar(chaves) < 0
+            chaves, vetores = chaves[novas], np.asarray(vetores)[novas]
+            if not len(chaves):
+                return
+            if self.dimensao is None:
+                self.dimensao = int(vetores.shape[1])
+            elif vetores.shape[1] != self.dimensao:
+                raise ValueError(f"Dimensao {vetores.shape[1]} diferente da do cache ({self.dimensao})")
+
+            total = self._n + len(chaves)
+            caminho_vetores = self.pasta / "vetores.npy"
+            capacidade = self._vetores.shape[0] if self._vetores is not None else 0
+            self._vetores = None
+            if total > capacidade:
+                # Cresce dobrando: copia para um arquivo maior e troca de uma vez
+                nova = max(CAPACIDADE_INICIAL, 2 * capacidade, total)
+                temporario = self.pasta / "vetores.npy.tmp"
+                maior = np.lib.format.open_memmap(temporario, mode="w+", dtype=np.float16, shape=(nova, self.dimensao))
+                if self._n:
+                    antigo = np.load(caminho_vetores, mmap_mode="r")
+                    maior[: self._n] = antigo[: self._n]
+                    del antigo
+                maior.flush()
+                del maior
+                os.replace(temporario, caminho_vetores)
+
+            destino = np.load(caminho_vetores, mmap_mode="r+")
+            destino[self._n : total] = vetores.astype(np.float16)
+            destino.flush()
+            del destino
+
+            np.save(self.pasta / "chaves.npy.tmp.npy", np.concatenate([self._chaves, chaves]))
+            os.replace(self.pasta / "chaves.npy.tmp.npy", self.pasta / "chaves.npy")
+            meta = {"modelo": self.nome_modelo, "dimensao": self.dimensao, "n": total, "dtype": "float16"}
+            (self.pasta / "meta.json.tmp").write_text(json.dumps(meta), encoding="utf-8")
+            os.replace(self.pasta / "meta.json.tmp", self.pasta / "meta.json")
+            self._carregar()
+
+
+def codificar_com_cache(textos, nome_modelo: str, modelo, pasta: Optional[Path | str] = None, **opcoes_encode) -> np.ndarray:
+    """
+    Embeddings (float32, uma linha por texto) usando o cache: so os textos que ainda nao estao
+    nele vao para modelo.encode(), e textos repetidos na entrada sao codificados uma vez.
+    `nome_modelo` identifica o cache; use o mesmo nome passado ao SentenceTransformer.
+    """
+    textos = [str(t) for t in textos]
+    chaves = hash_textos(textos)
+    unicas, primeiro, inversa = np.unique(chaves, return_index=True, return_inverse=True)
+    cache = CacheEmbeddings(nome_modelo, pasta)
+    posicoes = cache.buscar(unicas)
+    faltando = np.flatnonzero(posicoes < 0)
+    print(
+        f"Cache de embeddings ({nome_modelo}): {len(textos)} textos, {len(unicas)} distintos, "
+        f"{len(unicas) - len(faltando)} no cache, {len(faltando)} a codificar."
+    )
+    if len(faltando):
+        novos = modelo.encode([textos[i] for i in primeiro[faltando]], **opcoes_encode)
+        cache.adicionar(unicas[faltando], np.asarray(novos, dtype=np.float32))
+        posicoes = cache.buscar(unicas)
+    return cache.vetores(posicoes)[inversa.ravel()].astype(np.float32)
@@ -0,0 +1,163 @@
+from __future__ import annotations
+
+import argparse
+import glob
+import os
+import time
+from pathlib import Path
+from typing import Iterable, List, Optional
+
+import pandas as pd
+
+# Colunas com poucos valores distintos: viram dicionario (category no pandas, dictionary no Arrow)
+COLUNAS_CATEGORICAS = ("tag_musica", "titulo", "artista", "titulo_original", "artista_original", "fonte", "topico_nome")
+# Colunas inteiras, com nulos (ano ausente continua ausente em vez de virar float)
+COLUNAS_INTEIRAS = {
+    "ano": "Int16",
+    "ranking_posicao": "Int32",
+    "contagem_palavras": "Int32",
+    "contagem_linhas": "Int32",
+    "classificado_positivo": "Int8",
+}
+# Demais colunas de texto tambem viram dicionario quando se repetem muito
+# (ex.: a letra inteira repetida em cada linha do *_temas_classificados.csv)
+FRACAO_MAXIMA_DISTINTOS = 0.5
+COMPRESSAO = "zstd"
+EXTENSOES_PARQUET = (".parquet", ".pq")
+EXTENSOES_ARROW = (".arrow", ".feather")
+
+
+def _exigir_pyarrow():
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        raise ImportError("Ler/gravar Parquet ou Arrow requer o pacote 'pyarrow' (pip install pyarrow).")
+
+
+def tipar_corpus(df: pd.DataFrame) -> pd.DataFrame:
+    """Aplica os tipos do formato colunar: categorias para texto repetido e inteiros com nulos."""
+    df = df.copy()
+    for coluna, tipo in COLUNAS_INTEIRAS.items():
+        if coluna in df.columns:
+            df[coluna] = pd.to_numeric(df[coluna], errors="coerce").round().astype(tipo)
+    for coluna in df.columns:
+        if coluna in COLUNAS_INTEIRAS or isinstance(df[coluna].dtype, pd.CategoricalDtype):
+            continue
+        if not (pd.api.types.is_object_dtype(df[coluna]) or pd.api.types.is_string_dtype(df[coluna])):
+            continue
+        if coluna in COLUNAS_CATEGORICAS or df[coluna].nunique() <= FRACAO_MAXIMA_DISTINTOS * len(df):
+            df[coluna] = df[coluna].astype("category")
+    return df
+
+
+def salvar_corpus(df: pd.DataFrame, caminho: Path | str) -> Path:
+    """
+    Grava o DataFrame tipado em Parquet (.parquet) ou Arrow IPC (.arrow/.feather), com zstd.
+    Qualquer outra extensao grava CSV, como antes.
+    """
+    caminho = Path(caminho)
+    if caminho.suffix not in EXTENSOES_PARQUET + EXTENSOES_ARROW:
+        df.to_csv(caminho, index=False)
+        return caminho
+    _exigir_pyarrow()
+    df = tipar_corpus(df).reset_index(drop=True)
+    temporario = caminho.with_name(caminho.name + ".tmp")
+    if caminho.suffix in EXTENSOES_ARROW:
+        df.to_feather(temporario, compression=COMPRESSAO)
+    else:
+        df.to_parquet(temporario, engine="pyarrow", compression=COMPRESSAO, index=False)
+    os.replace(temporario, caminho)
+    return caminho
+
+
+def _arquivos(caminho: Path) -> List[Path]:
+    """O proprio arquivo, ou as particoes (parte-*.parquet/.csv) de uma pasta."""
+    if not caminho.is_dir():
+        return [caminho]
+    partes = sorted(Path(p) for p in glob.glob(str(caminho / "parte-*.*")) if not p.endswith(".tmp"))
+    if not partes:
+        raise FileNotFoundError(f"Nenhuma particao parte-* em {caminho}")
+    return partes
+
+
+def colunas_disponiveis(caminho: Path | str) -> List[str]:
+    """Nomes das colunas sem ler os dados (no Parquet/Arrow, so o esquema)."""
+    arquivo = _arquivos(Path(caminho))[0]
+    if arquivo.suffix in EXTENSOES_PARQUET + EXTENSOES_ARROW:
+        _exigir_pyarrow()
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        if arquivo.suffix in EXTENSOES_PARQUET:
+            return list(pq.read_schema(arquivo).names)
+        with pa.memory_map(str(arquivo)) as fonte:
+            return list(pa.ipc.open_file(fonte).schema.names)
+    return list(pd.read_csv(arquivo, nrows=0).columns)
+
+
+def ler_corpus(caminho: Path | str, colunas: Optional[Iterable[str]] = None) -> pd.DataFrame:
+    """
+    Le um corpus em CSV, Parquet ou Arrow (arquivo unico ou pasta de particoes).
+    `colunas` projeta a leitura: no Parquet/Arrow so essas colunas saem do disco.
+    Colunas pedidas que nao existem no arquivo sao ignoradas (quem chama decide o fallback).
+    """
+    caminho = Path(caminho)
+    pedidas = None
+    if colunas is not None:
+        existentes = set(colunas_disponiveis(caminho))
+        pedidas = [c for c in dict.fromkeys(colunas) if c in existentes]
+
+    arquivos = _arquivos(caminho)
+    partes = []
+    for arquivo in arquivos:
+        if arquivo.suffix in EXTENSOES_PARQUET:
+            _exigir_pyarrow()
+            partes.append(pd.read_parquet(arquivo, engine="pyarrow", columns=pedidas))
+        elif arquivo.suffix in EXTENSOES_ARROW:
+            _exigir_pyarrow()
+            partes.append(pd.read_feather(arquivo, columns=pedidas))
+        else:
+            partes.append(pd.read_csv(arquivo, usecols=pedidas))
+    if len(partes) == 1:
+        return partes[0]
+    df = pd.concat(partes, ignore_index=True)
+    if arquivos[0].suffix in EXTENSOES_PARQUET + EXTENSOES_ARROW:
+        # Categorias diferentes entre particoes viram texto no concat; tipa de novo
+        df = tipar_corpus(df)
+    return df
+
+
+def _medir(funcao, *args, **kwargs):
+    inicio = time.perf_counter()
+    resultado = funcao(*args, **kwargs)
+    return resultado, time.perf_counter() - inicio
+
+
+def _tamanho(caminho: Path) -> int:
+    return sum(p.stat().st_size for p in _arquivos(caminho))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Converte um corpus CSV (musicas, trechos ou classificacoes) para Parquet/Arrow tipado e compara leitura e tamanho."
+    )
+    parser.add_argument("entrada", help="CSV de entrada (ou pasta de particoes parte-*.csv).")
+    parser.add_argument("--saida", help="Arquivo de saida .parquet ou .arrow (padrao: <entrada>.parquet).")
+    args = parser.parse_args()
+
+    entrada = Path(args.entrada)
+    saida = Path(args.saida) if args.saida else entrada.with_suffix(".parquet")
+    df, t_csv = _medir(ler_corpus, entrada)
+    salvar_corpus(df, saida)
+    _, t_colunar = _medir(ler_corpus, saida)
+    _, t_letra = _medir(ler_corpus, saida, colunas=["letra"])
+
+    tam_csv, tam_colunar = _tamanho(entrada), _tamanho(saida)
+    print(f"Linhas: {len(df)} | colunas: {', '.join(df.columns)}")
+    print(f"Tamanho: CSV {tam_csv / 1e6:.2f} MB -> {saida.suffix[1:]} {tam_colunar / 1e6:.2f} MB ({tam_csv / tam_colunar:.1f}x menor)")
+    print(f"Leitura: CSV {t_csv:.3f}s | {saida.suffix[1:]} {t_colunar:.3f}s ({t_csv / t_colunar:.1f}x) | so 'letra' {t_letra:.3f}s ({t_csv / t_letra:.1f}x)")
+    print(f"Salvo em: {saida}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,355 @@
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import re
+import time
+from pathlib import Path
+from typing import Callable, List, Optional, Sequence
+
+import numpy as np
+
+RAIZ = Path(__file__).resolve().parent
+PASTA_PADRAO = RAIZ / "modelos_onnx"
+ARQUIVO_FLOAT = "modelo.onnx"
+ARQUIVO_INT8 = "modelo_int8.onnx"
+# Orcamento de cada lote: linhas x comprimento do maior texto do lote (ja com padding)
+TOKENS_POR_LOTE = 4096
+MAXIMO_TEXTOS_POR_LOTE = 128
+# Um texto mais longo so entra no lote se o padding do lote continuar abaixo disto
+PADDING_MAXIMO = 0.15
+# Paridade minima exigida do modelo int8: cosseno entre o embedding dele e o do modelo float
+LIMIAR_PARIDADE = 0.98
+
+
+def _exigir(pacote: str, para: str):
+    try:
+        return __import__(pacote)
+    except ImportError:
+        raise ImportError(f"{para} requer o pacote '{pacote}' (pip install {pacote}).")
+
+
+def pasta_do_modelo(nome_modelo: str, pasta: Optional[Path | str] = None) -> Path:
+    return Path(pasta or PASTA_PADRAO) / re.sub(r"[^A-Za-z0-9_.-]+", "_", nome_modelo)
+
+
+def exportar_onnx(nome_modelo: str, pasta: Optional[Path | str] = None) -> Path:
+    """
+    Exporta o transformer de um SentenceTransformer para ONNX (modelo.onnx) e gera a versao
+    quantizada em int8 (modelo_int8.onnx, quantizacao dinamica dos pesos). O pooling e a
+    normalizacao ficam fora do grafo e sao registrados no meta.json, junto com o tokenizer.
+    So a exportacao precisa de torch/sentence-transformers; a inferencia usa onnxruntime e tokenizers.
+    """
+    _exigir("sentence_transformers", "Exportar o modelo")
+    torch = _exigir("torch", "Exportar o modelo")
+    _exigir("onnxruntime", "Quantizar o modelo")
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+    from sentence_transformers import SentenceTransformer
+
+    destino = pasta_do_modelo(nome_modelo, pasta)
+    destino.mkdir(parents=True, exist_ok=True)
+    modelo = SentenceTransformer(nome_modelo, device="cpu")
+    transformer = modelo[0]
+    tokenizer = transformer.tokenizer
+    pooling = next((m.get_pooling_mode_str() for m in modelo if hasattr(m, "get_pooling_mode_str")), "mean")
+    normalizar = any(type(m).__name__ == "Normalize" for m in modelo)
+
+    exemplo = tokenizer(["um trecho de exemplo"], return_tensors="pt")
+    nomes = [n for n in ("input_ids", "attention_mask", "token_type_ids") if n in exemplo]
+
+    class UltimoEstado(torch.nn.Module):
+        def __init__(self, auto_model):
+            super().__init__()
+            self.auto_model = auto_model
+
+        def forward(self, *entradas):
+            return self.auto_model(**dict(zip(nomes, entradas))).last_hidden_state
+
+    eixos = {n: {0: "lote", 1: "tokens"} for n in nomes + ["ultimo_estado"]}
+    with torch.no_grad():
+        torch.onnx.export(
+            UltimoEstado(transformer.auto_model.eval()),
+            tuple(exemplo[n] for n in nomes),
+            str(destino / ARQUIVO_FLOAT),
+            input_names=nomes,
+            output_names=["ultimo_estado"],
+            dynamic_axes=eixos,
+            opset_version=14,
+            do_constant_folding=True,
+        )
+    quantize_dynamic(str(destino / ARQUIVO_FLOAT), str(destino / ARQUIVO_INT8), weight_type=QuantType.QInt8)
+    tokenizer.save_pretrained(str(destino))
+
+    meta = {
+        "modelo": nome_modelo,
+        "pooling": pooling,
+        "normalizar": normalizar,
+        "max_tokens": int(modelo.max_seq_length),
+        "pad_id": int(tokenizer.pad_token_id or 0),
+        "entradas": nomes,
+    }
+    (destino / "meta.json").write_text(json.dumps(meta, indent=2), encoding="utf-8")
+    print(f"Modelo exportado em {destino} (pooling={pooling}, normalizar={normalizar}, max_tokens={meta['max_tokens']})")
+    return destino
+
+
+def lotes_por_comprimento(
+    comprimentos: Sequence[int], tokens_por_lote: int = TOKENS_POR_LOTE, maximo_textos: int = MAXIMO_TEXTOS_POR_LOTE
+) -> List[np.ndarray]:
+    """
+    Indices dos textos agrupados em lotes de comprimento parecido: ordena por comprimento e fecha
+    o lote quando (linhas x maior comprimento) passaria do orcamento ou quando o padding passaria
+    de PADDING_MAXIMO. Textos curtos vao em lotes grandes e longos em lotes pequenos.
+    """
+    comprimentos = np.asarray(comprimentos, dtype=np.int64)
+    ordem = np.argsort(comprimentos, kind="stable")
+    lotes, inicio, soma = [], 0, 0
+    for fim, indice in enumerate(ordem):
+        # Em ordem crescente, o texto atual e o maior do lote
+        linhas, maior = fim - inicio + 1, comprimentos[indice]
+        processados = linhas * maior
+        if linhas > 1 and (
+            linhas > maximo_textos or processados > tokens_por_lote or 1 - (soma + maior) / processados > PADDING_MAXIMO
+        ):
+            lotes.append(ordem[inicio:fim])
+            inicio, soma = fim, 0
+        soma += maior
+    if inicio < len(ordem):
+        lotes.append(ordem[inicio:])
+    return lotes
+
+
+def fracao_padding(comprimentos: Sequence[int], lotes: Sequence[np.ndarray]) -> float:
+    """Fracao dos tokens processados que sao padding."""
+    comprimentos = np.asarray(comprimentos, dtype=np.int64)
+    processados = sum(len(l) * comprimentos[l].max() for l in lotes if len(l))
+    return 1 - comprimentos.sum() / processados if processados else 0.0
+
+
+class ModeloOnnx:
+    """
+    Backend de embeddings em CPU com ONNX Runtime (modelo int8 por padrao), com a mesma
+    interface encode() do SentenceTransformer: serve para codificar_com_cache() e, via
+    backend_bertopic(), para o BERTopic.
+    """
+
+    def __init__(self, nome_modelo: str, pasta: Optional[Path | str] = None, quantizado: bool = True, threads: Optional[int] = None):
+        ort = _exigir("onnxruntime", "O backend ONNX")
+        tokenizers = _exigir("tokenizers", "O backend ONNX")
+        self.pasta = pasta_do_modelo(nome_modelo, pasta)
+        caminho_meta = self.pasta / "meta.json"
+        if not caminho_meta.exists():
+            raise FileNotFoundError(
+                f"Modelo ONNX nao encontrado em {self.pasta}. Exporte antes: python embeddings_onnx.py --exportar --modelo {nome_modelo}"
+            )
+        meta = json.loads(caminho_meta.read_text(encoding="utf-8"))
+        self.nome_modelo = meta["modelo"]
+        self.pooling = meta["pooling"]
+        self.normalizar = meta["normalizar"]
+        self.pad_id = meta["pad_id"]
+        # Embeddings do int8 diferem um pouco dos do modelo float: cada um tem o seu cache
+        self.nome_cache = f"{self.nome_modelo}-onnx-{'int8' if quantizado else 'float'}"
+
+        self.tokenizer = tokenizers.Tokenizer.from_file(str(self.pasta / "tokenizer.json"))
+        self.tokenizer.no_padding()
+        self.tokenizer.enable_truncation(meta["max_tokens"])
+
+        opcoes = ort.SessionOptions()
+        opcoes.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        opcoes.intra_op_num_threads = threads or os.cpu_count() or 1
+        arquivo = ARQUIVO_INT8 if quantizado else ARQUIVO_FLOAT
+        self.sessao = ort.InferenceSession(str(self.pasta / arquivo), opcoes, providers=["CPUExecutionProvider"])
+        self.entradas = [e.name for e in self.sessao.get_inputs()]
+
+    def tokenizar(self, textos: Sequence[str]) -> List[List[int]]:
+        return [c.ids for c in self.tokenizer.encode_batch([str(t) for t in textos])]
+
+    def _codificar_lote(self, ids: List[List[int]]) -> np.ndarray:
+        comprimento = max(len(i) for i in ids)
+        matriz = np.full((len(ids), comprimento), self.pad_id, dtype=np.int64)
+        mascara = np.zeros((len(ids), comprimento), dtype=np.int64)
+        for linha, sequencia in enumerate(ids):
+            matriz[linha, : len(sequencia)] = sequencia
+            mascara[linha, : len(sequencia)] = 1
+        valores = {"input_ids": matriz, "attention_mask": mascara, "token_type_ids": np.zeros_like(matriz)}
+        estado = self.sessao.run(None, {n: valores[n] for n in self.entradas})[0]
+
+        if self.pooling == "cls":
+            return estado[:, 0]
+        if self.pooling == "max":
+            return np.where(mascara[:, :, None] > 0, estado, -np.inf).max(axis=1)
+        peso = mascara[:, :, None].astype(estado.dtype)
+        return (estado * peso).sum(axis=1) / np.maximum(peso.sum(axis=1), 1e-9)
+
+    def encode(
+        self,
+        sentences,
+        batch_size: Optional[int] = None,
+        show_progress_bar: bool = False,
+        normalize_embeddings: Optional[bool] = None,
+        tokens_por_lote: int = TOKENS_POR_LOTE,
+        por_comprimento: bool = True,
+        **_,
+    ) -> np.ndarray:
+        """
+        Embeddings float32 (uma linha por texto, na ordem de entrada), em lotes por comprimento.
+        Com por_comprimento=False, lotes de batch_size textos na ordem de entrada (so para comparacao).
+        """
+        textos = [sentences] if isinstance(sentences, str) else list(sentences)
+        if not textos:
+            return np.empty((0, 0), dtype=np.float32)
+        ids = self.tokenizar(textos)
+        if por_comprimento:
+            lotes = lotes_por_comprimento([len(i) for i in ids], tokens_por_lote, batch_size or MAXIMO_TEXTOS_POR_LOTE)
+        else:
+            tamanho = batch_size or 32
+            lotes = [np.arange(i, min(i + tamanho, len(textos))) for i in range(0, len(textos), tamanho)]
+        saida = None
+        for numero, lote in enumerate(lotes, 1):
+            vetores = self._codificar_lote([ids[i] for i in lote])
+            if saida is None:
+                saida = np.empty((len(textos), vetores.shape[1]), dtype=np.float32)
+            saida[lote] = vetores
+            if show_progress_bar and numero % 50 == 0:
+                print(f"  ...lote {numero}/{len(lotes)} codificado.")
+        if self.normalizar if normalize_embeddings is None else normalize_embeddings:
+            saida /= np.maximum(np.linalg.norm(saida, axis=1, keepdims=True), 1e-12)
+        return saida
+
+
+def backend_bertopic(modelo: ModeloOnnx):
+    """Embrulha o ModeloOnnx num BaseEmbedder; sem isso o BERTopic troca o modelo por um SentenceTransformer."""
+    from bertopic.backend import BaseEmbedder
+
+    class EmbedderOnnx(BaseEmbedder):
+        def __init__(self, modelo_onnx: ModeloOnnx):
+            super().__init__()
+            self.embedding_model = modelo_onnx
+
+        def embed(self, documents, verbose=False):
+            return self.embedding_model.encode(list(documents), show_progress_bar=verbose)
+
+    return EmbedderOnnx(modelo)
+
+
+def _normalizar_linhas(vetores: np.ndarray) -> np.ndarray:
+    vetores = np.asarray(vetores, dtype=np.float64)
+    return vetores / np.maximum(np.linalg.norm(vetores, axis=1, keepdims=True), 1e-12)
+
+
+def paridade(referencia: np.ndarray, candidato: np.ndarray) -> dict:
+    """
+    Compara os embeddings de um backend com os do modelo de referencia (float):
+    cosseno de cada texto com ele mesmo, diferenca nas similaridades entre pares de textos
+    e quantos textos mantem o mesmo vizinho mais proximo.
+    """
+    a, b = _normalizar_linhas(referencia), _normalizar_linhas(candidato)
+    proprio = (a * b).sum(axis=1)
+    sim_a, sim_b = a @ a.T, b @ b.T
+    diferenca = np.abs(sim_a - sim_b)[np.triu_indices(len(a), k=1)]
+    np.fill_diagonal(sim_a, -np.inf)
+    np.fill_diagonal(sim_b, -np.inf)
+    return {
+        "textos": len(a),
+        "cosseno_minimo": float(proprio.min()),
+        "cosseno_medio": float(proprio.mean()),
+        "diferenca_similaridade_media": float(diferenca.mean()) if len(diferenca) else 0.0,
+        "diferenca_similaridade_maxima": float(diferenca.max()) if len(diferenca) else 0.0,
+        "mesmo_vizinho": float((sim_a.argmax(axis=1) == sim_b.argmax(axis=1)).mean()) if len(a) > 1 else 1.0,
+    }
+
+
+def medir_vazao(codificar: Callable[[List[str]], np.ndarray], textos: List[str], repeticoes: int = 3) -> tuple:
+    """Melhor vazao (textos/s) em algumas repeticoes, depois de um aquecimento; devolve tambem os embeddings."""
+    codificar(textos[: min(len(textos), 32)])
+    melhor, vetores = float("inf"), None
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        vetores = codificar(textos)
+        melhor = min(melhor, time.perf_counter() - inicio)
+    return len(textos) / melhor, vetores
+
+
+def avaliar(nome_modelo: str, textos: List[str], pasta: Optional[Path | str] = None, repeticoes: int = 3, limiar: float = LIMIAR_PARIDADE) -> dict:
+    """
+    Benchmark (textos/s) e paridade dos backends de CPU. A referencia e o SentenceTransformer em
+    float (ou o ONNX float, se sentence-transformers nao estiver instalado).
+    """
+    int8 = ModeloOnnx(nome_modelo, pasta, quantizado=True)
+    comprimentos = [len(i) for i in int8.tokenizar(textos)]
+    lotes_fixos = [np.arange(i, min(i + 32, len(textos))) for i in range(0, len(textos), 32)]
+    relatorio = {
+        "modelo": nome_modelo,
+        "textos": len(textos),
+        "threads": os.cpu_count(),
+        "padding_lotes_fixos_32": fracao_padding(comprimentos, lotes_fixos),
+        "padding_lotes_por_comprimento": fracao_padding(comprimentos, lotes_por_comprimento(comprimentos)),
+        "vazao": {},
+    }
+
+    backends = {}
+    try:
+        from sentence_transformers import SentenceTransformer
+
+        st = SentenceTransformer(nome_modelo, device="cpu")
+        backends["sentence_transformers_float"] = lambda t: st.encode(t, batch_size=32)
+    except ImportError:
+        print("sentence-transformers nao instalado: a referencia de paridade sera o ONNX float.")
+    onnx_float = ModeloOnnx(nome_modelo, pasta, quantizado=False)
+    backends["onnx_float"] = onnx_float.encode
+    backends["onnx_int8_lotes_fixos"] = lambda t: int8.encode(t, batch_size=32, por_comprimento=False)
+    backends["onnx_int8"] = int8.encode
+
+    vetores = {}
+    for nome, codificar in backends.items():
+        relatorio["vazao"][nome], vetores[nome] = medir_vazao(codificar, textos, repeticoes)
+        print(f"  {nome:30s} {relatorio['vazao'][nome]:9.1f} textos/s")
+
+    referencia = "sentence_transformers_float" if "sentence_transformers_float" in vetores else "onnx_float"
+    relatorio["referencia"] = referencia
+    relatorio["paridade_int8"] = paridade(vetores[referencia], vetores["onnx_int8"])
+    relatorio["aprovado"] = relatorio["paridade_int8"]["cosseno_minimo"] >= limiar
+    return relatorio
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Backend de embeddings int8 em ONNX Runtime (CPU): exportacao, checagem de paridade e benchmark."
+    )
+    parser.add_argument("--modelo", default="paraphrase-multilingual-MiniLM-L12-v2", help="Nome do SentenceTransformer.")
+    parser.add_argument("--pasta", help=f"Pasta dos modelos exportados (padrao: {PASTA_PADRAO}).")
+    parser.add_argument("--exportar", action="store_true", help="Exporta e quantiza o modelo antes de avaliar.")
+    parser.add_argument("--trechos", help="Corpus (CSV/Parquet) cuja coluna 'letra' e usada na avaliacao.")
+    parser.add_argument("--amostra", type=int, default=2000, help="Quantos trechos avaliar (padrao: 2000).")
+    parser.add_argument("--repeticoes", type=int, default=3)
+    parser.add_argument("--limiar", type=float, default=LIMIAR_PARIDADE, help="Cosseno minimo int8 x float para aprovar.")
+    args = parser.parse_args()
+
+    if args.exportar:
+        exportar_onnx(args.modelo, args.pasta)
+    if not args.trechos:
+        return
+
+    from corpus_colunar import ler_corpus
+
+    letras = ler_corpus(args.trechos, colunas=["letra"])["letra"].dropna().astype(str)
+    textos = letras.sample(n=min(args.amostra, len(letras)), random_state=42).tolist()
+    print(f"Avaliando {len(textos)} trechos com {os.cpu_count()} threads...")
+    relatorio = avaliar(args.modelo, textos, args.pasta, args.repeticoes, args.limiar)
+
+    p = relatorio["paridade_int8"]
+    print(f"Padding: lotes fixos de 32 {relatorio['padding_lotes_fixos_32']:.1%} -> por comprimento {relatorio['padding_lotes_por_comprimento']:.1%}")
+    print(
+        f"Paridade int8 x {relatorio['referencia']}: cosseno min {p['cosseno_minimo']:.4f} / medio {p['cosseno_medio']:.4f}, "
+        f"similaridades |diff| media {p['diferenca_similaridade_media']:.4f} / max {p['diferenca_similaridade_maxima']:.4f}, "
+        f"mesmo vizinho {p['mesmo_vizinho']:.1%}"
+    )
+    print("Paridade: OK" if relatorio["aprovado"] else f"Paridade: REPROVADO (cosseno minimo abaixo de {args.limiar})")
+    saida = pasta_do_modelo(args.modelo, args.pasta) / "avaliacao.json"
+    saida.write_text(json.dumps(relatorio, indent=2), encoding="utf-8")
+    print(f"Relatorio salvo em: {saida}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,413 @@
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+RAIZ = Path(__file__).resolve().parent
+MUSICAS_PADRAO = RAIZ / "base_de_dados" / "sertanejo_parcial_20251027_180724_pos600.csv"
+PASTA_PADRAO = RAIZ / "pipeline_saida"
+VERSAO_ESTADO = 1
+
+
+@dataclass
+class Etapa:
+    nome: str
+    comando: List[str]
+    entradas: List[Path]
+    saidas: List[Path]
+    codigo: List[Path]
+    config: List[str] = field(default_factory=list)  # variaveis de ambiente que mudam o resultado
+    pasta: Path = RAIZ  # diretorio de trabalho do comando
+
+
+@dataclass
+class Resultado:
+    nome: str
+    status: str  # executada, reaproveitada, falhou, bloqueada
+    motivo: str = ""
+    chave: Optional[str] = None
+    duracao_segundos: float = 0.0
+    inicio: Optional[str] = None
+    fim: Optional[str] = None
+    codigo_saida: Optional[int] = None
+    log: Optional[str] = None
+    saidas: Dict[str, str] = field(default_factory=dict)
+
+
+def _relativo(caminho: Path | str) -> str:
+    """Caminho relativo a raiz do projeto, para a chave nao depender de onde o repositorio esta."""
+    texto = str(caminho)
+    return texto.replace(str(RAIZ) + os.sep, "").replace(str(RAIZ), ".")
+
+
+def montar_etapas(musicas: Path, pasta: Path, temas: Optional[Path], topicos: Optional[Path]) -> List[Etapa]:
+    """O fluxo do projeto: trechos -> limpeza -> (BERTopic | LLMusic | quase duplicados -> 06 | 07)."""
+    trechos = pasta / "musicas_por_trechos.csv"
+    limpo = pasta / "musicas_por_trechos_limpo.csv"
+    mapa = pasta / "musicas_por_trechos_limpo_quase_duplicados.csv"
+    canonicos = pasta / "musicas_por_trechos_limpo_canonicos.csv"
+    pre = RAIZ / "pre_processamento"
+    bertopic = RAIZ / "analise_bertopic"
+    llmusic = RAIZ / "analise_llmusic"
+    corpus_colunar = RAIZ / "corpus_colunar.py"
+    cache_embeddings = RAIZ / "cache_embeddings.py"
+    embeddings_onnx = RAIZ / "embeddings_onnx.py"
+
+    etapas = [
+        Etapa(
+            nome="trechos",
+            comando=["python", str(pre / "processar_trechos.py"), "--entrada", str(musicas), "--saida", str(trechos)],
+            entradas=[musicas],
+            saidas=[trechos],
+            codigo=[pre / "processar_trechos.py"],
+        ),
+        Etapa(
+            nome="limpeza",
+            comando=["python", str(pre / "limpar_trechos_duplicados.py"), "--entrada", str(trechos), "--saida", str(limpo)],
+            entradas=[trechos],
+            saidas=[limpo],
+            codigo=[pre / "limpar_trechos_duplicados.py"],
+        ),
+        Etapa(
+            nome="bertopic",
+            comando=["python", str(bertopic / "rodar_bertopic.py"), str(limpo), str(pasta)],
+            entradas=[limpo],
+            saidas=[pasta / "resultados_bertopic_com_stopwords.csv"],
+            codigo=[bertopic / "rodar_bertopic.py", bertopic / "stopwords_sertanejo.py", corpus_colunar, cache_embeddings],
+            pasta=bertopic,
+        ),
+        Etapa(
+            nome="llmusic",
+            comando=["python", str(llmusic / "rodar_llmusic_bobsin.py"), str(limpo), str(pasta)],
+            entradas=[limpo],
+            saidas=[pasta / "temas_gerados_llmusic_local.csv", pasta / "resultados_llmusic_pipeline_local.csv"],
+            codigo=[llmusic / "rodar_llmusic_bobsin.py", cache_embeddings, embeddings_onnx],
+            config=["LLMUSIC_MODEL", "LLMUSIC_ITERACOES", "LLMUSIC_TRECHOS_LOTE", "LLMUSIC_TEMAS_POR_LOTE", "LLMUSIC_EMBEDDING_DEVICE", "LLMUSIC_EMBEDDING_BACKEND"],
+            pasta=llmusic,
+        ),
+        Etapa(
+            nome="quase_duplicados",
+            comando=["python", str(pre / "quase_duplicados.py"), str(limpo)],
+            entradas=[limpo],
+            saidas=[mapa, canonicos],
+            codigo=[pre / "quase_duplicados.py"],
+        ),
+    ]
+    if temas is not None:
+        etapas.append(
+            Etapa(
+                nome="processar_temas",
+                comando=[
+                    "python", str(RAIZ / "06_processar_temas.py"), str(limpo), str(temas),
+                    "--mapa-duplicados", str(mapa), "--log", str(pasta / "logs" / "06_processar_temas.log"),
+                ],
+                entradas=[limpo, temas, mapa],
+                saidas=[pasta / "musicas_por_trechos_limpo_temas_classificados.csv"],
+                codigo=[RAIZ / "06_processar_temas.py", corpus_colunar],
+                config=["LLMUSIC_MODEL", "LLMUSIC_TEMAS_POR_REGISTRO", "LLMUSIC_TEMAS_POR_GRUPO", "LLMUSIC_ITERACOES"],
+            )
+        )
+    if topicos is not None:
+        etapas.append(
+            Etapa(
+                nome="relatorio_final",
+                comando=[
+                    "python", str(RAIZ / "07_relatorio_final.py"), str(limpo), str(topicos),
+                    "--mapa-duplicados", str(mapa), "--saida", str(pasta / "relatorio_final.csv"),
+                    "--log", str(pasta / "logs" / "07_relatorio_final.log"),
+                ],
+                entradas=[limpo, topicos, mapa],
+                saidas=[pasta / "relatorio_final.csv"],
+                codigo=[RAIZ / "07_relatorio_final.py", corpus_colunar],
+                config=["LLMUSIC_MODEL", "LLMUSIC_INFERENCIAS", "LLMUSIC_TEMPERATURAS", "LLMUSIC_NUM_PREDICT"],
+            )
+        )
+    return etapas
+
+
+class HashesArquivos:
+    """sha256 do conteudo dos arquivos, reaproveitado enquanto tamanho e mtime nao mudam."""
+
+    def __init__(self, conhecidos: Optional[dict] = None):
+        self._conhecidos: Dict[str, list] = dict(conhecidos or {})
+        self._lock = threading.Lock()
+
+    def hash(self, caminho: Path) -> str:
+        info = caminho.stat()
+        chave = _relativo(caminho)
+        with self._lock:
+            conhecido = self._conhecidos.get(chave)
+        if conhecido and conhecido[0] == info.st_size and conhecido[1] == info.st_mtime_ns:
+            return conhecido[2]
+        resumo = hashlib.sha256()
+        with caminho.open("rb") as fh:
+            for bloco in iter(lambda: fh.read(1 << 20), b""):
+                resumo.update(bloco)
+        with self._lock:
+            self._conhecidos[chave] = [info.st_size, info.st_mtime_ns, resumo.hexdigest()]
+        return resumo.hexdigest()
+
+    def como_dict(self) -> dict:
+        with self._lock:
+            return dict(self._conhecidos)
+
+
+def chave_etapa(etapa: Etapa, hashes: HashesArquivos) -> str:
+    """Hash do comando, do conteudo das entradas e do codigo, e das variaveis de configuracao."""
+    descricao = {
+        "comando": [_relativo(parte) for parte in etapa.comando],
+        "entradas": {_relativo(p): hashes.hash(p) for p in etapa.entradas},
+        "codigo": {_relativo(p): hashes.hash(p) for p in etapa.codigo},
+        "config": {nome: os.environ.get(nome) for nome in etapa.config},
+    }
+    return hashlib.sha256(json.dumps(descricao, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def dependencias(etapas: List[Etapa]) -> Dict[str, List[str]]:
+    """Etapa -> etapas que produzem alguma das suas entradas."""
+    produtor = {str(saida): etapa.nome for etapa in etapas for saida in etapa.saidas}
+    return {
+        etapa.nome: sorted({produtor[str(e)] for e in etapa.entradas if str(e) in produtor} - {etapa.nome})
+        for etapa in etapas
+    }
+
+
+def ordem_topologica(etapas: List[Etapa], deps: Dict[str, List[str]]) -> List[str]:
+    ordem: List[str] = []
+    visitando: set = set()
+
+    def visitar(nome: str) -> None:
+        if nome in ordem:
+            return
+        if nome in visitando:
+            raise ValueError(f"Ciclo no pipeline envolvendo a etapa '{nome}'.")
+        visitando.add(nome)
+        for dep in deps[nome]:
+            visitar(dep)
+        visitando.discard(nome)
+        ordem.append(nome)
+
+    for etapa in etapas:
+        visitar(etapa.nome)
+    return ordem
+
+
+class Pipeline:
+    def __init__(self, etapas: List[Etapa], pasta: Path, paralelo: int = 2, forcar: Optional[List[str]] = None):
+        self.etapas = {etapa.nome: etapa for etapa in etapas}
+        self.deps = dependencias(etapas)
+        self.ordem = ordem_topologica(etapas, self.deps)
+        self.pasta = pasta
+        self.paralelo = paralelo
+        self.forcar = set(forcar or [])
+        self.caminho_estado = pasta / "estado_pipeline.json"
+        estado = self._ler_estado()
+        self.estado: Dict[str, dict] = estado.get("etapas", {})
+        self.hashes = HashesArquivos(estado.get("hashes"))
+        self._lock = threading.Lock()
+
+    def _ler_estado(self) -> dict:
+        if not self.caminho_estado.exists():
+            return {}
+        estado = json.loads(self.caminho_estado.read_text(encoding="utf-8"))
+        return estado if estado.get("versao") == VERSAO_ESTADO else {}
+
+    def _gravar_json(self, caminho: Path, conteudo: dict) -> None:
+        caminho.parent.mkdir(parents=True, exist_ok=True)
+        temporario = caminho.with_name(caminho.name + ".tmp")
+        temporario.write_text(json.dumps(conteudo, ensure_ascii=False, indent=2), encoding="utf-8")
+        os.replace(temporario, caminho)
+
+    def _salvar_estado(self) -> None:
+        with self._lock:
+            conteudo = {"versao": VERSAO_ESTADO, "etapas": dict(self.estado), "hashes": self.hashes.como_dict()}
+        self._gravar_json(self.caminho_estado, conteudo)
+
+    def selecionar(self, alvos: Optional[List[str]]) -> List[str]:
+        """As etapas pedidas e tudo de que elas dependem, em ordem topologica."""
+        if not alvos:
+            return list(self.ordem)
+        desconhecidas = [alvo for alvo in alvos if alvo not in self.etapas]
+        if desconhecidas:
+            raise ValueError(f"Etapas desconhecidas: {desconhecidas}. Disponiveis: {self.ordem}")
+        necessarias: set = set()
+        pilha = list(alvos)
+        while pilha:
+            nome = pilha.pop()
+            if nome not in necessarias:
+                necessarias.add(nome)
+                pilha.extend(self.deps[nome])
+        return [nome for nome in self.ordem if nome in necessarias]
+
+    def valida(self, etapa: Etapa, chave: str) -> bool:
+        """Saidas ainda valem: mesma chave e arquivos de saida iguais aos gravados na ultima execucao."""
+        if etapa.nome in self.forcar:
+            return False
+        anterior = self.estado.get(etapa.nome)
+        if not anterior or anterior.get("chave") != chave:
+            return False
+        for saida in etapa.saidas:
+            if not saida.exists() or self.hashes.hash(saida) != anterior.get("saidas", {}).get(_relativo(saida)):
+                return False
+        return True
+
+    def executar_etapa(self, etapa: Etapa) -> Resultado:
+        faltando = [str(e) for e in etapa.entradas if not e.exists()]
+        if faltando:
+            return Resultado(etapa.nome, "falhou", motivo=f"entradas ausentes: {faltando}")
+        chave = chave_etapa(etapa, self.hashes)
+        if self.valida(etapa, chave):
+            return Resultado(etapa.nome, "reaproveitada", chave=chave, saidas=self.estado[etapa.nome]["saidas"])
+
+        log = self.pasta / "logs" / f"{etapa.nome}.log"
+        log.parent.mkdir(parents=True, exist_ok=True)
+        for saida in etapa.saidas:
+            saida.parent.mkdir(parents=True, exist_ok=True)
+        comando = [sys.executable if parte == "python" else parte for parte in etapa.comando]
+        inicio = time.time()
+        with log.open("w", encoding="utf-8") as fh:
+            processo = subprocess.run(
+                comando, cwd=etapa.pasta, stdout=fh, stderr=subprocess.STDOUT, env={**os.environ, "PYTHONIOENCODING": "utf-8"}
+            )
+        fim = time.time()
+        resultado = Resultado(
+            etapa.nome,
+            "executada",
+            chave=chave,
+            duracao_segundos=round(fim - inicio, 3),
+            inicio=datetime.fromtimestamp(inicio).isoformat(timespec="seconds"),
+            fim=datetime.fromtimestamp(fim).isoformat(timespec="seconds"),
+            codigo_saida=processo.returncode,
+            log=_relativo(log),
+        )
+        ausentes = [_relativo(s) for s in etapa.saidas if not s.exists()]
+        if processo.returncode != 0 or ausentes:
+            resultado.status = "falhou"
+            resultado.motivo = f"codigo de saida {processo.returncode}" if processo.returncode else f"saidas nao geradas: {ausentes}"
+            return resultado
+
+        resultado.saidas = {_relativo(s): self.hashes.hash(s) for s in etapa.saidas}
+        with self._lock:
+            self.estado[etapa.nome] = {"chave": chave, "saidas": resultado.saidas, "concluida_em": resultado.fim}
+        self._salvar_estado()
+        return resultado
+
+    def plano(self, nomes: List[str]) -> Dict[str, str]:
+        """O que uma execucao faria, sem rodar nada (etapas depois de uma que roda tambem rodam)."""
+        acoes: Dict[str, str] = {}
+        for nome in nomes:
+            etapa = self.etapas[nome]
+            if any(acoes.get(dep) != "reaproveitar" for dep in self.deps[nome] if dep in acoes):
+                acoes[nome] = "executar (entradas serao refeitas)"
+            elif not all(e.exists() for e in etapa.entradas):
+                acoes[nome] = "falhar (entradas ausentes)"
+            else:
+                acoes[nome] = "reaproveitar" if self.valida(etapa, chave_etapa(etapa, self.hashes)) else "executar"
+        return acoes
+
+    def executar(self, nomes: List[str]) -> dict:
+        """Roda as etapas em ordem de dependencia; as independentes rodam em paralelo."""
+        inicio = time.time()
+        resultados: Dict[str, Resultado] = {}
+        pendentes = list(nomes)
+        with ThreadPoolExecutor(max_workers=self.paralelo) as pool:
+            em_execucao = {}
+            while pendentes or em_execucao:
+                for nome in list(pendentes):
+                    deps = [dep for dep in self.deps[nome] if dep in nomes]
+                    if any(dep not in resultados for dep in deps):
+                        continue
+                    pendentes.remove(nome)
+                    falhas = [dep for dep in deps if resultados[dep].status in ("falhou", "bloqueada")]
+                    if falhas:
+                        resultados[nome] = Resultado(nome, "bloqueada", motivo=f"dependencias com falha: {falhas}")
+                        print(f"[{nome}] bloqueada ({', '.join(falhas)} falhou)")
+                        continue
+                    print(f"[{nome}] iniciando")
+                    em_execucao[pool.submit(self.executar_etapa, self.etapas[nome])] = nome
+                if not em_execucao:
+                    continue
+                prontos, _ = wait(list(em_execucao), return_when=FIRST_COMPLETED)
+                for futuro in prontos:
+                    nome = em_execucao.pop(futuro)
+                    try:
+                        resultado = futuro.result()
+                    except Exception as exc:
+                        resultado = Resultado(nome, "falhou", motivo=f"{type(exc).__name__}: {exc}")
+                    resultados[nome] = resultado
+                    detalhe = f" - {resultado.motivo}" if resultado.motivo else ""
+                    print(f"[{nome}] {resultado.status} em {resultado.duracao_segundos:.1f}s{detalhe}")
+
+        fim = time.time()
+        manifesto = {
+            "inicio": datetime.fromtimestamp(inicio).isoformat(timespec="seconds"),
+            "fim": datetime.fromtimestamp(fim).isoformat(timespec="seconds"),
+            "duracao_segundos": round(fim - inicio, 3),
+            "paralelo": self.paralelo,
+            "etapas": [vars(resultados[nome]) for nome in nomes if nome in resultados],
+        }
+        base = self.pasta / "execucoes" / f"execucao_{datetime.fromtimestamp(inicio):%Y%m%d_%H%M%S}"
+        caminho = base.with_suffix(".json")
+        numero = 1
+        while caminho.exists():
+            numero += 1
+            caminho = base.with_name(f"{base.name}_{numero}.json")
+        self._gravar_json(caminho, manifesto)
+        manifesto["arquivo"] = str(caminho)
+        return manifesto
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Roda o fluxo do projeto como um DAG, pulando as etapas cujas entradas, codigo e configuracao nao mudaram."
+    )
+    parser.add_argument("--musicas", default=str(MUSICAS_PADRAO), help="CSV de musicas da coleta (entrada do pipeline).")
+    parser.add_argument("--temas", help="CSV de temas base para o 06_processar_temas.py (sem ele a etapa fica de fora).")
+    parser.add_argument("--topicos", help="CSV de topicos para o 07_relatorio_final.py (sem ele a etapa fica de fora).")
+    parser.add_argument("--pasta", default=str(PASTA_PADRAO), help="Pasta das saidas, logs, estado e manifestos.")
+    parser.add_argument("--etapas", nargs="+", help="Roda so estas etapas (e as de que dependem).")
+    parser.add_argument("--forcar", nargs="+", default=[], help="Etapas para refazer mesmo com as saidas validas.")
+    parser.add_argument("--paralelo", type=int, default=2, help="Etapas independentes rodando ao mesmo tempo.")
+    parser.add_argument("--plano", action="store_true", help="So mostra o que seria executado ou reaproveitado.")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    pasta = Path(args.pasta).resolve()
+    etapas = montar_etapas(
+        Path(args.musicas).resolve(),
+        pasta,
+        Path(args.temas).resolve() if args.temas else None,
+        Path(args.topicos).resolve() if args.topicos else None,
+    )
+    pipeline = Pipeline(etapas, pasta, args.paralelo, args.forcar)
+    nomes = pipeline.selecionar(args.etapas)
+
+    if args.plano:
+        for nome, acao in pipeline.plano(nomes).items():
+            print(f"{nome:<18} {acao}")
+        return
+
+    manifesto = pipeline.executar(nomes)
+    print(f"\nDuracao total: {manifesto['duracao_segundos']:.1f}s")
+    for etapa in manifesto["etapas"]:
+        print(f"  {etapa['nome']:<18} {etapa['status']:<14} {etapa['duracao_segundos']:8.1f}s")
+    print(f"Manifesto: {manifesto['arquivo']}")
+    if any(etapa["status"] in ("falhou", "bloqueada") for etapa in manifesto["etapas"]):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -3,11 +3,13 @@ import matplotlib.pyplot as plt
 import glob
 import os
 
+from corpus_colunar import ler_corpus
+
 # Arquivo específico - último arquivo gerado
 arquivo_especifico = r"g:\Meu Drive\Mestrado\KDD\Anotacoes de aula\Trabalho pratico\projeto_funk\base_de_dados\sertanejo_mais_acessadas_todos_anos_1.csv"
 
 # Carregar apenas o arquivo específico
-df_complete = pd.read_csv(arquivo_especifico)
+df_complete = ler_corpus(arquivo_especifico, colunas=['artista', 'ano'])
 print(f"Carregado arquivo: {os.path.basename(arquivo_especifico)}")
 print(f"Total de registros: {len(df_complete)}")
 
@@ -1,7 +1,8 @@
-import pandas as pd
 import matplotlib.pyplot as plt
 import os
 
+from corpus_colunar import ler_corpus
+
 # Caminhos
 base_dir = r"G:\Meu Drive\Mestrado\KDD\Anotacoes de aula\Trabalho pratico\projeto_funk"
 arquivo_original = os.path.join(base_dir, "base_de_dados", "sertanejo_parcial_20251027_180724_pos600.csv")
@@ -13,7 +14,7 @@ print("="*70)
 print()
 
 # Carregar dados originais
-df_original = pd.read_csv(arquivo_original)
+df_original = ler_corpus(arquivo_original, colunas=['artista', 'ano'])
 print("📂 ARQUIVO ORIGINAL (base_de_dados)")
 print("-"*70)
 print(f"   Total de músicas coletadas: {len(df_original)}")
@@ -22,7 +23,7 @@ print(f"   Período: {int(df_original['ano'].min())} - {int(df_original['ano'].m
 print()
 
 # Carregar dados processados
-df_trechos = pd.read_csv(arquivo_trechos)
+df_trechos = ler_corpus(arquivo_trechos, colunas=['tag_musica', 'ano'])
 print("📂 ARQUIVO PROCESSADO (pre_processamento)")
 print("-"*70)
 print(f"   Total de trechos gerados: {len(df_trechos):,}")
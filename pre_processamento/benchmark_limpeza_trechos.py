@@ -0,0 +1,77 @@
+import argparse
+import random
+import time
+
+import pandas as pd
+
+from limpar_trechos_duplicados import renumerar_trechos
+
+def renumerar_original(df_limpo):
+    """Renumeração original: ordena as tags como texto e filtra a tabela inteira uma vez por música."""
+    df_limpo = df_limpo.sort_values(['tag_musica', 'tag_trecho']).reset_index(drop=True)
+    nova_tag_trecho = []
+    for musica in df_limpo['tag_musica'].unique():
+        indices = df_limpo[df_limpo['tag_musica'] == musica].index
+        for i, idx in enumerate(indices, start=1):
+            nova_tag_trecho.append(f"{musica}_trecho{i}")
+    df_limpo['tag_trecho'] = nova_tag_trecho
+    return df_limpo
+
+def renumerar_referencia(df_limpo):
+    """Referência óbvia da ordem natural: sorted() com chave numérica e enumerate por música."""
+    def numero(tag):
+        return int(tag.rsplit('trecho' if '_trecho' in tag else 'musica', 1)[1])
+    linhas = sorted(df_limpo.to_dict('records'), key=lambda l: (numero(l['tag_musica']), numero(l['tag_trecho'])))
+    contador = {}
+    for linha in linhas:
+        contador[linha['tag_musica']] = contador.get(linha['tag_musica'], 0) + 1
+        linha['tag_trecho'] = f"{linha['tag_musica']}_trecho{contador[linha['tag_musica']]}"
+    return pd.DataFrame(linhas, columns=df_limpo.columns)
+
+def gerar_trechos(total, semente=42):
+    """Tabela de trechos sintética (schema de processar_trechos), com refrões repetidos dentro das músicas."""
+    aleatorio = random.Random(semente)
+    linhas = []
+    musica = 0
+    while len(linhas) < total:
+        musica += 1
+        refroes = [f"refrão {musica}-{r}" for r in range(aleatorio.randint(1, 3))]
+        for trecho in range(1, aleatorio.randint(5, 45) + 1):
+            letra = aleatorio.choice(refroes) if aleatorio.random() < 0.25 else f"verso {musica}-{trecho}"
+            linhas.append((musica, f"Música {musica}", f"musica{musica}", f"musica{musica}_trecho{trecho}",
+                           letra, f"Artista {musica % 97}", 2000 + musica % 25, len(letra.split())))
+    colunas = ['ranking_posicao', 'titulo', 'tag_musica', 'tag_trecho', 'letra', 'artista', 'ano', 'contagem_palavras']
+    df = pd.DataFrame(linhas[:total], columns=colunas)
+    # Embaralha, como num CSV concatenado de várias coletas: a ordem natural vem da renumeração
+    return df.sample(frac=1, random_state=semente).reset_index(drop=True)
+
+def medir(funcao, *args):
+    inicio = time.perf_counter()
+    resultado = funcao(*args)
+    return resultado, time.perf_counter() - inicio
+
+def main():
+    parser = argparse.ArgumentParser(description="Verifica e mede a remoção de duplicatas + renumeração de trechos.")
+    parser.add_argument("--tamanhos", default="1000,10000,100000,1000000", help="Quantidades de trechos, separadas por vírgula.")
+    parser.add_argument("--max-original", type=int, default=100_000,
+                        help="Maior corpus em que a versão original (quadrática) também é medida.")
+    args = parser.parse_args()
+
+    print(f"{'trechos':>10} {'músicas':>8} {'original':>10} {'groupby':>10} {'ganho':>7}  ordem natural")
+    for total in (int(t) for t in args.tamanhos.split(',')):
+        df = gerar_trechos(total)
+        df_limpo = df.drop_duplicates(subset=['tag_musica', 'letra'], keep='first')
+        novo, t_novo = medir(renumerar_trechos, df_limpo)
+
+        verificacao, t_original = '', None
+        if total <= args.max_original:
+            # Verificação contra a implementação óbvia (só nos tamanhos em que ela roda em tempo razoável)
+            verificacao = '✅' if novo.equals(renumerar_referencia(df_limpo)) else '❌'
+            _, t_original = medir(renumerar_original, df_limpo)
+
+        original = f"{t_original:9.2f}s" if t_original is not None else f"{'—':>10}"
+        ganho = f"{t_original / t_novo:6.0f}x" if t_original is not None else f"{'—':>7}"
+        print(f"{total:>10,} {df['tag_musica'].nunique():>8,} {original} {t_novo:9.3f}s {ganho}  {verificacao}")
+
+if __name__ == "__main__":
+    main()
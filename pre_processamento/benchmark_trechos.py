@@ -0,0 +1,104 @@
+import argparse
+import random
+import re
+import time
+
+import numpy as np
+import pandas as pd
+
+from processar_trechos import COLUNAS_TRECHOS, segmentar_trechos
+
+def segmentar_trechos_iterrows(df_original):
+    """Implementação original (iterrows, um dict por verso), mantida como referência para a verificação."""
+    dados_processados = []
+    for idx, row in df_original.iterrows():
+        tag_musica = f"musica{idx + 1}"
+        letra_completa = str(row['letra']) if pd.notna(row['letra']) else ""
+        if '\n' in letra_completa:
+            versos = [verso.strip() for verso in letra_completa.split('\n') if verso.strip()]
+        else:
+            versos_raw = re.split(r'(?<=\s)(?=[A-ZÁÀÂÃÉÈÊÍÏÓÔÕÖÚÇÑ])', letra_completa)
+            versos = [verso.strip() for verso in versos_raw if verso.strip()]
+        if not versos:
+            versos = [letra_completa]
+        for num_verso, verso in enumerate(versos, start=1):
+            dados_processados.append({
+                'ranking_posicao': row['ranking_posicao'] if pd.notna(row['ranking_posicao']) else None,
+                'titulo': row['titulo'],
+                'tag_musica': tag_musica,
+                'tag_trecho': f"{tag_musica}_trecho{num_verso}",
+                'letra': verso,
+                'artista': row['artista'],
+                'ano': row['ano'] if pd.notna(row['ano']) else None,
+                'contagem_palavras': len(verso.split()),
+            })
+    return pd.DataFrame(dados_processados, columns=COLUNAS_TRECHOS)
+
+PALAVRAS = ("amor saudade coração cerveja boteco estrada viola sertão você eu ela chorar beber "
+            "lembrança paixão noite dia tempo volta porteira luar ipê moda ação ôh").split()
+INICIOS = "Quando Eu Você Ela Hoje Amor Ôh Érica Às Ainda Se Não Tá Que".split()
+
+def gerar_corpus(quantidade, semente=42):
+    """
+    Corpus sintético com os formatos que aparecem nos CSVs: letras com \\n, letras coladas numa
+    linha só (versos começando com maiúscula), espaços sobrando, letras vazias e ausentes.
+    """
+    aleatorio = random.Random(semente)
+
+    def verso():
+        return " ".join([aleatorio.choice(INICIOS)] + aleatorio.choices(PALAVRAS, k=aleatorio.randint(2, 9)))
+
+    letras = []
+    for _ in range(quantidade):
+        versos = [verso() for _ in range(aleatorio.randint(8, 40))]
+        tipo = aleatorio.random()
+        if tipo < 0.45:
+            letras.append("\n".join(versos))
+        elif tipo < 0.55:
+            letras.append("\n\n ".join(versos) + "\n")
+        elif tipo < 0.97:
+            letras.append(" ".join(versos))
+        elif tipo < 0.98:
+            letras.append("   ")
+        elif tipo < 0.99:
+            letras.append(None)
+        else:
+            letras.append("sem maiúscula nenhuma aqui")
+    return pd.DataFrame({
+        'ranking_posicao': np.arange(1, quantidade + 1),
+        'titulo': [f"Música {i}" for i in range(quantidade)],
+        'artista': [aleatorio.choice(["Henrique & Juliano", "Marília Mendonça", "Gusttavo Lima", "Almir Sater"]) for _ in range(quantidade)],
+        'letra': letras,
+        'ano': [aleatorio.choice([None, 1991.0, 2015.0, 2023.0]) for _ in range(quantidade)],
+    })
+
+def medir(funcao, *args):
+    inicio = time.perf_counter()
+    resultado = funcao(*args)
+    return resultado, time.perf_counter() - inicio
+
+def main():
+    parser = argparse.ArgumentParser(description="Verifica e mede a segmentação de letras em trechos.")
+    parser.add_argument("--musicas", type=int, default=100_000, help="Tamanho do corpus sintético.")
+    parser.add_argument("--arquivo", default=None, help="CSV real de músicas para verificar também (coluna 'letra').")
+    args = parser.parse_args()
+
+    casos = [("sintético", gerar_corpus(args.musicas))]
+    if args.arquivo:
+        casos.append((args.arquivo, pd.read_csv(args.arquivo)))
+
+    for nome, df in casos:
+        print(f"\n🎵 Corpus {nome}: {len(df):,} músicas")
+        referencia, t_iterrows = medir(segmentar_trechos_iterrows, df)
+        vetorizado, t_vetorizado = medir(segmentar_trechos, df)
+
+        # Verificação: o CSV gerado tem de ser idêntico ao da implementação original
+        identico = referencia.to_csv(index=False) == vetorizado.to_csv(index=False)
+        print(f"🔍 {len(vetorizado):,} trechos, CSV idêntico ao da implementação original: {'✅' if identico else '❌'}")
+
+        for rotulo, tempo in [("iterrows (original)", t_iterrows), ("vetorizado", t_vetorizado)]:
+            print(f"   {rotulo:<20} {tempo:7.2f}s  {len(df) / tempo:10,.0f} músicas/s  "
+                  f"{tempo / len(df) * 1e6:6.1f} µs/música  ({t_iterrows / tempo:4.1f}x)")
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,30 @@
+import argparse
+import numpy as np
 import pandas as pd
 import os
 from datetime import datetime
 
-def limpar_trechos_duplicados(arquivo_entrada, pasta_saida):
+def numero_da_tag(tags):
+    """Número no fim de cada tag ('musica12' -> 12, 'musica12_trecho3' -> 3)."""
+    return tags.astype(str).str.extract(r'(\d+)$', expand=False).astype('int64').to_numpy()
+
+def renumerar_trechos(df):
+    """
+    Ordena os trechos em ordem natural (musica2 antes de musica10, trecho2 antes de trecho10)
+    e renumera tag_trecho em sequência dentro de cada música: musicaN_trecho1, 2, 3...
+    Uma ordenação estável + um groupby().cumcount(), sem varrer a tabela por música.
+    """
+    ordem = np.lexsort((numero_da_tag(df['tag_trecho']), numero_da_tag(df['tag_musica'])))
+    df = df.iloc[ordem].reset_index(drop=True)
+    numero_trecho = df.groupby('tag_musica', sort=False).cumcount() + 1
+    df['tag_trecho'] = df['tag_musica'].astype(str) + '_trecho' + numero_trecho.astype(str)
+    return df
+
+def limpar_trechos_duplicados(arquivo_entrada, pasta_saida, arquivo_saida=None):
     """
     Remove trechos duplicados dentro de cada música.
     Mantém apenas a primeira ocorrência de cada trecho único.
+    Sem arquivo_saida, grava musicas_por_trechos_limpo_<timestamp>.csv na pasta de saída.
     """
     
     print("="*70)
@@ -44,17 +63,7 @@ def limpar_trechos_duplicados(arquivo_entrada, pasta_saida):
     # Renumerar as tags dos trechos para ficarem sequenciais
     print("🔄 Renumerando tags dos trechos...")
     
-    # Criar nova coluna com numeração sequencial por música
-    df_limpo = df_limpo.sort_values(['tag_musica', 'tag_trecho']).reset_index(drop=True)
-    
-    # Renumerar dentro de cada música
-    nova_tag_trecho = []
-    for musica in df_limpo['tag_musica'].unique():
-        indices = df_limpo[df_limpo['tag_musica'] == musica].index
-        for i, idx in enumerate(indices, start=1):
-            nova_tag_trecho.append(f"{musica}_trecho{i}")
-    
-    df_limpo['tag_trecho'] = nova_tag_trecho
+    df_limpo = renumerar_trechos(df_limpo)
     
     print(f"✅ Tags renumeradas sequencialmente!")
     print()
@@ -63,9 +72,9 @@ def limpar_trechos_duplicados(arquivo_entrada, pasta_saida):
     print("📊 ESTATÍSTICAS POR MÚSICA")
     print("-"*70)
     
-    # Calcular quantos trechos foram removidos por música
-    trechos_antes = df.groupby('tag_musica').size()
-    trechos_depois = df_limpo.groupby('tag_musica').size()
+    # Calcular quantos trechos foram removidos por música (um groupby em cada tabela)
+    trechos_antes = df.groupby('tag_musica', sort=False).size()
+    trechos_depois = df_limpo.groupby('tag_musica', sort=False).size()
     
     # Músicas com mais duplicatas removidas
     duplicatas_por_musica = (trechos_antes - trechos_depois).sort_values(ascending=False)
@@ -76,10 +85,11 @@ def limpar_trechos_duplicados(arquivo_entrada, pasta_saida):
         print(f"   Músicas sem duplicatas: {df['tag_musica'].nunique() - len(musicas_com_duplicatas)}")
         print()
         print("   Top 10 músicas com mais duplicatas removidas:")
+        # Título e artista de cada música (primeira linha dela), sem varrer a tabela por música
+        info_musicas = df.drop_duplicates('tag_musica').set_index('tag_musica')[['titulo', 'artista']]
         for i, (tag_musica, qtd_removida) in enumerate(musicas_com_duplicatas.head(10).items(), 1):
-            # Pegar o título da música
-            titulo = df[df['tag_musica'] == tag_musica]['titulo'].iloc[0]
-            artista = df[df['tag_musica'] == tag_musica]['artista'].iloc[0]
+            titulo = str(info_musicas.at[tag_musica, 'titulo'])
+            artista = str(info_musicas.at[tag_musica, 'artista'])
             antes = trechos_antes[tag_musica]
             depois = trechos_depois.get(tag_musica, 0)
             print(f"      {i:2d}. {titulo[:40]:40s} ({artista[:20]:20s})")
@@ -90,8 +100,9 @@ def limpar_trechos_duplicados(arquivo_entrada, pasta_saida):
     print()
     
     # Gerar nome do arquivo de saída
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    arquivo_saida = os.path.join(pasta_saida, f"musicas_por_trechos_limpo_{timestamp}.csv")
+    if arquivo_saida is None:
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        arquivo_saida = os.path.join(pasta_saida, f"musicas_por_trechos_limpo_{timestamp}.csv")
     
     # Salvar arquivo
     print(f"💾 Salvando arquivo limpo...")
@@ -117,27 +128,35 @@ def limpar_trechos_duplicados(arquivo_entrada, pasta_saida):
 
 def main():
     """Função principal para executar a limpeza."""
+    parser = argparse.ArgumentParser(description="Remove trechos repetidos dentro de cada música e renumera as tags.")
+    parser.add_argument("--entrada", help="CSV de trechos (padrão: o musicas_por_trechos_*.csv mais recente).")
+    parser.add_argument("--saida", help="CSV limpo a gerar (padrão: musicas_por_trechos_limpo_<timestamp>.csv).")
+    args = parser.parse_args()
     
     # Definir caminhos
     base_dir = r"G:\Meu Drive\Mestrado\KDD\Anotacoes de aula\Trabalho pratico\projeto_funk"
     pasta_pre_processamento = os.path.join(base_dir, "pre_processamento")
     
-    # Encontrar o arquivo mais recente de trechos (não limpo)
-    import glob
-    arquivos_trechos = glob.glob(os.path.join(pasta_pre_processamento, "musicas_por_trechos_2*.csv"))
-    
-    # Filtrar apenas os arquivos que NÃO são limpos
-    arquivos_trechos = [f for f in arquivos_trechos if 'limpo' not in f]
-    
-    if not arquivos_trechos:
-        print("❌ Erro: Nenhum arquivo de trechos encontrado!")
-        return
-    
-    # Pegar o arquivo mais recente
-    arquivo_entrada = max(arquivos_trechos, key=os.path.getmtime)
+    if args.entrada:
+        arquivo_entrada = args.entrada
+    else:
+        # Encontrar o arquivo mais recente de trechos (não limpo)
+        import glob
+        arquivos_trechos = glob.glob(os.path.join(pasta_pre_processamento, "musicas_por_trechos_2*.csv"))
+        
+        # Filtrar apenas os arquivos que NÃO são limpos
+        arquivos_trechos = [f for f in arquivos_trechos if 'limpo' not in f]
+        
+        if not arquivos_trechos:
+            print("❌ Erro: Nenhum arquivo de trechos encontrado!")
+            return
+        
+        # Pegar o arquivo mais recente
+        arquivo_entrada = max(arquivos_trechos, key=os.path.getmtime)
+    pasta_saida = os.path.dirname(os.path.abspath(args.saida)) if args.saida else pasta_pre_processamento
     
     # Processar
-    df_resultado, arquivo_saida = limpar_trechos_duplicados(arquivo_entrada, pasta_pre_processamento)
+    df_resultado, arquivo_saida = limpar_trechos_duplicados(arquivo_entrada, pasta_saida, args.saida)
     
     # Mostrar exemplo de trechos após limpeza
     print("\n📝 EXEMPLO DOS PRIMEIROS TRECHOS (APÓS LIMPEZA):")
@@ -0,0 +1,110 @@
+import argparse
+import glob
+import os
+from datetime import datetime
+
+import pandas as pd
+
+from limpar_trechos_duplicados import renumerar_trechos
+from processar_trechos import COLUNAS_TRECHOS, segmentar_trechos
+
+MUSICAS_POR_LOTE = 5000
+
+# Tipos fixos: com read_csv em lotes, cada lote inferiria os seus (um lote sem ano vazio
+# viraria int e gravaria "2015" em vez de "2015.0", como na leitura do arquivo inteiro)
+TIPOS_ENTRADA = {'ranking_posicao': 'Int64', 'ano': 'float64'}
+
+def processar_lote(df_musicas):
+    """
+    Segmenta um lote de músicas em trechos e remove os trechos repetidos dentro de cada música.
+    As tags seguem o índice global (read_csv em lotes continua a numeração entre lotes),
+    e como uma música é uma linha do CSV de entrada, nenhuma música fica dividida entre lotes.
+    Retorna (trechos antes da limpeza, trechos limpos).
+    """
+    df_trechos = segmentar_trechos(df_musicas)
+    df_limpo = df_trechos.drop_duplicates(subset=['tag_musica', 'letra'], keep='first')
+    return len(df_trechos), renumerar_trechos(df_limpo)
+
+def processar_em_lotes(arquivo_entrada, pasta_saida, musicas_por_lote=MUSICAS_POR_LOTE, arquivo_unico=False):
+    """
+    Versão em fluxo de processar_trechos + limpar_trechos_duplicados para corpus maior que a memória:
+    lê o CSV de músicas em lotes e grava cada lote já limpo assim que fica pronto.
+    - Padrão: uma partição por lote (parte-00000.csv, parte-00001.csv, ...) numa pasta.
+    - arquivo_unico=True: os lotes são acrescentados a um CSV só, com o cabeçalho uma vez.
+    A memória fica limitada ao tamanho do lote; só contadores atravessam os lotes.
+    """
+    print("="*70)
+    print("🎵 PROCESSAMENTO DE TRECHOS EM LOTES")
+    print("="*70)
+    print(f"📂 Arquivo de entrada: {os.path.basename(arquivo_entrada)}")
+    print(f"📦 Músicas por lote: {musicas_por_lote:,}")
+
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    if arquivo_unico:
+        saida = os.path.join(pasta_saida, f"musicas_por_trechos_limpo_{timestamp}.csv")
+    else:
+        saida = os.path.join(pasta_saida, f"musicas_por_trechos_limpo_{timestamp}")
+        os.makedirs(saida, exist_ok=True)
+    print(f"📁 Saída: {saida}")
+    print()
+
+    total_musicas = total_trechos = total_limpos = 0
+    leitor = pd.read_csv(arquivo_entrada, chunksize=musicas_por_lote, dtype=TIPOS_ENTRADA)
+    for numero_lote, df_musicas in enumerate(leitor):
+        trechos, df_limpo = processar_lote(df_musicas)
+        if arquivo_unico:
+            df_limpo.to_csv(saida, mode='a', header=numero_lote == 0, index=False, encoding='utf-8')
+        else:
+            # Grava num temporário e renomeia: uma partição nunca fica pela metade
+            particao = os.path.join(saida, f"parte-{numero_lote:05d}.csv")
+            df_limpo.to_csv(particao + '.tmp', index=False, encoding='utf-8')
+            os.replace(particao + '.tmp', particao)
+
+        total_musicas += len(df_musicas)
+        total_trechos += trechos
+        total_limpos += len(df_limpo)
+        print(f"   ✅ Lote {numero_lote + 1}: {len(df_musicas):,} músicas → {len(df_limpo):,} trechos "
+              f"({trechos - len(df_limpo):,} repetidos removidos) | acumulado: {total_musicas:,} músicas")
+
+    print()
+    print("="*70)
+    print("📊 RESUMO FINAL")
+    print("="*70)
+    print(f"Total de músicas: {total_musicas:,}")
+    print(f"Trechos gerados: {total_trechos:,}")
+    print(f"Trechos únicos: {total_limpos:,}")
+    if total_trechos:
+        removidos = total_trechos - total_limpos
+        print(f"Trechos removidos: {removidos:,} ({removidos/total_trechos*100:.1f}%)")
+    if total_musicas:
+        print(f"Média de trechos por música: {total_limpos/total_musicas:.1f}")
+    print()
+    print(f"✅ Processamento finalizado com sucesso!")
+    print(f"📂 Saída disponível em: {saida}")
+    print("="*70)
+    return saida
+
+def ler_particoes(saida):
+    """Lê a saída de processar_em_lotes (pasta de partições ou CSV único) num DataFrame só."""
+    if os.path.isdir(saida):
+        return pd.concat((pd.read_csv(p) for p in sorted(glob.glob(os.path.join(saida, "parte-*.csv")))),
+                         ignore_index=True)[COLUNAS_TRECHOS]
+    return pd.read_csv(saida)
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Segmenta as letras em trechos e remove os repetidos, lendo e gravando em lotes (memória limitada)."
+    )
+    parser.add_argument("arquivo_entrada", help="CSV de músicas da coleta (colunas letra, titulo, artista, ano, ranking_posicao).")
+    parser.add_argument("--pasta-saida", default=os.path.dirname(os.path.abspath(__file__)), help="Pasta onde gravar a saída.")
+    parser.add_argument("--musicas-por-lote", type=int, default=MUSICAS_POR_LOTE, help="Músicas lidas e processadas por vez.")
+    parser.add_argument("--arquivo-unico", action="store_true", help="Acrescenta os lotes a um CSV só em vez de gravar partições.")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.arquivo_entrada):
+        print(f"❌ Erro: Arquivo não encontrado: {args.arquivo_entrada}")
+        return
+    processar_em_lotes(args.arquivo_entrada, args.pasta_saida, args.musicas_por_lote, args.arquivo_unico)
+
+if __name__ == "__main__":
+    main()
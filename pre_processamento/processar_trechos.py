@@ -1,11 +1,59 @@
+import argparse
 import pandas as pd
 import os
+import re
 from datetime import datetime
 
-def processar_letras_em_trechos(arquivo_entrada, pasta_saida):
+# Início de verso numa letra sem quebras de linha: letra maiúscula logo depois de um espaço
+# (a maiúscula fica no começo do novo verso)
+PADRAO_INICIO_VERSO = re.compile(r'(?<=\s)(?=[A-ZÁÀÂÃÉÈÊÍÏÓÔÕÖÚÇÑ])')
+
+COLUNAS_TRECHOS = ['ranking_posicao', 'titulo', 'tag_musica', 'tag_trecho', 'letra', 'artista', 'ano', 'contagem_palavras']
+
+def segmentar_trechos(df_original):
+    """
+    Cria a tabela de trechos: cada verso de cada letra vira uma linha, com as tags
+    musicaN e musicaN_trechoM (N = índice da música + 1).
+    - Letras com \n são quebradas nas quebras de linha.
+    - As demais são quebradas antes de cada maiúscula que vem depois de um espaço.
+    - Versos vazios são descartados; se não sobrar nenhum, a letra inteira vira um trecho.
+    Tudo com operações vetorizadas do pandas (split + explode + groupby().cumcount()).
+    """
+    letras = pd.Series(df_original['letra'].fillna('').astype(str).to_numpy(dtype=object))
+    tem_quebra = letras.str.contains('\n', regex=False)
+    versos = pd.concat([
+        letras[tem_quebra].str.split('\n', regex=False),
+        letras[~tem_quebra].str.split(PADRAO_INICIO_VERSO),
+    ]).sort_index().explode().str.strip()
+    versos = versos[versos != '']
+    
+    # Músicas sem nenhum verso não vazio entram com a letra inteira
+    sem_versos = letras.index.difference(versos.index)
+    if len(sem_versos):
+        versos = pd.concat([versos, letras[sem_versos]]).sort_index(kind='stable')
+    
+    posicoes = versos.index.to_numpy()
+    numero_musica = pd.Series(df_original.index.to_numpy()[posicoes] + 1).astype(str)
+    numero_trecho = (versos.groupby(level=0).cumcount() + 1).astype(str).to_numpy()
+    tag_musica = 'musica' + numero_musica
+    linhas = df_original.iloc[posicoes]
+    
+    return pd.DataFrame({
+        'ranking_posicao': linhas['ranking_posicao'].to_numpy(),
+        'titulo': linhas['titulo'].to_numpy(),
+        'tag_musica': tag_musica.to_numpy(),
+        'tag_trecho': (tag_musica + '_trecho' + numero_trecho).to_numpy(),
+        'letra': versos.to_numpy(),
+        'artista': linhas['artista'].to_numpy(),
+        'ano': linhas['ano'].to_numpy(),
+        'contagem_palavras': versos.str.count(r'\S+').to_numpy(),
+    }, columns=COLUNAS_TRECHOS)
+
+def processar_letras_em_trechos(arquivo_entrada, pasta_saida, arquivo_saida=None):
     """
     Processa o arquivo de músicas e cria uma nova tabela com os trechos das letras.
     Cada linha da letra vira uma linha na nova tabela.
+    Sem arquivo_saida, grava musicas_por_trechos_<timestamp>.csv na pasta de saída.
     """
     
     print("="*70)
@@ -21,66 +69,10 @@ def processar_letras_em_trechos(arquivo_entrada, pasta_saida):
     print(f"✅ Carregado: {len(df_original)} músicas")
     print()
     
-    # Lista para armazenar os novos dados
-    dados_processados = []
-    
-    # Processar cada música
+    # Quebrar as letras em versos de uma vez só (sem laço por música)
     print("🔄 Processando músicas e quebrando letras em trechos...")
-    total_trechos = 0
-    
-    for idx, row in df_original.iterrows():
-        num_musica = idx + 1  # Número da música (começa em 1)
-        tag_musica = f"musica{num_musica}"  # Tag no formato musica1, musica2, etc
-        
-        # Pegar a letra completa
-        letra_completa = str(row['letra']) if pd.notna(row['letra']) else ""
-        
-        # Quebrar a letra em versos usando estratégias inteligentes
-        # 1. Tentar quebrar por \n (quebras de linha explícitas)
-        if '\n' in letra_completa:
-            versos = [verso.strip() for verso in letra_completa.split('\n') if verso.strip()]
-        else:
-            # 2. Se não tem \n, quebrar quando encontrar letra maiúscula após espaço
-            # Isso indica o início de um novo verso
-            import re
-            
-            # Usar regex para quebrar antes de cada letra maiúscula que vem após um espaço
-            # Padrão: espaço seguido de letra maiúscula
-            # Mantém a maiúscula no início do novo verso
-            versos_raw = re.split(r'(?<=\s)(?=[A-ZÁÀÂÃÉÈÊÍÏÓÔÕÖÚÇÑ])', letra_completa)
-            
-            # Limpar espaços e filtrar versos vazios
-            versos = [verso.strip() for verso in versos_raw if verso.strip()]
-        
-        # Se mesmo assim não conseguiu quebrar, usar toda a letra como um verso
-        if not versos:
-            versos = [letra_completa]
-        
-        # Criar uma linha para cada verso
-        for num_verso, verso in enumerate(versos, start=1):
-            tag_trecho = f"{tag_musica}_trecho{num_verso}"
-            
-            # Contar palavras do trecho
-            contagem_palavras_trecho = len(verso.split())
-            
-            # Criar registro do trecho
-            trecho_data = {
-                'ranking_posicao': row['ranking_posicao'] if pd.notna(row['ranking_posicao']) else None,
-                'titulo': row['titulo'],
-                'tag_musica': tag_musica,
-                'tag_trecho': tag_trecho,
-                'letra': verso,  # O trecho/verso
-                'artista': row['artista'],
-                'ano': row['ano'] if pd.notna(row['ano']) else None,
-                'contagem_palavras': contagem_palavras_trecho
-            }
-            
-            dados_processados.append(trecho_data)
-            total_trechos += 1
-        
-        # Mostrar progresso a cada 50 músicas
-        if (idx + 1) % 50 == 0:
-            print(f"   Processadas {idx + 1}/{len(df_original)} músicas - {total_trechos} trechos gerados")
+    df_trechos = segmentar_trechos(df_original)
+    total_trechos = len(df_trechos)
     
     print(f"✅ Processamento concluído!")
     print(f"   📊 Total de músicas processadas: {len(df_original)}")
@@ -88,12 +80,10 @@ def processar_letras_em_trechos(arquivo_entrada, pasta_saida):
     print(f"   📈 Média de trechos por música: {total_trechos/len(df_original):.1f}")
     print()
     
-    # Criar DataFrame com os trechos
-    df_trechos = pd.DataFrame(dados_processados)
-    
     # Gerar nome do arquivo de saída
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    arquivo_saida = os.path.join(pasta_saida, f"musicas_por_trechos_{timestamp}.csv")
+    if arquivo_saida is None:
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        arquivo_saida = os.path.join(pasta_saida, f"musicas_por_trechos_{timestamp}.csv")
     
     # Salvar arquivo
     print(f"💾 Salvando arquivo processado...")
@@ -135,11 +125,15 @@ def processar_letras_em_trechos(arquivo_entrada, pasta_saida):
 
 def main():
     """Função principal para executar o processamento."""
+    parser = argparse.ArgumentParser(description="Quebra as letras das músicas em trechos (um verso por linha).")
+    parser.add_argument("--entrada", help="CSV de músicas (padrão: o arquivo da coleta no projeto).")
+    parser.add_argument("--saida", help="CSV de trechos a gerar (padrão: musicas_por_trechos_<timestamp>.csv).")
+    args = parser.parse_args()
     
     # Definir caminhos
     base_dir = r"G:\Meu Drive\Mestrado\KDD\Anotacoes de aula\Trabalho pratico\projeto_funk"
-    arquivo_entrada = os.path.join(base_dir, "base_de_dados", "sertanejo_parcial_20251027_180724_pos600.csv")
-    pasta_saida = os.path.join(base_dir, "pre_processamento")
+    arquivo_entrada = args.entrada or os.path.join(base_dir, "base_de_dados", "sertanejo_parcial_20251027_180724_pos600.csv")
+    pasta_saida = os.path.dirname(os.path.abspath(args.saida)) if args.saida else os.path.join(base_dir, "pre_processamento")
     
     # Verificar se o arquivo existe
     if not os.path.exists(arquivo_entrada):
@@ -152,7 +146,7 @@ def main():
         print(f"📁 Pasta criada: {pasta_saida}")
     
     # Processar
-    df_resultado, arquivo_saida = processar_letras_em_trechos(arquivo_entrada, pasta_saida)
+    df_resultado, arquivo_saida = processar_letras_em_trechos(arquivo_entrada, pasta_saida, args.saida)
     
     # Mostrar exemplo dos primeiros trechos
     print("\n📝 EXEMPLO DOS PRIMEIROS TRECHOS:")
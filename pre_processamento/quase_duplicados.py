@@ -0,0 +1,220 @@
+import argparse
+import os
+import re
+import unicodedata
+
+import numpy as np
+import pandas as pd
+
+# Assinatura MinHash: NUM_PERMUTACOES = BANDAS x LINHAS_POR_BANDA.
+# Com 16 bandas de 8 linhas, pares com Jaccard 0.8 viram candidatos com ~95% de chance e pares
+# com Jaccard 0.5 com ~6%; os candidatos ainda são conferidos pela similaridade estimada.
+TAMANHO_SHINGLE = 5
+BANDAS = 16
+LINHAS_POR_BANDA = 8
+NUM_PERMUTACOES = BANDAS * LINHAS_POR_BANDA
+LIMIAR_SIMILARIDADE = 0.8
+
+COLUNAS_MAPA = ['tag_trecho', 'tag_canonico', 'grupo', 'tamanho_grupo', 'similaridade']
+
+_PRIMO_POLINOMIO = np.uint64(1_000_003)
+_NAO_ALFANUMERICO = re.compile(r'[^a-z0-9]+')
+
+def normalizar_para_assinatura(texto):
+    """Minúsculas, sem acentos nem pontuação, espaços colapsados: 'Ôh, Saudade!' -> 'oh saudade'."""
+    texto = unicodedata.normalize('NFKD', str(texto).lower())
+    texto = ''.join(c for c in texto if not unicodedata.combining(c))
+    return _NAO_ALFANUMERICO.sub(' ', texto).strip()
+
+def _hashes_shingles(textos, k):
+    """
+    Hash de 32 bits de cada shingle de k caracteres, calculado de uma vez sobre todos os textos
+    concatenados. Retorna (hashes, inicio do primeiro shingle de cada texto).
+    Textos mais curtos que k são completados com '\\0' para terem um shingle.
+    """
+    textos = [t.ljust(k, '\0') for t in textos]
+    tamanhos = np.fromiter((len(t) for t in textos), dtype=np.int64, count=len(textos))
+    codigos = np.frombuffer(''.join(textos).encode('utf-32-le'), dtype=np.uint32).astype(np.uint64)
+    inicios = np.concatenate(([0], np.cumsum(tamanhos)[:-1]))
+
+    # Hash polinomial de cada janela de k caracteres (aritmética módulo 2^64)
+    n_janelas = len(codigos) - k + 1
+    hashes = np.zeros(n_janelas, dtype=np.uint64)
+    for j in range(k):
+        hashes = hashes * _PRIMO_POLINOMIO + codigos[j:j + n_janelas]
+    hashes = (hashes ^ (hashes >> np.uint64(29))) & np.uint64(0xFFFFFFFF)
+
+    # Só valem as janelas que terminam dentro do próprio texto
+    validas = np.ones(n_janelas, dtype=bool)
+    finais = inicios + tamanhos
+    for j in range(1, k):
+        cruzam = finais - j
+        validas[cruzam[cruzam < n_janelas]] = False
+    posicoes = np.flatnonzero(validas)
+    inicios_shingles = np.searchsorted(posicoes, inicios)
+    return hashes[posicoes], inicios_shingles
+
+def assinaturas_minhash(textos, num_permutacoes=NUM_PERMUTACOES, k=TAMANHO_SHINGLE, semente=1, tamanho_bloco=5000):
+    """
+    Assinatura MinHash (uint32, num_permutacoes colunas) de cada texto já normalizado.
+    Cada permutação é um hash multiplicativo h(x) = (a*x + b mod 2^64) >> 32; o mínimo por texto
+    sai de np.minimum.reduceat sobre os shingles concatenados, em blocos de textos.
+    """
+    gerador = np.random.default_rng(semente)
+    a = gerador.integers(1, 2**63, size=num_permutacoes, dtype=np.uint64) | np.uint64(1)
+    b = gerador.integers(0, 2**63, size=num_permutacoes, dtype=np.uint64)
+    assinaturas = np.empty((len(textos), num_permutacoes), dtype=np.uint32)
+    for inicio in range(0, len(textos), tamanho_bloco):
+        hashes, inicios = _hashes_shingles(textos[inicio:inicio + tamanho_bloco], k)
+        for p in range(0, num_permutacoes, 32):
+            # Uma linha por permutação: o reduceat percorre memória contígua
+            permutados = (a[p:p + 32, None] * hashes[None, :] + b[p:p + 32, None]) >> np.uint64(32)
+            assinaturas[inicio:inicio + len(inicios), p:p + 32] = np.minimum.reduceat(permutados, inicios, axis=1).T
+    return assinaturas
+
+def pares_candidatos(assinaturas, bandas=BANDAS):
+    """
+    LSH por bandas: textos com a mesma fatia da assinatura numa banda caem no mesmo balde.
+    Cada balde vira arestas (primeiro do balde -> demais), então o custo é linear no tamanho
+    do balde mesmo para refrões repetidos milhares de vezes.
+    """
+    linhas = assinaturas.shape[1] // bandas
+    origens, destinos = [], []
+    for banda in range(bandas):
+        fatia = assinaturas[:, banda * linhas:(banda + 1) * linhas].astype(np.uint64)
+        chaves = np.zeros(len(assinaturas), dtype=np.uint64)
+        for coluna in range(linhas):
+            chaves = chaves * _PRIMO_POLINOMIO + fatia[:, coluna]
+        ordem = np.argsort(chaves, kind='stable')
+        ordenadas = chaves[ordem]
+        novo_balde = np.ones(len(ordenadas), dtype=bool)
+        novo_balde[1:] = ordenadas[1:] != ordenadas[:-1]
+        primeiro = ordem[np.maximum.accumulate(np.where(novo_balde, np.arange(len(ordem)), 0))]
+        origens.append(primeiro[~novo_balde])
+        destinos.append(ordem[~novo_balde])
+    if not origens:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    pares = np.unique(np.stack([np.concatenate(origens), np.concatenate(destinos)], axis=1), axis=0)
+    return pares[:, 0], pares[:, 1]
+
+def similaridade_estimada(assinaturas, origens, destinos, tamanho_bloco=100_000):
+    """Fração de posições iguais nas assinaturas: estimativa do Jaccard de cada par."""
+    similaridades = np.empty(len(origens), dtype=np.float32)
+    for inicio in range(0, len(origens), tamanho_bloco):
+        fim = inicio + tamanho_bloco
+        iguais = assinaturas[origens[inicio:fim]] == assinaturas[destinos[inicio:fim]]
+        similaridades[inicio:fim] = iguais.mean(axis=1)
+    return similaridades
+
+def componentes_conexas(n, origens, destinos):
+    """Rótulo de cada nó = menor índice da sua componente (propagação do mínimo + saltos de ponteiro)."""
+    rotulos = np.arange(n)
+    while True:
+        anteriores = rotulos.copy()
+        menores = np.minimum(rotulos[origens], rotulos[destinos])
+        np.minimum.at(rotulos, origens, menores)
+        np.minimum.at(rotulos, destinos, menores)
+        while True:
+            saltados = rotulos[rotulos]
+            if np.array_equal(saltados, rotulos):
+                break
+            rotulos = saltados
+        if np.array_equal(rotulos, anteriores):
+            return rotulos
+
+def agrupar_quase_duplicados(textos, limiar=LIMIAR_SIMILARIDADE, bandas=BANDAS, linhas_por_banda=LINHAS_POR_BANDA):
+    """
+    Agrupa textos quase iguais. Retorna (canonico, similaridade): para cada texto, o índice do
+    representante do grupo (a primeira ocorrência) e a similaridade estimada com ele, sempre >= limiar.
+    """
+    normalizados = [normalizar_para_assinatura(t) for t in textos]
+    assinaturas = assinaturas_minhash(normalizados, bandas * linhas_por_banda)
+    origens, destinos = pares_candidatos(assinaturas, bandas)
+    aceitos = similaridade_estimada(assinaturas, origens, destinos) >= limiar
+    origens, destinos = origens[aceitos], destinos[aceitos]
+    canonico = componentes_conexas(len(textos), origens, destinos)
+    similaridade = similaridade_estimada(assinaturas, canonico, np.arange(len(textos)))
+
+    # A componente é o fecho transitivo das arestas: em A~B~C, C pode ficar abaixo do limiar com A.
+    # Quem ficou abaixo sai do grupo e é reagrupado só com os que também saíram; o representante
+    # de cada novo grupo é um deles, então o conjunto diminui a cada volta
+    soltos = similaridade < limiar
+    while soltos.any():
+        entre_soltos = soltos[origens] & soltos[destinos]
+        rotulos = componentes_conexas(len(textos), origens[entre_soltos], destinos[entre_soltos])
+        indices = np.flatnonzero(soltos)
+        canonico[indices] = rotulos[indices]
+        similaridade[indices] = similaridade_estimada(assinaturas, canonico[indices], indices)
+        soltos[indices] = similaridade[indices] < limiar
+    return canonico, similaridade
+
+def mapa_canonico(df, limiar=LIMIAR_SIMILARIDADE):
+    """
+    Mapa tag_trecho -> tag_canonico para o corpus inteiro (todas as músicas), com o número do
+    grupo, o tamanho dele e a similaridade estimada de cada trecho com o representante.
+    """
+    letras = df['letra'].fillna('').astype(str).tolist()
+    canonico, similaridade = agrupar_quase_duplicados(letras, limiar)
+    tags = df['tag_trecho'].astype(str).to_numpy()
+    tamanhos = np.bincount(canonico, minlength=len(canonico))
+    return pd.DataFrame({
+        'tag_trecho': tags,
+        'tag_canonico': tags[canonico],
+        'grupo': canonico,
+        'tamanho_grupo': tamanhos[canonico],
+        'similaridade': np.round(similaridade, 3),
+    }, columns=COLUNAS_MAPA)
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Agrupa trechos quase duplicados do corpus inteiro (MinHash + LSH) e gera o mapa para o representante."
+    )
+    parser.add_argument("trechos_csv", help="CSV de trechos (tag_trecho, letra), ex.: musicas_por_trechos_limpo_*.csv")
+    parser.add_argument("--limiar", type=float, default=LIMIAR_SIMILARIDADE, help="Similaridade (Jaccard estimado) mínima.")
+    parser.add_argument("--iteracoes", type=int, default=int(os.environ.get("LLMUSIC_ITERACOES", 3)),
+                        help="Iterações do 06_processar_temas.py, para estimar as chamadas economizadas.")
+    parser.add_argument("--topicos", type=int, default=None,
+                        help="Quantidade de tópicos do 07_relatorio_final.py, para estimar as chamadas economizadas.")
+    parser.add_argument("--inferencias", type=int, default=int(os.environ.get("LLMUSIC_INFERENCIAS", 5)),
+                        help="Inferências por par trecho/tópico do 07_relatorio_final.py.")
+    args = parser.parse_args()
+
+    print("="*70)
+    print("🧬 TRECHOS QUASE DUPLICADOS (MinHash + LSH)")
+    print("="*70)
+    df = pd.read_csv(args.trechos_csv)
+    print(f"✅ Carregado: {len(df):,} trechos de {df['tag_musica'].nunique() if 'tag_musica' in df.columns else '?'} músicas")
+
+    mapa = mapa_canonico(df, args.limiar)
+    total = len(mapa)
+    canonicos = int((mapa['tag_trecho'] == mapa['tag_canonico']).sum())
+    agrupados = mapa[mapa['tamanho_grupo'] > 1]
+    print(f"🔎 {agrupados['grupo'].nunique():,} grupos com mais de um trecho ({len(agrupados):,} trechos)")
+    print(f"📉 Trechos a processar: {total:,} → {canonicos:,} ({(1 - canonicos / total) * 100 if total else 0:.1f}% a menos)")
+
+    # Chamadas ao LLM: 06 faz uma por trecho e iteração; 07 faz uma por trecho, tópico e inferência
+    economizados = total - canonicos
+    print(f"🤖 Chamadas ao LLM economizadas no 06_processar_temas.py: {economizados * args.iteracoes:,} "
+          f"({economizados:,} trechos x {args.iteracoes} iterações)")
+    if args.topicos:
+        print(f"🤖 Chamadas ao LLM economizadas no 07_relatorio_final.py: {economizados * args.topicos * args.inferencias:,} "
+              f"({economizados:,} trechos x {args.topicos} tópicos x {args.inferencias} inferências)")
+
+    print("\nMaiores grupos:")
+    maiores = agrupados.groupby('tag_canonico', sort=False)['tamanho_grupo'].first().sort_values(ascending=False).head(5)
+    letras = df.set_index(df['tag_trecho'].astype(str))['letra']
+    for tag, tamanho in maiores.items():
+        print(f"   {tamanho:5d}x  {str(letras[tag])[:60]}")
+
+    base, _ = os.path.splitext(args.trechos_csv)
+    arquivo_mapa = f"{base}_quase_duplicados.csv"
+    arquivo_canonicos = f"{base}_canonicos.csv"
+    mapa.to_csv(arquivo_mapa, index=False, encoding='utf-8')
+    df[(mapa['tag_trecho'] == mapa['tag_canonico']).to_numpy()].to_csv(arquivo_canonicos, index=False, encoding='utf-8')
+    print(f"\n💾 Mapa trecho -> representante: {arquivo_mapa}")
+    print(f"💾 Só os representantes (para BERTopic): {arquivo_canonicos}")
+    print("   Use --mapa-duplicados no 06/07 para processar cada grupo uma vez e replicar o resultado.")
+    print("="*70)
+
+if __name__ == "__main__":
+    main()
@@ -5,6 +5,7 @@ import time
 import random
 from bertopic import BERTopic
 from sentence_transformers import SentenceTransformer
+from cache_embeddings import codificar_com_cache
 # A biblioteca do Google NÃO é mais necessária aqui
 
 print("--- Iniciando o pipeline LLMusic (Versão Local com Ollama) ---")
@@ -84,8 +85,9 @@ pd.DataFrame(lista_de_temas_gerados, columns=["tema"]).to_csv("temas_gerados_llm
 # --- 3. Etapa 2: Agrupamento de Temas (BERTopic) ---
 print("\n--- ETAPA 2: Agrupando temas com BERTopic ---")
 
+MODELO_EMBEDDING = "paraphrase-multilingual-MiniLM-L12-v2"
 print("Carregando modelo de embedding...")
-embedding_model = SentenceTransformer("paraphrase-multilingual-MiniLM-L12-v2")
+embedding_model = SentenceTransformer(MODELO_EMBEDDING)
 
 print("Instanciando o modelo BERTopic...")
 topic_model_llmusic = BERTopic(
@@ -95,7 +97,9 @@ topic_model_llmusic = BERTopic(
 )
 
 print("Iniciando o treinamento do modelo nos temas gerados...")
-topics, probabilities = topic_model_llmusic.fit_transform(lista_de_temas_gerados)
+# Só os textos que ainda não estão no cache são codificados; o BERTopic recebe os embeddings prontos
+embeddings = codificar_com_cache(lista_de_temas_gerados, MODELO_EMBEDDING, embedding_model)
+topics, probabilities = topic_model_llmusic.fit_transform(lista_de_temas_gerados, embeddings=embeddings)
 
 # --- 4. Visualizar os Resultados ---
 print("\n--- TÓPICOS ENCONTRADOS (Pipeline LLMusic - Local) ---")
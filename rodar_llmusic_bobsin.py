@@ -7,6 +7,8 @@ import random
 from pathlib import Path
 from bertopic import BERTopic
 from sentence_transformers import SentenceTransformer
+from cache_embeddings import codificar_com_cache
+from embeddings_onnx import ModeloOnnx, backend_bertopic
 # A biblioteca do Google NÃO é mais necessária aqui
 
 MODEL_NAME = os.environ.get("LLMUSIC_MODEL", "llama3:8b")
@@ -14,12 +16,14 @@ N_ITERACOES = int(os.environ.get("LLMUSIC_ITERACOES", 10))
 TRECHOS_POR_LOTE = int(os.environ.get("LLMUSIC_TRECHOS_LOTE", 20))
 TEMAS_POR_LOTE = int(os.environ.get("LLMUSIC_TEMAS_POR_LOTE", 5))
 EMBEDDING_DEVICE = os.environ.get("LLMUSIC_EMBEDDING_DEVICE", "cuda")
+# "onnx": modelo int8 no ONNX Runtime, para máquinas sem GPU (exportar antes com embeddings_onnx.py --exportar)
+EMBEDDING_BACKEND = os.environ.get("LLMUSIC_EMBEDDING_BACKEND", "sentence-transformers")
 
 print("--- Iniciando o pipeline LLMusic (Versão Local com Ollama) ---")
 print(
     f"Configuração: modelo={MODEL_NAME}, iteracoes={N_ITERACOES}, "
     f"lote={TRECHOS_POR_LOTE}, temas_por_lote={TEMAS_POR_LOTE}, "
-    f"device_embedding={EMBEDDING_DEVICE}"
+    f"device_embedding={EMBEDDING_DEVICE}, backend_embedding={EMBEDDING_BACKEND}"
 )
 
 # --- 1. Carregar os Dados ---
@@ -112,11 +116,19 @@ pd.DataFrame(lista_de_temas_gerados, columns=["tema"]).to_csv("temas_gerados_llm
 # --- 3. Etapa 2: Agrupamento de Temas (BERTopic) ---
 print("\n--- ETAPA 2: Agrupando temas com BERTopic ---")
 
+MODELO_EMBEDDING = "paraphrase-pt-MiniLM-L12-v2"
 print("Carregando modelo de embedding...")
-embedding_model = SentenceTransformer(
-    "paraphrase-pt-MiniLM-L12-v2",
-    device=EMBEDDING_DEVICE
-)
+if EMBEDDING_BACKEND == "onnx":
+    modelo_onnx = ModeloOnnx(MODELO_EMBEDDING)
+    nome_cache = modelo_onnx.nome_cache
+    embedding_model = backend_bertopic(modelo_onnx)
+else:
+    modelo_onnx = None
+    nome_cache = MODELO_EMBEDDING
+    embedding_model = SentenceTransformer(
+        MODELO_EMBEDDING,
+        device=EMBEDDING_DEVICE
+    )
 
 print("Instanciando o modelo BERTopic...")
 topic_model_llmusic = BERTopic(
@@ -126,7 +138,9 @@ topic_model_llmusic = BERTopic(
 )
 
 print("Iniciando o treinamento do modelo nos temas gerados...")
-topics, probabilities = topic_model_llmusic.fit_transform(lista_de_temas_gerados)
+# Só os textos que ainda não estão no cache são codificados; o BERTopic recebe os embeddings prontos
+embeddings = codificar_com_cache(lista_de_temas_gerados, nome_cache, modelo_onnx or embedding_model)
+topics, probabilities = topic_model_llmusic.fit_transform(lista_de_temas_gerados, embeddings=embeddings)
 
 # --- 4. Visualizar os Resultados ---
 print("\n--- TÓPICOS ENCONTRADOS (Pipeline LLMusic - Local) ---")
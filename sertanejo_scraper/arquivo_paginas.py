@@ -0,0 +1,108 @@
+# ================================================================================
+# ARQUIVO DE PÁGINAS BRUTAS (ENDEREÇADO POR CONTEÚDO)
+# Guarda o HTML de cada resposta comprimido, com nome = SHA-256 do conteúdo,
+# e um manifesto SQLite de capturas (URL, hash, data, dados da lista de origem)
+# ================================================================================
+
+import gzip
+import hashlib
+import os
+import sqlite3
+import threading
+from datetime import datetime
+
+class ArquivoPaginas:
+    """
+    Arquivo no estilo WARC: páginas idênticas são gravadas uma só vez e cada download
+    vira uma captura no manifesto. Permite reextrair tudo sem acessar o site.
+    """
+
+    def __init__(self, pasta):
+        self.pasta = pasta
+        self.pasta_objetos = os.path.join(pasta, 'objetos')
+        os.makedirs(self.pasta_objetos, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(os.path.join(pasta, 'manifesto.sqlite'), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        with self._conn:
+            self._conn.execute(
+                """CREATE TABLE IF NOT EXISTS capturas (
+                       seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                       url TEXT NOT NULL,
+                       sha256 TEXT NOT NULL,
+                       tamanho INTEGER NOT NULL,
+                       baixado_em TEXT NOT NULL,
+                       ranking_posicao INTEGER,
+                       titulo_original TEXT,
+                       artista_original TEXT
+                   )"""
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS capturas_url ON capturas(url)")
+
+    def caminho_objeto(self, sha256):
+        return os.path.join(self.pasta_objetos, sha256[:2], f"{sha256}.html.gz")
+
+    def guardar(self, conteudo, url, titulo_original=None, artista_original=None, ranking_posicao=None):
+        """Arquiva uma resposta. Só grava o arquivo se o conteúdo ainda não existir. Retorna o SHA-256."""
+        sha256 = hashlib.sha256(conteudo).hexdigest()
+        caminho = self.caminho_objeto(sha256)
+        if not os.path.exists(caminho):
+            os.makedirs(os.path.dirname(caminho), exist_ok=True)
+            # Escreve num temporário e renomeia: nunca fica um objeto pela metade
+            temporario = f"{caminho}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with gzip.open(temporario, 'wb', compresslevel=6) as f:
+                f.write(conteudo)
+            os.replace(temporario, caminho)
+        with self._lock, self._conn:
+            self._conn.execute(
+                """INSERT INTO capturas (url, sha256, tamanho, baixado_em, ranking_posicao, titulo_original, artista_original)
+                   VALUES (?, ?, ?, ?, ?, ?, ?)""",
+                (url, sha256, len(conteudo), datetime.now().isoformat(), ranking_posicao, titulo_original, artista_original),
+            )
+        return sha256
+
+    def ler(self, sha256):
+        """Conteúdo bruto de um objeto do arquivo."""
+        with gzip.open(self.caminho_objeto(sha256), 'rb') as f:
+            return f.read()
+
+    def capturas(self, somente_recentes=True):
+        """
+        Lista de (sha256, url, titulo_original, artista_original, ranking_posicao, baixado_em).
+        Com somente_recentes, só a última captura de cada URL.
+        """
+        with self._lock:
+            if somente_recentes:
+                cursor = self._conn.execute(
+                    """SELECT sha256, url, titulo_original, artista_original, ranking_posicao, baixado_em
+                       FROM capturas WHERE seq IN (SELECT MAX(seq) FROM capturas GROUP BY url)
+                       ORDER BY ranking_posicao, seq"""
+                )
+            else:
+                cursor = self._conn.execute(
+                    """SELECT sha256, url, titulo_original, artista_original, ranking_posicao, baixado_em
+                       FROM capturas ORDER BY seq"""
+                )
+            return cursor.fetchall()
+
+    def resumo(self):
+        """Texto com capturas, URLs, objetos únicos e tamanho em disco."""
+        with self._lock:
+            capturas, urls, objetos, bytes_brutos = self._conn.execute(
+                """SELECT COUNT(*), COUNT(DISTINCT url), COUNT(DISTINCT sha256),
+                          (SELECT COALESCE(SUM(tamanho), 0) FROM (SELECT DISTINCT sha256, tamanho FROM capturas))
+                   FROM capturas"""
+            ).fetchone()
+        bytes_disco = sum(
+            os.path.getsize(os.path.join(raiz, nome))
+            for raiz, _, nomes in os.walk(self.pasta_objetos) for nome in nomes if nome.endswith('.html.gz')
+        )
+        taxa = bytes_brutos / bytes_disco if bytes_disco else 0.0
+        return (
+            f"🗃️  Arquivo de páginas: {capturas} capturas de {urls} URLs | {objetos} objetos únicos | "
+            f"{bytes_brutos/1024/1024:.1f} MB -> {bytes_disco/1024/1024:.1f} MB em disco ({taxa:.1f}x)"
+        )
+
+    def fechar(self):
+        with self._lock:
+            self._conn.close()
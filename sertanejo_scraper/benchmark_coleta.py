@@ -0,0 +1,104 @@
+# ================================================================================
+# BENCHMARK DA COLETA: SERIAL x CONCORRENTE
+# Usa um servidor HTTP local com páginas de letra fictícias e latência artificial
+# ================================================================================
+
+import argparse
+import contextlib
+import io
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import scraper_sertanejo as scraper
+
+def gerar_pagina_fixture(numero, ano=2020):
+    """Gera o HTML de uma página de letra no formato do Letras.mus.br."""
+    versos = "<br>".join(
+        f"Verso {v} da musica {numero} com saudade e viola" for v in range(1, 13)
+    )
+    json_ld = json.dumps({"@type": "MusicRecording", "name": f"Musica {numero}", "datePublished": f"{ano}-05-01"})
+    return (
+        "<html><head><title>Letra</title>"
+        f'<script type="application/ld+json">{json_ld}</script>'
+        "</head><body>"
+        f'<h1 class="textStyle-primary">Musica {numero}</h1>'
+        '<a href="/artista-fixture/">Artista Fixture</a>'
+        f'<div class="lyric-original"><p>{versos}</p></div>'
+        "</body></html>"
+    ).encode("utf-8")
+
+def iniciar_servidor_fixture(latencia):
+    """Sobe um servidor local que responde cada página após `latencia` segundos."""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            time.sleep(latencia)
+            numero = int(self.path.strip("/").split("-")[-1] or 0)
+            corpo = gerar_pagina_fixture(numero)
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(corpo)))
+            self.end_headers()
+            self.wfile.write(corpo)
+
+        def log_message(self, *args):
+            pass
+
+    servidor = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    return servidor
+
+def sem_horario(registro):
+    """Remove o campo de horário da coleta para comparar registros."""
+    return {k: v for k, v in registro.items() if k != "coletado_em"}
+
+def main():
+    parser = argparse.ArgumentParser(description="Compara a coleta serial com o motor concorrente.")
+    parser.add_argument("--musicas", type=int, default=60, help="Quantidade de páginas fictícias.")
+    parser.add_argument("--latencia", type=float, default=0.25, help="Latência artificial por página (s).")
+    parser.add_argument("--taxa", type=float, default=20.0, help="Limite de req/s por host na coleta concorrente.")
+    parser.add_argument("--em-voo", type=int, default=8, help="Requisições simultâneas na coleta concorrente.")
+    args = parser.parse_args()
+
+    # Cache em memória e sem arquivo de páginas para não misturar as páginas fictícias com as reais
+    scraper.CAMINHO_CACHE_HTTP = ":memory:"
+    scraper.CAMINHO_ARQUIVO_PAGINAS = None
+    servidor = iniciar_servidor_fixture(args.latencia)
+    base = f"http://127.0.0.1:{servidor.server_port}"
+    tarefas = [(f"{base}/artista-fixture/musica-{i}/", f"Musica {i}", "Artista Fixture", i) for i in range(1, args.musicas + 1)]
+
+    print(f"🧪 {args.musicas} páginas, latência de {args.latencia}s por página")
+
+    # Serial: mesmo laço antigo, sem os delays aleatórios (limite inferior do tempo antigo)
+    scraper.configurar_limite_taxa(1e9)
+    inicio = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        serial = [scraper.extrair_letra_completa_corrigida(*t) for t in tarefas]
+    tempo_serial = time.perf_counter() - inicio
+
+    # Concorrente: limitado pela taxa por host, não pela latência
+    scraper.configurar_limite_taxa(args.taxa, rajada=1)
+    inicio = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        concorrente = {}
+        for indice, _, dados, _ in scraper.executar_em_paralelo(
+            scraper.extrair_letra_completa_corrigida, tarefas, args.em_voo
+        ):
+            concorrente[indice] = dados
+    tempo_concorrente = time.perf_counter() - inicio
+    concorrente = [concorrente[k] for k in sorted(concorrente)]
+
+    servidor.shutdown()
+
+    iguais = [sem_horario(a) for a in serial] == [sem_horario(b) for b in concorrente]
+    piso = args.musicas / args.taxa
+    print(f"   Serial (sem delays):  {tempo_serial:6.2f}s ({args.musicas / tempo_serial:5.1f} músicas/s)")
+    print(f"   Concorrente:          {tempo_concorrente:6.2f}s ({args.musicas / tempo_concorrente:5.1f} músicas/s)")
+    print(f"   Piso do limite de taxa: {piso:.2f}s")
+    print(f"   🚀 Speed-up: {tempo_serial / tempo_concorrente:.1f}x")
+    print(f"   {'✅' if iguais else '❌'} Registros idênticos aos da coleta serial: {iguais}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+# ================================================================================
+# BENCHMARK E VERIFICAÇÃO DO NORMALIZADOR DE LETRAS
+# Compara a cascata de regex original de limpar_letra com o normalizador de passada única
+# ================================================================================
+
+import argparse
+import glob
+import random
+import re
+import time
+
+import pandas as pd
+
+from normalizador import normalizar_letra, normalizar_lote
+
+def limpar_letra_cascata(letra_bruta):
+    """Implementação original de limpar_letra (referência para a verificação)."""
+    if not letra_bruta:
+        return ""
+    texto_limpo = re.sub(r'([a-záéíóúçãõâêôà])([A-ZÁÉÍÓÚÇÃÕÂÊÔÀ])', r'\1 \2', letra_bruta)
+    texto_limpo = re.sub(r'([0-9A-ZÁÉÍÓÚÇÃÕÂÊÔÀ]{2,})([A-ZÁÉÍÓÚÇÃÕÂÊÔÀ][a-záéíóúçãõâêôà])', r'\1 \2', texto_limpo)
+    texto_limpo = re.sub(r'([A-ZÁÉÍÓÚÇÃÕÂÊÔÀ]{2,})([A-ZÁÉÍÓÚÇÃÕÂÊÔÀ][a-záéíóúçãõâêôà]+)', r'\1 \2', texto_limpo)
+    texto_limpo = re.sub(r'([a-záéíóúçãõâêôà])([A-ZÁÉÍÓÚÇÃÕÂÊÔÀ][a-záéíóúçãõâêôà])', r'\1 \2', texto_limpo)
+    texto_limpo = re.sub(r'([.!?;:])([A-ZÁÉÍÓÚÇÃÕÂÊÔÀ])', r'\1 \2', texto_limpo)
+    linhas = [linha.strip() for linha in texto_limpo.split('\n') if linha.strip()]
+    texto_final = '\n'.join(linhas)
+    texto_final = re.sub(r'\s+', ' ', texto_final)
+    return texto_final
+
+def gerar_casos_aleatorios(quantidade, semente=42):
+    """Strings aleatórias concentradas nos caracteres que as regras tratam."""
+    aleatorio = random.Random(semente)
+    alfabeto = list("aeiouzçãéàõêôAEIOUZÇÃÉÀÕÊÔ0123456789.!?;:,-' \t\n\r\xa0") + ["\n\n", "  ", "IPVA", "Quem"]
+    return ["".join(aleatorio.choice(alfabeto) for _ in range(aleatorio.randint(0, 80))) for _ in range(quantidade)]
+
+def desglutinar(letra):
+    """Simula o texto bruto da página: versos colados sem espaço, como vem do get_text()."""
+    return re.sub(r' (?=[A-ZÁÉÍÓÚÇÃÕÂÊÔÀ])', '', letra)
+
+def medir(funcao, *args):
+    inicio = time.perf_counter()
+    resultado = funcao(*args)
+    return resultado, time.perf_counter() - inicio
+
+def main():
+    parser = argparse.ArgumentParser(description="Verifica e mede o normalizador de letras.")
+    parser.add_argument("--padrao", default="../base_de_dados/sertanejo_parcial_*.csv", help="CSVs do corpus (coluna 'letra').")
+    parser.add_argument("--vezes", type=int, default=100, help="Quantas vezes duplicar o corpus no benchmark.")
+    args = parser.parse_args()
+
+    arquivos = sorted(glob.glob(args.padrao))
+    if not arquivos:
+        print(f"❌ Nenhum arquivo encontrado em {args.padrao}")
+        return
+    letras = pd.concat([pd.read_csv(a)['letra'] for a in arquivos], ignore_index=True).dropna().astype(str).tolist()
+    brutas = [desglutinar(l) for l in letras]
+
+    # Verificação de saída idêntica (casos dourados)
+    casos = letras + brutas + gerar_casos_aleatorios(20000) + ["", None]
+    divergentes = [c for c in casos if normalizar_letra(c) != limpar_letra_cascata(c)]
+    print(f"🔍 {len(casos):,} casos comparados com a cascata original: "
+          f"{'✅ todos idênticos' if not divergentes else f'❌ {len(divergentes)} divergentes, ex.: {divergentes[0]!r}'}")
+    lote = normalizar_lote(pd.Series(brutas))
+    print(f"🔍 normalizar_lote (Series) idêntico: {lote.tolist() == [limpar_letra_cascata(b) for b in brutas]}")
+
+    # Benchmark no corpus duplicado
+    corpus = brutas * args.vezes
+    tamanho_mb = sum(len(l) for l in corpus) / 1024 / 1024
+    print(f"\n⏱️  Corpus: {len(corpus):,} letras ({tamanho_mb:.0f} MB), {len(arquivos)} arquivo(s) x{args.vezes}")
+
+    _, t_cascata = medir(lambda c: [limpar_letra_cascata(l) for l in c], corpus)
+    _, t_unica = medir(lambda c: [normalizar_letra(l) for l in c], corpus)
+    _, t_lote = medir(normalizar_lote, corpus)
+    _, t_serie = medir(normalizar_lote, pd.Series(corpus))
+
+    for nome, tempo in [("cascata original", t_cascata), ("passada única", t_unica),
+                        ("lote (lista)", t_lote), ("lote (Series)", t_serie)]:
+        print(f"   {nome:<18} {tempo:7.2f}s  {len(corpus)/tempo:10,.0f} letras/s  ({t_cascata/tempo:4.1f}x)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+# ================================================================================
+# MICRO-BENCHMARK DOS BACKENDS DE PARSER
+# Mede páginas/s de cada backend sobre uma pasta de páginas salvas e confere
+# que os registros gerados são idênticos aos do html.parser
+# ================================================================================
+
+import argparse
+import contextlib
+import glob
+import gzip
+import io
+import json
+import os
+import random
+import time
+
+import scraper_sertanejo as scraper
+from extracao_html import analisar_pagina, backends_disponiveis
+
+def gerar_pagina_realista(numero):
+    """Página fictícia com o peso típico de uma página do Letras.mus.br (menus, listas, scripts)."""
+    aleatorio = random.Random(numero)
+    menu = "".join(f'<li><a href="/estilos/estilo-{i}/">Estilo {i}</a></li>' for i in range(80))
+    relacionadas = "".join(
+        f'<li class="songList-item"><a href="/artista-{i}/musica-{i}/"><span>Música {i}</span></a></li>'
+        for i in range(aleatorio.randint(60, 150))
+    )
+    versos = []
+    for estrofe in range(aleatorio.randint(4, 8)):
+        linhas = "<br>".join(
+            f"Eu{'TE' if v % 5 == 0 else ''}Amo demais, coração {numero}.{estrofe}.{v} não esquece"
+            for v in range(aleatorio.randint(3, 6))
+        )
+        versos.append(f"<p>{linhas}</p>")
+    json_ld = [
+        {"@type": "BreadcrumbList", "itemListElement": []},
+        {"@type": "MusicRecording", "name": f"Musica {numero}",
+         "inAlbum": {"@type": "MusicAlbum", "datePublished": f"{aleatorio.randint(1990, 2025)}-01-01"}},
+    ]
+    scripts = "".join(f'<script type="application/ld+json">{json.dumps(d)}</script>' for d in json_ld)
+    artista = "henrique-e-juliano" if numero % 3 == 0 else f"artista-{numero}"
+    classe_titulo = ' class="textStyle-primary"' if numero % 7 else ''
+    return (
+        '<!DOCTYPE html><html lang="pt-br"><head><meta charset="utf-8"><title>Letra</title>'
+        f'{scripts}<script>window.dados = {{"x": [1, 2, 3]}};</script><style>.a{{color:red}}</style>'
+        f'</head><body><header><nav><ul>{menu}</ul></nav></header><main>'
+        f'<div class="head"><h1{classe_titulo}>Musica &amp; Verso {numero}</h1>'
+        f'<h2><a href="/{artista}/">Artista {numero}</a></h2></div>'
+        f'<div class="lyric"><div class="lyric-original">{"".join(versos)}<!-- anúncio --></div></div>'
+        f'<aside><ul>{relacionadas}</ul></aside></main><footer>Letras</footer></body></html>'
+    ).encode("utf-8")
+
+def carregar_paginas(pasta):
+    """Lê todas as páginas .html/.html.gz de uma pasta e subpastas (inclusive um arquivo de páginas)."""
+    paginas = []
+    padroes = [os.path.join(pasta, "**", "*.html"), os.path.join(pasta, "**", "*.html.gz")]
+    for caminho in sorted(c for padrao in padroes for c in glob.glob(padrao, recursive=True)):
+        abrir = gzip.open if caminho.endswith(".gz") else open
+        with abrir(caminho, "rb") as f:
+            paginas.append((os.path.basename(caminho), f.read()))
+    return paginas
+
+def registro_sem_horario(html, nome, backend):
+    with contextlib.redirect_stdout(io.StringIO()):
+        dados, motivo = scraper.extrair_dados_pagina(html, nome, "titulo", "artista", 1, backend=backend)
+    if dados:
+        dados = {k: v for k, v in dados.items() if k != "coletado_em"}
+    return dados, motivo
+
+def main():
+    parser = argparse.ArgumentParser(description="Compara a velocidade dos backends de parser das páginas de letra.")
+    parser.add_argument("--pasta", default="paginas_benchmark",
+                        help="Pasta com páginas .html ou .html.gz salvas (ex.: ../base_de_dados/arquivo_paginas).")
+    parser.add_argument("--gerar", type=int, default=0, help="Gera N páginas fictícias na pasta antes de medir.")
+    parser.add_argument("--repeticoes", type=int, default=3, help="Repetições de cada medição (vale a melhor).")
+    args = parser.parse_args()
+
+    if args.gerar:
+        os.makedirs(args.pasta, exist_ok=True)
+        for i in range(1, args.gerar + 1):
+            with open(os.path.join(args.pasta, f"pagina_{i:05d}.html"), "wb") as f:
+                f.write(gerar_pagina_realista(i))
+
+    paginas = carregar_paginas(args.pasta)
+    if not paginas:
+        print(f"❌ Nenhuma página encontrada em {args.pasta} (use --gerar N)")
+        return
+
+    tamanho_medio = sum(len(h) for _, h in paginas) / len(paginas)
+    print(f"🧪 {len(paginas)} páginas ({tamanho_medio/1024:.0f} KB em média)")
+
+    referencia = [registro_sem_horario(html, nome, "html.parser") for nome, html in paginas]
+    tempo_referencia = None
+
+    for backend in backends_disponiveis():
+        melhor = float("inf")
+        for _ in range(args.repeticoes):
+            inicio = time.perf_counter()
+            for _, html in paginas:
+                analisar_pagina(html, backend)
+            melhor = min(melhor, time.perf_counter() - inicio)
+        if tempo_referencia is None:
+            tempo_referencia = melhor
+
+        divergentes = [
+            nome for (nome, html), esperado in zip(paginas, referencia)
+            if registro_sem_horario(html, nome, backend) != esperado
+        ]
+        status = "✅ registros idênticos" if not divergentes else f"❌ {len(divergentes)} divergentes (ex.: {divergentes[0]})"
+        print(
+            f"   {backend:<12} {len(paginas)/melhor:8.1f} páginas/s "
+            f"({tempo_referencia/melhor:4.1f}x) | {status}"
+        )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+# ================================================================================
+# SESSÃO HTTP COMPARTILHADA E CACHE DE GET CONDICIONAL
+# Reaproveita conexões (keep-alive) e guarda corpo + ETag/Last-Modified por URL
+# ================================================================================
+
+import sqlite3
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+
+def criar_sessao(tamanho_pool=8):
+    """Cria uma sessão requests com pool de conexões do tamanho da concorrência."""
+    sessao = requests.Session()
+    adaptador = HTTPAdapter(pool_connections=4, pool_maxsize=tamanho_pool)
+    sessao.mount('http://', adaptador)
+    sessao.mount('https://', adaptador)
+    sessao.headers.update({'User-Agent': USER_AGENT})
+    return sessao
+
+class CacheHTTP:
+    """Cache persistente em SQLite com o corpo, ETag e Last-Modified de cada URL."""
+
+    def __init__(self, caminho):
+        self.caminho = caminho
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(caminho, check_same_thread=False)
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS respostas (
+                   url TEXT PRIMARY KEY,
+                   corpo BLOB NOT NULL,
+                   etag TEXT,
+                   last_modified TEXT,
+                   atualizado_em REAL NOT NULL
+               )"""
+        )
+        self._conn.commit()
+        # 304 reaproveitados, 200 baixados, requisições sem entrada prévia no cache
+        self.acertos = 0
+        self.baixados = 0
+        self.sem_cache = 0
+        self.bytes_economizados = 0
+
+    def obter(self, url):
+        """Retorna (corpo, etag, last_modified) da URL ou None."""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT corpo, etag, last_modified FROM respostas WHERE url = ?", (url,)
+            ).fetchone()
+
+    def salvar(self, url, corpo, etag, last_modified):
+        """Grava (ou substitui) a resposta de uma URL."""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO respostas VALUES (?, ?, ?, ?, ?)",
+                (url, corpo, etag, last_modified, time.time()),
+            )
+            self._conn.commit()
+
+    def baixar(self, sessao, url, timeout=10):
+        """GET condicional: envia os validadores salvos e reaproveita a resposta 304."""
+        entrada = self.obter(url)
+        headers = {}
+        if entrada:
+            if entrada[1]:
+                headers['If-None-Match'] = entrada[1]
+            if entrada[2]:
+                headers['If-Modified-Since'] = entrada[2]
+
+        response = sessao.get(url, headers=headers, timeout=timeout)
+        if response.status_code == 304 and entrada:
+            with self._lock:
+                self.acertos += 1
+                self.bytes_economizados += len(entrada[0])
+            return entrada[0]
+
+        response.raise_for_status()
+        etag = response.headers.get('ETag')
+        last_modified = response.headers.get('Last-Modified')
+        with self._lock:
+            self.baixados += 1
+            if not entrada:
+                self.sem_cache += 1
+        # Sem validadores não há como fazer GET condicional depois
+        if etag or last_modified:
+            self.salvar(url, response.content, etag, last_modified)
+        return response.content
+
+    def taxa_acerto(self):
+        """Fração das requisições respondidas com 304 a partir do cache."""
+        total = self.acertos + self.baixados
+        return self.acertos / total if total else 0.0
+
+    def resumo(self):
+        """Texto com o aproveitamento do cache na execução."""
+        return (
+            f"🗄️  Cache HTTP: {self.acertos} reaproveitadas (304) | {self.baixados} baixadas "
+            f"({self.sem_cache} novas) | taxa de acerto: {self.taxa_acerto()*100:.1f}% | "
+            f"{self.bytes_economizados/1024/1024:.1f} MB economizados"
+        )
+
+    def fechar(self):
+        with self._lock:
+            self._conn.close()
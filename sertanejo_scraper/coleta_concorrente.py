@@ -0,0 +1,91 @@
+# ================================================================================
+# MOTOR DE COLETA CONCORRENTE
+# Mantém N requisições em voo respeitando um limite de taxa (token bucket) por host
+# ================================================================================
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from urllib.parse import urlsplit
+
+
+class TokenBucket:
+    """Token bucket: libera `taxa` fichas por segundo, acumulando no máximo `capacidade`."""
+
+    def __init__(self, taxa, capacidade=1):
+        if taxa <= 0:
+            raise ValueError("A taxa do token bucket deve ser positiva")
+        self.taxa = float(taxa)
+        self.capacidade = max(1.0, float(capacidade))
+        self.fichas = self.capacidade
+        self.ultimo = time.monotonic()
+        self._lock = threading.Lock()
+
+    def adquirir(self):
+        """Bloqueia até haver uma ficha disponível e retorna o tempo esperado (s)."""
+        esperado = 0.0
+        while True:
+            with self._lock:
+                agora = time.monotonic()
+                self.fichas = min(self.capacidade, self.fichas + (agora - self.ultimo) * self.taxa)
+                self.ultimo = agora
+                if self.fichas >= 1.0:
+                    self.fichas -= 1.0
+                    return esperado
+                espera = (1.0 - self.fichas) / self.taxa
+            time.sleep(espera)
+            esperado += espera
+
+
+class LimitadorPorHost:
+    """Mantém um token bucket independente para cada host acessado."""
+
+    def __init__(self, taxa_por_host=2.0, rajada=2):
+        self.taxa_por_host = taxa_por_host
+        self.rajada = rajada
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def aguardar(self, url):
+        """Espera a vez do host da URL e retorna o tempo esperado (s)."""
+        host = urlsplit(url).netloc.lower()
+        with self._lock:
+            bucket = self._buckets.get(host)
+            if bucket is None:
+                bucket = TokenBucket(self.taxa_por_host, self.rajada)
+                self._buckets[host] = bucket
+        return bucket.adquirir()
+
+
+def executar_em_paralelo(funcao, tarefas, max_em_voo=8):
+    """
+    Executa `funcao(*tarefa)` para cada tarefa mantendo até `max_em_voo` chamadas em andamento.
+    Gera tuplas (indice, tarefa, resultado, erro) na ordem de conclusão.
+    As tarefas são consumidas aos poucos, então a lista de entrada pode ser um gerador.
+    """
+    iterador = iter(enumerate(tarefas))
+    with ThreadPoolExecutor(max_workers=max_em_voo) as executor:
+        pendentes = {}
+
+        def submeter_proxima():
+            try:
+                indice, tarefa = next(iterador)
+            except StopIteration:
+                return False
+            futuro = executor.submit(funcao, *tarefa)
+            pendentes[futuro] = (indice, tarefa)
+            return True
+
+        for _ in range(max_em_voo):
+            if not submeter_proxima():
+                break
+
+        while pendentes:
+            concluidos, _ = wait(pendentes, return_when=FIRST_COMPLETED)
+            for futuro in concluidos:
+                indice, tarefa = pendentes.pop(futuro)
+                try:
+                    yield indice, tarefa, futuro.result(), None
+                except Exception as e:
+                    yield indice, tarefa, None, e
+                submeter_proxima()
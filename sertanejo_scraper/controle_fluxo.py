@@ -0,0 +1,140 @@
+# ================================================================================
+# CONTROLE DE FLUXO DA COLETA
+# Retentativas com backoff exponencial + jitter (respeitando Retry-After),
+# concorrência adaptativa AIMD e disjuntor (circuit breaker) que pausa a coleta
+# ================================================================================
+
+import random
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+# Respostas que valem nova tentativa: limite de taxa e falhas temporárias do servidor
+STATUS_TRANSITORIOS = {408, 425, 429, 500, 502, 503, 504}
+
+def ler_retry_after(valor):
+    """Converte o cabeçalho Retry-After (segundos ou data HTTP) em segundos de espera."""
+    if not valor:
+        return None
+    valor = valor.strip()
+    if valor.isdigit():
+        return float(valor)
+    try:
+        data = parsedate_to_datetime(valor)
+    except (TypeError, ValueError):
+        return None
+    if data.tzinfo is None:
+        data = data.replace(tzinfo=timezone.utc)
+    return max(0.0, (data - datetime.now(timezone.utc)).total_seconds())
+
+def calcular_espera(tentativa, base=1.0, maximo=60.0):
+    """Backoff exponencial com jitter completo: uniforme entre 0 e base * 2^tentativa."""
+    return random.uniform(0, min(maximo, base * (2 ** tentativa)))
+
+class ControladorAIMD:
+    """
+    Limite de requisições simultâneas que cresce de 1 em 1 enquanto a latência e a taxa
+    de erros estão boas e cai pela metade quando pioram (AIMD, como no controle de
+    congestionamento do TCP). Funciona como um semáforo de tamanho variável.
+    """
+
+    def __init__(self, inicial=4, minimo=1, maximo=16, latencia_alvo=3.0, erro_maximo=0.1, janela=10):
+        self.minimo = minimo
+        self.maximo = maximo
+        self.limite = max(minimo, min(maximo, inicial))
+        self.latencia_alvo = latencia_alvo
+        self.erro_maximo = erro_maximo
+        self.janela = janela
+        self.em_andamento = 0
+        self.reducoes = 0
+        self._amostras = deque(maxlen=janela)
+        self._desde_ajuste = 0
+        self._cond = threading.Condition()
+
+    def adquirir(self):
+        with self._cond:
+            while self.em_andamento >= self.limite:
+                self._cond.wait()
+            self.em_andamento += 1
+
+    def liberar(self):
+        with self._cond:
+            self.em_andamento -= 1
+            self._cond.notify_all()
+
+    def registrar(self, latencia, sucesso):
+        """Registra uma requisição concluída e ajusta o limite a cada janela de amostras."""
+        with self._cond:
+            self._amostras.append((latencia, sucesso))
+            self._desde_ajuste += 1
+            # Erro reduz na hora; melhora só aumenta depois de uma janela inteira
+            if not sucesso or self._desde_ajuste >= self.janela:
+                self._ajustar()
+            self._cond.notify_all()
+
+    def _ajustar(self):
+        self._desde_ajuste = 0
+        latencias = [l for l, ok in self._amostras if ok]
+        taxa_erro = sum(1 for _, ok in self._amostras if not ok) / len(self._amostras)
+        latencia_media = sum(latencias) / len(latencias) if latencias else 0.0
+        if taxa_erro > self.erro_maximo or latencia_media > self.latencia_alvo:
+            novo = max(self.minimo, int(self.limite * 0.5))
+            if novo < self.limite:
+                self.reducoes += 1
+            self.limite = novo
+            self._amostras.clear()
+        else:
+            self.limite = min(self.maximo, self.limite + 1)
+
+class DisjuntorCircuito:
+    """
+    Abre depois de `limite_falhas` falhas transitórias seguidas e pausa todas as
+    requisições por `pausa` segundos. Depois da pausa deixa passar requisições de teste:
+    um sucesso fecha o disjuntor, uma falha reabre com pausa dobrada (até `pausa_maxima`).
+    """
+
+    def __init__(self, limite_falhas=5, pausa=30.0, pausa_maxima=600.0):
+        self.limite_falhas = limite_falhas
+        self.pausa_inicial = pausa
+        self.pausa = pausa
+        self.pausa_maxima = pausa_maxima
+        self.falhas_seguidas = 0
+        self.aberto_ate = 0.0
+        self.meio_aberto = False
+        self.aberturas = 0
+        self._lock = threading.Lock()
+
+    def aguardar(self):
+        """Bloqueia enquanto o disjuntor estiver aberto."""
+        while True:
+            with self._lock:
+                restante = self.aberto_ate - time.monotonic()
+                if restante <= 0:
+                    return
+            time.sleep(min(restante, 1.0))
+
+    def registrar_sucesso(self):
+        with self._lock:
+            self.falhas_seguidas = 0
+            if self.meio_aberto:
+                self.meio_aberto = False
+                self.pausa = self.pausa_inicial
+
+    def registrar_falha(self):
+        """Conta uma falha transitória. Retorna True se o disjuntor acabou de abrir."""
+        with self._lock:
+            agora = time.monotonic()
+            if agora < self.aberto_ate:
+                return False
+            self.falhas_seguidas += 1
+            if self.meio_aberto or self.falhas_seguidas >= self.limite_falhas:
+                if self.meio_aberto:
+                    self.pausa = min(self.pausa_maxima, self.pausa * 2)
+                self.aberto_ate = agora + self.pausa
+                self.meio_aberto = True
+                self.falhas_seguidas = 0
+                self.aberturas += 1
+                return True
+            return False
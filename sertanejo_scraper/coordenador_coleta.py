@@ -0,0 +1,91 @@
+# ================================================================================
+# COORDENADOR DA COLETA DISTRIBUÍDA
+# semear: ranking -> fila compartilhada | trabalhar: um trabalhador (rode vários)
+# status: andamento da fila | juntar: diários dos trabalhadores -> um único arquivo
+# ================================================================================
+
+import argparse
+import glob
+import os
+import time
+
+import pandas as pd
+
+import scraper_sertanejo as scraper
+from diario_coleta import CAMPOS_MUSICA, DiarioColeta
+from fila_trabalho import FilaTrabalho
+
+def semear(caminho_fila, limite):
+    """Busca o ranking, resolve as URLs e coloca as músicas na fila."""
+    musicas = scraper.buscar_musicas_mais_acessadas(limite)
+    resolvidas = scraper.resolver_urls(musicas)
+    validas = [(posicao, titulo, artista, url) for posicao, titulo, artista, url, ok in resolvidas if ok]
+    fila = FilaTrabalho(caminho_fila)
+    novas = fila.semear(validas)
+    contagem = fila.contar()
+    fila.fechar()
+    print(f"🌱 {novas} músicas novas na fila ({len(resolvidas) - len(validas)} sem URL real, puladas)")
+    print(f"🗂️  Fila: {contagem}")
+
+def status(caminho_fila):
+    fila = FilaTrabalho(caminho_fila)
+    contagem = fila.contar()
+    fila.fechar()
+    total = sum(contagem.values())
+    feitas = contagem['concluida'] + contagem['falhou']
+    print(f"🗂️  {caminho_fila}: {feitas}/{total} finalizadas ({feitas / total * 100 if total else 0:.1f}%)")
+    for estado, qtd in contagem.items():
+        print(f"   - {estado}: {qtd}")
+
+def juntar(caminho_fila, formato='csv'):
+    """Junta os diários de todos os trabalhadores num único arquivo, sem músicas repetidas."""
+    pasta = os.path.dirname(caminho_fila) or '.'
+    caminhos = sorted(glob.glob(os.path.join(pasta, "diario_trabalhador_*.sqlite")))
+    if not caminhos:
+        print(f"❌ Nenhum diário de trabalhador em {pasta}")
+        return None
+
+    partes = []
+    for caminho in caminhos:
+        diario = DiarioColeta(caminho)
+        partes.append(pd.DataFrame(list(diario.musicas()), columns=CAMPOS_MUSICA))
+        diario.fechar()
+    df = pd.concat(partes, ignore_index=True)
+    repetidas = int(df.duplicated('url').sum())
+    df = df.sort_values('coletado_em').drop_duplicates('url').sort_values('ranking_posicao')
+    df['ano'] = df['ano'].astype('Int64')
+
+    arquivo = os.path.join(pasta, f"sertanejo_distribuido_{time.strftime('%Y%m%d_%H%M%S')}.{formato}")
+    if formato == 'parquet':
+        df.to_parquet(arquivo, index=False)
+    else:
+        df.to_csv(arquivo, index=False, encoding='utf-8')
+    print(f"🧩 {len(caminhos)} diários, {len(df)} músicas ({repetidas} repetidas descartadas)")
+    print(f"💾 Dados salvos em: {arquivo}")
+    return arquivo
+
+def main():
+    parser = argparse.ArgumentParser(description="Coleta distribuída por uma fila SQLite compartilhada.")
+    parser.add_argument("--fila", default=scraper.CAMINHO_FILA, help="Arquivo SQLite da fila (numa pasta compartilhada).")
+    sub = parser.add_subparsers(dest="comando", required=True)
+    p = sub.add_parser("semear", help="Busca o ranking e enche a fila.")
+    p.add_argument("--limite", type=int, default=1000)
+    p = sub.add_parser("trabalhar", help="Roda um trabalhador até a fila esvaziar.")
+    p.add_argument("--nome", default=None, help="Nome do trabalhador (padrão: host-pid).")
+    p.add_argument("--em-voo", type=int, default=scraper.MAX_EM_VOO)
+    sub.add_parser("status", help="Mostra o andamento da fila.")
+    p = sub.add_parser("juntar", help="Junta os diários dos trabalhadores.")
+    p.add_argument("--formato", choices=["csv", "parquet"], default="csv")
+    args = parser.parse_args()
+
+    if args.comando == "semear":
+        semear(args.fila, args.limite)
+    elif args.comando == "trabalhar":
+        scraper.trabalhar_da_fila(args.fila, args.nome, args.em_voo)
+    elif args.comando == "status":
+        status(args.fila)
+    else:
+        juntar(args.fila, args.formato)
+
+if __name__ == "__main__":
+    main()
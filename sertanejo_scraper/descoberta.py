@@ -0,0 +1,293 @@
+# ================================================================================
+# DESCOBERTA DE URLS DE MÚSICAS
+# Sitemaps + páginas de listagem paginadas lidas em paralelo, URLs canônicas,
+# conjunto compacto de URLs vistas e fronteira compacta ordenada pela posição no ranking
+# ================================================================================
+
+import gzip
+import hashlib
+import heapq
+import io
+import re
+import sys
+import xml.etree.ElementTree as ET
+from array import array
+from bisect import bisect_left
+from urllib.parse import unquote, urljoin, urlparse
+
+from bs4 import BeautifulSoup
+
+HOST_CANONICO = "www.letras.mus.br"
+HOSTS_ACEITOS = {"letras.mus.br", "www.letras.mus.br", "m.letras.mus.br"}
+
+# Primeiros segmentos que são seções do site, não artistas
+_SECOES = {
+    'mais-acessadas', 'estilos', 'top100', 'playlists', 'blog', 'busca', 'enviar-letra', 'traducoes',
+    'aulas', 'cifras', 'academy', 'ajuda', 'termos', 'privacidade', 'login', 'home', 'api', 'static',
+}
+# Segundos segmentos que são páginas do artista, não músicas
+_PAGINAS_ARTISTA = {'discografia', 'fotos', 'biografia', 'videos', 'traducao', 'albuns', 'mais-acessadas', 'letras'}
+_RE_SLUG = re.compile(r'^[a-z0-9][a-z0-9-]*$')
+
+def canonicalizar_url(href, base=f"https://{HOST_CANONICO}/"):
+    """
+    URL canônica de uma música (https://www.letras.mus.br/artista/musica/) ou None se o link
+    não aponta para uma música. Remove query, fragmento, barras repetidas e variações de host.
+    """
+    if not href:
+        return None
+    partes = urlparse(urljoin(base, href.strip()))
+    if partes.scheme not in ('http', 'https') or partes.hostname not in HOSTS_ACEITOS:
+        return None
+    segmentos = [unquote(s).lower() for s in partes.path.split('/') if s]
+    if len(segmentos) != 2:
+        return None
+    artista, musica = segmentos
+    if artista in _SECOES or musica in _PAGINAS_ARTISTA or musica.endswith('.html'):
+        return None
+    if not _RE_SLUG.match(artista) or not _RE_SLUG.match(musica) or musica.isdigit():
+        return None
+    return f"https://{HOST_CANONICO}/{artista}/{musica}/"
+
+def _chave(url):
+    return int.from_bytes(hashlib.blake2b(url.encode('utf-8'), digest_size=8).digest(), 'little')
+
+class ConjuntoCompacto:
+    """
+    Conjunto de URLs guardado como hashes de 64 bits num array ordenado (8 bytes por URL,
+    contra ~100+ bytes de uma str num set). Inserções vão para um buffer pequeno que é
+    intercalado no array de tempos em tempos.
+    """
+
+    def __init__(self, tamanho_buffer=4096):
+        self._ordenado = array('Q')
+        self._buffer = set()
+        self._tamanho_buffer = tamanho_buffer
+
+    def __len__(self):
+        return len(self._ordenado) + len(self._buffer)
+
+    def _no_ordenado(self, chave):
+        i = bisect_left(self._ordenado, chave)
+        return i < len(self._ordenado) and self._ordenado[i] == chave
+
+    def __contains__(self, url):
+        chave = _chave(url)
+        return chave in self._buffer or self._no_ordenado(chave)
+
+    def adicionar(self, url):
+        """Adiciona a URL. Retorna False se ela já estava no conjunto."""
+        chave = _chave(url)
+        if chave in self._buffer or self._no_ordenado(chave):
+            return False
+        self._buffer.add(chave)
+        if len(self._buffer) >= self._tamanho_buffer:
+            self._intercalar()
+        return True
+
+    def _intercalar(self):
+        self._ordenado = array('Q', heapq.merge(self._ordenado, sorted(self._buffer)))
+        self._buffer.clear()
+
+    def bytes_usados(self):
+        return self._ordenado.itemsize * len(self._ordenado) + 64 * len(self._buffer)
+
+class FronteiraColeta:
+    """
+    Fila de prioridade de URLs canônicas (menor prioridade sai primeiro), sem repetições.
+    As URLs pendentes não ficam como str: o artista vira um índice numa tabela de nomes e o slug
+    vai para um bytearray contínuo, então cada pendente custa ~20 bytes mais o slug.
+    """
+
+    def __init__(self):
+        self._vistas = ConjuntoCompacto()
+        self._prioridades = array('q')
+        self._artistas = array('I')
+        self._fins_slug = array('I')  # slug i = _slugs[_fins_slug[i-1]:_fins_slug[i]]
+        self._slugs = bytearray()
+        self._retiradas = bytearray()  # 1 para as URLs que já saíram
+        self._nomes_artistas = []
+        self._id_artista = {}
+        self._ordem = None  # índices pendentes do último ao primeiro a sair; refeito se algo entrar
+        self._pendentes = 0
+        self.repetidas = 0
+
+    def __len__(self):
+        return self._pendentes
+
+    def adicionar(self, url, prioridade):
+        """Enfileira a URL se ainda não foi vista. Empates mantêm a ordem de descoberta."""
+        artista, slug = url.rstrip('/').split('/')[-2:]
+        if not self._vistas.adicionar(url):
+            self.repetidas += 1
+            return False
+        if artista not in self._id_artista:
+            self._id_artista[artista] = len(self._nomes_artistas)
+            self._nomes_artistas.append(artista)
+        self._slugs += slug.encode('utf-8')
+        self._fins_slug.append(len(self._slugs))
+        self._artistas.append(self._id_artista[artista])
+        self._prioridades.append(prioridade)
+        self._retiradas.append(0)
+        self._pendentes += 1
+        self._ordem = None
+        return True
+
+    def _url(self, i):
+        inicio = self._fins_slug[i - 1] if i else 0
+        slug = self._slugs[inicio:self._fins_slug[i]].decode('utf-8')
+        return f"https://{HOST_CANONICO}/{self._nomes_artistas[self._artistas[i]]}/{slug}/"
+
+    def retirar(self, quantidade):
+        """Retira até `quantidade` URLs em ordem de prioridade."""
+        if self._ordem is None:
+            # sort estável sobre índices crescentes: empates saem na ordem de descoberta
+            pendentes = sorted((i for i in range(len(self._prioridades)) if not self._retiradas[i]),
+                               key=self._prioridades.__getitem__)
+            self._ordem = array('I', reversed(pendentes))
+        saida = []
+        while self._ordem and len(saida) < quantidade:
+            i = self._ordem.pop()
+            self._retiradas[i] = 1
+            self._pendentes -= 1
+            saida.append(self._url(i))
+        return saida
+
+    def bytes_usados(self):
+        """Memória aproximada da fronteira: conjunto de vistas, pendentes e tabela de artistas."""
+        arrays = (self._prioridades, self._artistas, self._fins_slug, self._ordem or array('I'))
+        return (
+            self._vistas.bytes_usados()
+            + sum(a.itemsize * len(a) for a in arrays)
+            + len(self._slugs) + len(self._retiradas)
+            + sum(sys.getsizeof(nome) for nome in self._nomes_artistas)
+            + sys.getsizeof(self._id_artista) + sys.getsizeof(self._nomes_artistas)
+        )
+
+def links_de_musica(html, url_pagina):
+    """URLs canônicas das músicas de uma página de listagem, na ordem da página."""
+    soup = BeautifulSoup(html, 'html.parser')
+    encontrados = []
+    for link in soup.find_all('a', href=True):
+        url = canonicalizar_url(link['href'], url_pagina)
+        if url:
+            encontrados.append(url)
+    return encontrados
+
+def urls_do_sitemap(conteudo):
+    """Lê um sitemap (XML ou .xml.gz). Retorna (urls_de_paginas, urls_de_sitemaps_filhos)."""
+    if conteudo[:2] == b'\x1f\x8b':
+        conteudo = gzip.decompress(conteudo)
+    locs = []
+    raiz = None
+    # iterparse limpa cada elemento depois de lido: sitemaps de 50 mil URLs não viram uma árvore inteira
+    for evento, elem in ET.iterparse(io.BytesIO(conteudo), events=('start', 'end')):
+        if evento == 'start':
+            if raiz is None:
+                raiz = elem.tag.rsplit('}', 1)[-1]
+            continue
+        if elem.tag.rsplit('}', 1)[-1] == 'loc' and elem.text:
+            locs.append(elem.text.strip())
+        elem.clear()
+    if raiz == 'sitemapindex':
+        return [], locs
+    return locs, []
+
+def sitemaps_do_robots(conteudo):
+    """Linhas 'Sitemap:' de um robots.txt."""
+    texto = conteudo.decode('utf-8', errors='replace') if isinstance(conteudo, bytes) else conteudo
+    return [linha.split(':', 1)[1].strip() for linha in texto.splitlines() if linha.lower().startswith('sitemap:')]
+
+class DescobertaURLs:
+    """
+    Descobre URLs de músicas. `baixar(url)` retorna bytes ou None; `executar(funcao, tarefas)`
+    roda as chamadas em paralelo (executar_em_paralelo do scraper).
+    """
+
+    def __init__(self, baixar, executar):
+        self.baixar = baixar
+        self.executar = executar
+        self.fronteira = FronteiraColeta()
+        self.requisicoes = 0
+        self.artistas = set()
+
+    def _baixar_varias(self, urls):
+        for _, (url,), conteudo, erro in self.executar(self.baixar, [(u,) for u in urls]):
+            self.requisicoes += 1
+            if conteudo is not None and erro is None:
+                yield url, conteudo
+
+    def ler_listagens(self, modelos, paginas=1, prioridade_base=0):
+        """
+        Lê as páginas de listagem em paralelo. `modelos` são URLs com '{pagina}' opcional.
+        Cada rodada baixa a página seguinte de todas as listagens ainda ativas, até `paginas`;
+        uma listagem para na primeira página que falha ou não traz música nova (fim da paginação).
+        A prioridade é a posição do link na listagem: quem aparece primeiro no ranking sai primeiro.
+        Retorna quantas URLs novas entraram na fronteira.
+        """
+        ordem_da_url = {}
+        resultados = {}
+        vistas = {ordem: set() for ordem in range(len(modelos))}
+        ativas = list(range(len(modelos)))
+        for pagina in range(1, paginas + 1):
+            urls = {modelos[ordem].format(pagina=pagina): ordem for ordem in ativas
+                    if pagina == 1 or '{pagina}' in modelos[ordem]}
+            if not urls:
+                break
+            continuam = set()
+            for url, conteudo in self._baixar_varias(list(urls)):
+                ordem = urls[url]
+                links = links_de_musica(conteudo, url)
+                if not set(links) <= vistas[ordem]:
+                    vistas[ordem].update(links)
+                    continuam.add(ordem)
+                ordem_da_url[url] = (ordem, pagina)
+                resultados[url] = links
+            ativas = [ordem for ordem in ativas if ordem in continuam]
+
+        # Insere na ordem listagem -> página -> posição, para a prioridade não depender de quem baixou antes
+        novas = 0
+        posicao = prioridade_base
+        for url in sorted(resultados, key=ordem_da_url.get):
+            for url_musica in resultados[url]:
+                posicao += 1
+                if self.fronteira.adicionar(url_musica, posicao):
+                    novas += 1
+                    self.artistas.add(urlparse(url_musica).path.split('/')[1])
+        return novas
+
+    def ler_sitemaps(self, raizes, somente_artistas=None, max_sitemaps=50, prioridade=10**9):
+        """
+        Percorre sitemaps (e índices de sitemaps) em paralelo, em largura, até `max_sitemaps` arquivos.
+        Com `somente_artistas`, só entram músicas desses artistas. Retorna quantas URLs novas entraram.
+        """
+        novas = 0
+        lidos = 0
+        nivel = list(raizes)
+        while nivel and lidos < max_sitemaps:
+            nivel = nivel[:max_sitemaps - lidos]
+            lidos += len(nivel)
+            proximo = []
+            for _, conteudo in self._baixar_varias(nivel):
+                try:
+                    paginas, filhos = urls_do_sitemap(conteudo)
+                except ET.ParseError:
+                    continue
+                proximo.extend(filhos)
+                for loc in paginas:
+                    url = canonicalizar_url(loc)
+                    if url is None:
+                        continue
+                    if somente_artistas is not None and urlparse(url).path.split('/')[1] not in somente_artistas:
+                        continue
+                    if self.fronteira.adicionar(url, prioridade):
+                        novas += 1
+            nivel = proximo
+        return novas
+
+    def descobrir_sitemaps(self, url_robots=f"https://{HOST_CANONICO}/robots.txt"):
+        """Sitemaps anunciados no robots.txt (ou o /sitemap.xml padrão)."""
+        conteudo = self.baixar(url_robots)
+        self.requisicoes += 1
+        sitemaps = sitemaps_do_robots(conteudo) if conteudo else []
+        return sitemaps or [f"https://{HOST_CANONICO}/sitemap.xml"]
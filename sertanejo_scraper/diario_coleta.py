@@ -0,0 +1,100 @@
+# ================================================================================
+# DIÁRIO DE COLETA (SQLITE, SOMENTE-ANEXAÇÃO)
+# Cada tentativa vira uma linha; cada música coletada com sucesso aparece uma única vez
+# ================================================================================
+
+import sqlite3
+from datetime import datetime
+
+# Campos de uma música coletada, na ordem do CSV final
+CAMPOS_MUSICA = [
+    'ranking_posicao', 'titulo', 'artista', 'titulo_original', 'artista_original',
+    'letra', 'url', 'ano', 'coletado_em', 'contagem_palavras', 'contagem_linhas', 'fonte',
+]
+
+STATUS_OK = 'ok'
+STATUS_FALHA = 'falha'
+
+def esquema_parquet(pa):
+    """Esquema pyarrow das colunas de CAMPOS_MUSICA."""
+    inteiros = {'ranking_posicao', 'ano', 'contagem_palavras', 'contagem_linhas'}
+    return pa.schema([(c, pa.int64() if c in inteiros else pa.string()) for c in CAMPOS_MUSICA])
+
+class DiarioColeta:
+    """Diário transacional das tentativas de coleta, usado para retomar execuções."""
+
+    def __init__(self, caminho):
+        self.caminho = caminho
+        self._conn = sqlite3.connect(caminho)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        with self._conn:
+            self._conn.execute(
+                """CREATE TABLE IF NOT EXISTS diario (
+                       seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                       url TEXT NOT NULL,
+                       status TEXT NOT NULL,
+                       ranking_posicao INTEGER,
+                       titulo TEXT,
+                       artista TEXT,
+                       titulo_original TEXT,
+                       artista_original TEXT,
+                       letra TEXT,
+                       ano INTEGER,
+                       coletado_em TEXT,
+                       contagem_palavras INTEGER,
+                       contagem_linhas INTEGER,
+                       fonte TEXT,
+                       erro TEXT,
+                       registrado_em TEXT NOT NULL
+                   )"""
+            )
+            # Uma música só pode ser registrada com sucesso uma vez
+            self._conn.execute(
+                "CREATE UNIQUE INDEX IF NOT EXISTS diario_url_ok ON diario(url) WHERE status = 'ok'"
+            )
+            for operacao in ('UPDATE', 'DELETE'):
+                self._conn.execute(
+                    f"""CREATE TRIGGER IF NOT EXISTS diario_sem_{operacao.lower()}
+                        BEFORE {operacao} ON diario
+                        BEGIN SELECT RAISE(ABORT, 'diario de coleta e somente-anexacao'); END"""
+                )
+
+    def urls_concluidas(self):
+        """Conjunto das URLs já coletadas com sucesso."""
+        cursor = self._conn.execute("SELECT url FROM diario WHERE status = ?", (STATUS_OK,))
+        return {url for (url,) in cursor}
+
+    def registrar_sucesso(self, dados):
+        """Anexa uma música coletada. Retorna False se a URL já estava concluída."""
+        colunas = CAMPOS_MUSICA + ['status', 'registrado_em']
+        valores = [dados.get(c) for c in CAMPOS_MUSICA] + [STATUS_OK, datetime.now().isoformat()]
+        try:
+            with self._conn:
+                self._conn.execute(
+                    f"INSERT INTO diario ({', '.join(colunas)}) VALUES ({', '.join('?' * len(colunas))})",
+                    valores,
+                )
+            return True
+        except sqlite3.IntegrityError:
+            return False
+
+    def registrar_falha(self, url, ranking_posicao, titulo_original, artista_original, erro):
+        """Anexa uma tentativa que falhou, com o motivo."""
+        with self._conn:
+            self._conn.execute(
+                """INSERT INTO diario (url, status, ranking_posicao, titulo_original, artista_original, erro, registrado_em)
+                   VALUES (?, ?, ?, ?, ?, ?, ?)""",
+                (url, STATUS_FALHA, ranking_posicao, titulo_original, artista_original, erro, datetime.now().isoformat()),
+            )
+
+    def musicas(self):
+        """Gera cada música coletada como dicionário, na ordem do ranking."""
+        cursor = self._conn.execute(
+            f"SELECT {', '.join(CAMPOS_MUSICA)} FROM diario WHERE status = ? ORDER BY ranking_posicao, seq",
+            (STATUS_OK,),
+        )
+        for linha in cursor:
+            yield dict(zip(CAMPOS_MUSICA, linha))
+
+    def fechar(self):
+        self._conn.close()
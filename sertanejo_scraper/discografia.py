@@ -0,0 +1,245 @@
+# ================================================================================
+# RESOLVEDOR DE ANOS PELA DISCOGRAFIA DO ARTISTA
+# Baixa a página de discografia de cada artista uma única vez, guarda em disco
+# o mapa música -> ano e preenche os anos que o JSON-LD da música não trouxe
+# ================================================================================
+
+import argparse
+import json
+import re
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+from urllib.parse import urlparse
+
+from bs4 import BeautifulSoup
+
+from extracao_html import extrair_ano_json_ld
+
+URL_DISCOGRAFIA = "https://www.letras.mus.br/{artista}/discografia/"
+
+_RE_ANO = re.compile(r'\b(19|20)\d{2}\b')
+# Classes dos blocos de álbum onde aparece o ano de lançamento
+_RE_CLASSE_ANO = re.compile(r'header|info|year|ano|date|album', re.IGNORECASE)
+
+def partes_url(url_musica):
+    """Retorna (artista, musica) a partir de uma URL /artista/musica/ do Letras.mus.br."""
+    partes = [p for p in urlparse(url_musica).path.split('/') if p]
+    if len(partes) < 2:
+        return None, None
+    return partes[0], partes[1]
+
+def _classes(elem):
+    classes = []
+    for _ in range(3):
+        if elem is None or not hasattr(elem, 'get'):
+            break
+        classes.extend(elem.get('class') or [])
+        elem = elem.parent
+    return ' '.join(classes)
+
+def extrair_discografia(html, artista):
+    """
+    Monta {slug_da_musica: ano} a partir da página de discografia.
+    Usa o JSON-LD dos álbuns quando existe; senão percorre a página em ordem, associando
+    cada link /artista/musica/ ao último ano visto no cabeçalho de um álbum.
+    Se a música aparece em mais de um álbum vale o ano mais antigo (o lançamento original).
+    """
+    soup = BeautifulSoup(html, 'html.parser')
+    mapa = {}
+
+    def anotar(slug, ano):
+        if slug and ano and (slug not in mapa or ano < mapa[slug]):
+            mapa[slug] = ano
+
+    for script in soup.find_all('script', type='application/ld+json'):
+        try:
+            dados = json.loads(script.string or '')
+        except ValueError:
+            continue
+        if isinstance(dados, dict):
+            dados = dados.get('album') or [dados]
+        for album in dados if isinstance(dados, list) else [dados]:
+            if not isinstance(album, dict):
+                continue
+            ano = extrair_ano_json_ld([json.dumps(album)])
+            faixas = album.get('track', [])
+            if isinstance(faixas, dict):
+                faixas = faixas.get('itemListElement', [faixas])
+            for faixa in faixas if isinstance(faixas, list) else []:
+                faixa = faixa.get('item', faixa) if isinstance(faixa, dict) else {}
+                anotar(partes_url(str(faixa.get('url') or faixa.get('@id') or ''))[1], ano)
+
+    if mapa:
+        return mapa
+
+    prefixo = f"/{artista}/"
+    ano_atual = None
+    for elem in soup.find_all(True):
+        if elem.name == 'a':
+            href = urlparse(elem.get('href', '')).path
+            if href.startswith(prefixo) and ano_atual:
+                artista_link, slug = partes_url(href)
+                if artista_link == artista and slug != 'discografia':
+                    anotar(slug, ano_atual)
+        elif elem.name in ('h2', 'h3', 'span', 'div', 'p', 'time') and _RE_CLASSE_ANO.search(_classes(elem)):
+            # Só o texto do próprio elemento, para não pegar números de títulos de músicas filhas
+            texto = ' '.join(elem.find_all(string=True, recursive=False))
+            if elem.name == 'time':
+                texto = elem.get('datetime', '') + ' ' + texto
+            ano_match = _RE_ANO.search(texto)
+            if ano_match:
+                ano_atual = int(ano_match.group())
+    return mapa
+
+class ResolvedorAnos:
+    """
+    Cache em SQLite artista -> {música: ano}. Cada discografia é baixada no máximo uma vez
+    por `ttl_dias`, mesmo com várias threads pedindo o mesmo artista ao mesmo tempo.
+    Uma falha de download também fica registrada (por `ttl_falha_horas`), para as outras
+    músicas do artista não baixarem a página de novo, nem nesta execução nem na seguinte.
+    `baixar(url)` deve retornar o HTML (bytes) ou None.
+    """
+
+    def __init__(self, caminho, baixar, ttl_dias=90, ttl_falha_horas=6):
+        self.caminho = caminho
+        self.baixar = baixar
+        self.ttl_dias = ttl_dias
+        self.ttl_falha_horas = ttl_falha_horas
+        self._lock = threading.Lock()
+        self._locks_artista = {}
+        # Mapas já resolvidos nesta execução (inclusive os vazios de downloads que falharam)
+        self._mapas = {}
+        self._conn = sqlite3.connect(caminho, check_same_thread=False)
+        with self._conn:
+            self._conn.execute(
+                """CREATE TABLE IF NOT EXISTS discografias (
+                       artista TEXT PRIMARY KEY,
+                       mapa TEXT NOT NULL,
+                       baixado_em TEXT NOT NULL
+                   )"""
+            )
+            self._conn.execute(
+                """CREATE TABLE IF NOT EXISTS falhas_discografia (
+                       artista TEXT PRIMARY KEY,
+                       falhou_em TEXT NOT NULL
+                   )"""
+            )
+        # Músicas sem ano consultadas, anos recuperados, discografias baixadas e vindas do cache
+        self.consultas = 0
+        self.recuperados = 0
+        self.downloads = 0
+        self.falhas_download = 0
+        self.falhas_lembradas = 0
+        self.acertos_cache = 0
+
+    def _lock_do_artista(self, artista):
+        with self._lock:
+            return self._locks_artista.setdefault(artista, threading.Lock())
+
+    def mapa_artista(self, artista):
+        """Mapa {música: ano} do artista: da memória, do disco se ainda válido ou baixando a discografia."""
+        with self._lock_do_artista(artista):
+            if artista in self._mapas:
+                return self._mapas[artista]
+
+            agora = datetime.now()
+            limite = (agora - timedelta(days=self.ttl_dias)).isoformat()
+            limite_falha = (agora - timedelta(hours=self.ttl_falha_horas)).isoformat()
+            with self._lock:
+                linha = self._conn.execute(
+                    "SELECT mapa, baixado_em FROM discografias WHERE artista = ?", (artista,)
+                ).fetchone()
+                falha = self._conn.execute(
+                    "SELECT falhou_em FROM falhas_discografia WHERE artista = ?", (artista,)
+                ).fetchone()
+            anterior = json.loads(linha[0]) if linha else {}
+            if linha and linha[1] >= limite:
+                with self._lock:
+                    self.acertos_cache += 1
+                self._mapas[artista] = anterior
+                return anterior
+            if falha and falha[0] >= limite_falha:
+                # Falhou há pouco tempo (em outra execução): não tenta de novo ainda
+                with self._lock:
+                    self.falhas_lembradas += 1
+                self._mapas[artista] = anterior
+                return anterior
+
+            html = self.baixar(URL_DISCOGRAFIA.format(artista=artista))
+            with self._lock:
+                self.downloads += 1
+                if html is None:
+                    self.falhas_download += 1
+            if html is None:
+                with self._lock, self._conn:
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO falhas_discografia VALUES (?, ?)", (artista, agora.isoformat())
+                    )
+                self._mapas[artista] = anterior
+                return anterior
+
+            mapa = extrair_discografia(html, artista)
+            with self._lock, self._conn:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO discografias VALUES (?, ?, ?)",
+                    (artista, json.dumps(mapa, ensure_ascii=False), datetime.now().isoformat()),
+                )
+                self._conn.execute("DELETE FROM falhas_discografia WHERE artista = ?", (artista,))
+            self._mapas[artista] = mapa
+            return mapa
+
+    def resolver(self, url_musica):
+        """Ano da música pela discografia do artista, ou None."""
+        artista, musica = partes_url(url_musica)
+        with self._lock:
+            self.consultas += 1
+        if not artista:
+            return None
+        ano = self.mapa_artista(artista).get(musica)
+        if ano:
+            with self._lock:
+                self.recuperados += 1
+        return ano
+
+    def resumo(self):
+        """Texto com anos recuperados e requisições economizadas frente a uma consulta por música."""
+        economizadas = max(0, self.consultas - self.downloads)
+        return (
+            f"📅 Discografias: {self.recuperados}/{self.consultas} anos recuperados | "
+            f"{self.downloads} discografias baixadas ({self.falhas_download} falhas), {self.acertos_cache} do cache, "
+            f"{self.falhas_lembradas} falhas recentes não repetidas | "
+            f"{economizadas} requisições economizadas frente a 1 por música"
+        )
+
+    def fechar(self):
+        with self._lock:
+            self._conn.close()
+
+def main():
+    import pandas as pd
+    import scraper_sertanejo as scraper
+
+    parser = argparse.ArgumentParser(description="Preenche os anos ausentes de um CSV de coleta pela discografia dos artistas.")
+    parser.add_argument("csv", help="CSV gerado pelo scraper (colunas url e ano).")
+    parser.add_argument("--saida", default=None, help="CSV de saída (padrão: <csv>_com_anos.csv).")
+    parser.add_argument("--cache", default=scraper.CAMINHO_DISCOGRAFIAS, help="Arquivo SQLite do cache de discografias.")
+    args = parser.parse_args()
+
+    df = pd.read_csv(args.csv, encoding='utf-8')
+    sem_ano = df['ano'].isna()
+    print(f"📅 {sem_ano.sum()} de {len(df)} músicas sem ano ({df.loc[sem_ano, 'url'].map(lambda u: partes_url(u)[0]).nunique()} artistas)")
+
+    resolvedor = ResolvedorAnos(args.cache, scraper.baixar_pagina)
+    df.loc[sem_ano, 'ano'] = [resolvedor.resolver(url) for url in df.loc[sem_ano, 'url']]
+    df['ano'] = df['ano'].astype('Int64')
+
+    saida = args.saida or args.csv.replace('.csv', '_com_anos.csv')
+    df.to_csv(saida, index=False, encoding='utf-8')
+    print(resolvedor.resumo())
+    print(f"   Antes: {len(df) - sem_ano.sum()} com ano | Depois: {df['ano'].notna().sum()} com ano")
+    print(f"💾 Dados salvos em: {saida}")
+    resolvedor.fechar()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,255 @@
+# ================================================================================
+# BACKENDS DE EXTRAÇÃO DAS PÁGINAS DE LETRA
+# Mesmo resultado do BeautifulSoup/html.parser, com parsers em C (lxml, selectolax)
+# que só materializam o título, o link do artista, o container da letra e o JSON-LD
+# ================================================================================
+
+import json
+import re
+
+from bs4 import BeautifulSoup
+from bs4.dammit import UnicodeDammit
+
+# Ordem de tentativa dos seletores da letra (SELETORES ATUALIZADOS)
+SELETORES_LETRA = [
+    '.lyric-original',
+    '[class*="lyric"]',
+    'div.lyric',
+    '.letra'
+]
+
+# Equivalentes XPath dos seletores acima, para o backend lxml
+_XPATH_LETRA = [
+    "//*[contains(concat(' ', normalize-space(@class), ' '), ' lyric-original ')]",
+    "//*[contains(@class, 'lyric')]",
+    "//div[contains(concat(' ', normalize-space(@class), ' '), ' lyric ')]",
+    "//*[contains(concat(' ', normalize-space(@class), ' '), ' letra ')]",
+]
+
+# Tags cujo texto o BeautifulSoup não inclui em get_text()
+_TAGS_SEM_TEXTO = {'script', 'style', 'template'}
+
+_RE_ANO = re.compile(r'\b(19|20)\d{2}\b')
+
+def extrair_ano_json_ld(textos_json_ld):
+    """Extrai o ano da música a partir do conteúdo dos scripts JSON-LD."""
+    for texto in textos_json_ld:
+        try:
+            data = json.loads(texto)
+            if isinstance(data, dict):
+                for campo in ['datePublished', 'releaseDate', 'dateCreated', 'uploadDate']:
+                    if campo in data:
+                        ano_match = _RE_ANO.search(str(data[campo]))
+                        if ano_match:
+                            return int(ano_match.group())
+
+                if data.get('@type') == 'MusicRecording' and 'inAlbum' in data:
+                    album = data['inAlbum']
+                    if isinstance(album, dict) and 'datePublished' in album:
+                        ano_match = _RE_ANO.search(str(album['datePublished']))
+                        if ano_match:
+                            return int(ano_match.group())
+        except:
+            continue
+    return None
+
+def _juntar_texto(partes, strip):
+    if strip:
+        return ''.join(p.strip() for p in partes)
+    return ''.join(partes)
+
+def _pagina(titulo=None, artista_href=None, artista_texto=None, letra_bruta=None, json_ld=()):
+    return {
+        'titulo': titulo,
+        'artista_href': artista_href,
+        'artista_texto': artista_texto,
+        'letra_bruta': letra_bruta,
+        'json_ld': list(json_ld),
+    }
+
+# --------------------------------------------------------------------------------
+# html.parser (referência: árvore completa, comportamento original do scraper)
+# --------------------------------------------------------------------------------
+
+def _analisar_html_parser(html):
+    soup = BeautifulSoup(html, 'html.parser')
+    json_ld = [s.string for s in soup.find_all('script', type='application/ld+json')]
+
+    titulo_elem = soup.find('h1', class_='textStyle-primary')
+    if not titulo_elem:
+        titulo_elem = soup.find('h1')
+    if not titulo_elem:
+        return _pagina(json_ld=json_ld)
+
+    artista_elem = titulo_elem.find_next('a')
+    artista_href = artista_elem.get('href', '') if artista_elem else None
+    artista_texto = artista_elem.get_text(strip=True) if artista_elem else None
+
+    letra_elem = None
+    for seletor in SELETORES_LETRA:
+        letra_elem = soup.select_one(seletor)
+        if letra_elem and len(letra_elem.get_text().strip()) > 100:
+            break
+
+    return _pagina(
+        titulo_elem.get_text(strip=True),
+        artista_href,
+        artista_texto,
+        letra_elem.get_text() if letra_elem else None,
+        json_ld,
+    )
+
+# --------------------------------------------------------------------------------
+# lxml (libxml2) com XPath
+# --------------------------------------------------------------------------------
+
+def _textos_lxml(elem, partes):
+    if not isinstance(elem.tag, str) or elem.tag in _TAGS_SEM_TEXTO:
+        return
+    if elem.text:
+        partes.append(elem.text)
+    for filho in elem:
+        _textos_lxml(filho, partes)
+        if filho.tail:
+            partes.append(filho.tail)
+
+def _texto_lxml(elem, strip=False):
+    partes = []
+    _textos_lxml(elem, partes)
+    return _juntar_texto(partes, strip)
+
+def _analisar_lxml(html):
+    import lxml.html
+
+    raiz = lxml.html.document_fromstring(html)
+    json_ld = [s.text for s in raiz.xpath("//script[@type='application/ld+json']")]
+
+    titulos = raiz.xpath("//h1[contains(concat(' ', normalize-space(@class), ' '), ' textStyle-primary ')]") or raiz.xpath('//h1')
+    if not titulos:
+        return _pagina(json_ld=json_ld)
+    titulo_elem = titulos[0]
+
+    links = titulo_elem.xpath('(descendant::a | following::a)[1]')
+    artista_href = links[0].get('href', '') if links else None
+    artista_texto = _texto_lxml(links[0], strip=True) if links else None
+
+    letra_elem = None
+    for xpath in _XPATH_LETRA:
+        encontrados = raiz.xpath(xpath)
+        letra_elem = encontrados[0] if encontrados else None
+        if letra_elem is not None and len(_texto_lxml(letra_elem).strip()) > 100:
+            break
+
+    return _pagina(
+        _texto_lxml(titulo_elem, strip=True),
+        artista_href,
+        artista_texto,
+        _texto_lxml(letra_elem) if letra_elem is not None else None,
+        json_ld,
+    )
+
+# --------------------------------------------------------------------------------
+# selectolax (Lexbor) com seletores CSS
+# --------------------------------------------------------------------------------
+
+def _textos_lexbor(no, partes):
+    for filho in no.iter(include_text=True):
+        if filho.tag == '-text':
+            partes.append(filho.text_content)
+        elif not filho.tag.startswith('-') and filho.tag not in _TAGS_SEM_TEXTO:
+            _textos_lexbor(filho, partes)
+
+def _texto_lexbor(no, strip=False):
+    partes = []
+    _textos_lexbor(no, partes)
+    return _juntar_texto(partes, strip)
+
+def _proximo_link_lexbor(no):
+    """Equivalente a find_next('a'): primeiro <a> depois de `no` na ordem do documento."""
+    for descendente in no.traverse():
+        if descendente.tag == 'a' and descendente.mem_id != no.mem_id:
+            return descendente
+    atual = no
+    while atual is not None:
+        irmao = atual.next
+        while irmao is not None:
+            for descendente in irmao.traverse():
+                if descendente.tag == 'a':
+                    return descendente
+            irmao = irmao.next
+        atual = atual.parent
+    return None
+
+def _analisar_selectolax(html):
+    from selectolax.lexbor import LexborHTMLParser
+
+    arvore = LexborHTMLParser(html)
+    json_ld = [s.text(deep=True) or None for s in arvore.css('script[type="application/ld+json"]')]
+
+    titulo_elem = arvore.css_first('h1.textStyle-primary')
+    if titulo_elem is None:
+        titulo_elem = arvore.css_first('h1')
+    if titulo_elem is None:
+        return _pagina(json_ld=json_ld)
+
+    artista_elem = _proximo_link_lexbor(titulo_elem)
+    artista_href = (artista_elem.attributes.get('href') or '') if artista_elem is not None else None
+    artista_texto = _texto_lexbor(artista_elem, strip=True) if artista_elem is not None else None
+
+    letra_elem = None
+    for seletor in SELETORES_LETRA:
+        letra_elem = arvore.css_first(seletor)
+        if letra_elem is not None and len(_texto_lexbor(letra_elem).strip()) > 100:
+            break
+
+    return _pagina(
+        _texto_lexbor(titulo_elem, strip=True),
+        artista_href,
+        artista_texto,
+        _texto_lexbor(letra_elem) if letra_elem is not None else None,
+        json_ld,
+    )
+
+BACKENDS = {
+    'html.parser': _analisar_html_parser,
+    'lxml': _analisar_lxml,
+    'selectolax': _analisar_selectolax,
+}
+
+def backends_disponiveis():
+    """Lista os backends cujas dependências estão instaladas."""
+    disponiveis = ['html.parser']
+    for nome, modulo in [('lxml', 'lxml.html'), ('selectolax', 'selectolax.lexbor')]:
+        try:
+            __import__(modulo)
+            disponiveis.append(nome)
+        except ImportError:
+            pass
+    return disponiveis
+
+def escolher_backend(preferencia=('lxml', 'html.parser')):
+    """Primeiro backend da preferência que está instalado."""
+    disponiveis = backends_disponiveis()
+    return next(nome for nome in preferencia if nome in disponiveis)
+
+def analisar_pagina(html, backend='html.parser'):
+    """
+    Extrai os campos brutos de uma página de letra.
+    Retorna um dict com titulo, artista_href, artista_texto, letra_bruta e json_ld
+    (titulo/letra_bruta são None quando não encontrados).
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Backend de parser desconhecido: {backend} (opções: {', '.join(BACKENDS)})")
+    if backend != 'html.parser':
+        if isinstance(html, bytes):
+            html = UnicodeDammit(html, is_html=True).unicode_markup
+        # Os parsers HTML5 normalizam \r e tratam CDATA de outra forma que o html.parser;
+        # nesses casos raros a página usa o backend de referência para manter o resultado idêntico
+        if '\r' in html or '<![CDATA[' in html:
+            backend = 'html.parser'
+        else:
+            try:
+                return BACKENDS[backend](html)
+            except Exception:
+                backend = 'html.parser'
+    return BACKENDS[backend](html)
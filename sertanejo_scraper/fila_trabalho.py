@@ -0,0 +1,158 @@
+# ================================================================================
+# FILA DE TRABALHO COMPARTILHADA (SQLITE COM LEASES)
+# Vários processos (ou máquinas com o mesmo sistema de arquivos) pegam músicas
+# da mesma fila; o lease de um trabalhador que morreu vence e a música volta à fila
+# ================================================================================
+
+import os
+import socket
+import sqlite3
+import threading
+import time
+
+PENDENTE = 'pendente'
+EM_ANDAMENTO = 'em_andamento'
+CONCLUIDA = 'concluida'
+FALHOU = 'falhou'
+
+def nome_trabalhador_padrao():
+    """host-pid, único entre máquinas que compartilham a fila."""
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+class FilaTrabalho:
+    """
+    Fila em SQLite. Usa o journal de rollback (não WAL), que depende só de locks de arquivo
+    e por isso funciona com o banco numa pasta compartilhada entre máquinas.
+    """
+
+    def __init__(self, caminho, duracao_lease=300.0, max_tentativas=3):
+        self.caminho = caminho
+        self.duracao_lease = duracao_lease
+        self.max_tentativas = max_tentativas
+        self._conn = sqlite3.connect(caminho, timeout=60, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=DELETE")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS tarefas (
+                   id INTEGER PRIMARY KEY AUTOINCREMENT,
+                   url TEXT NOT NULL UNIQUE,
+                   ranking_posicao INTEGER,
+                   titulo TEXT,
+                   artista TEXT,
+                   estado TEXT NOT NULL DEFAULT 'pendente',
+                   tentativas INTEGER NOT NULL DEFAULT 0,
+                   trabalhador TEXT,
+                   lease_ate REAL,
+                   erro TEXT
+               )"""
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS tarefas_estado ON tarefas(estado, ranking_posicao)")
+
+    def _transacao(self, funcao):
+        # BEGIN IMMEDIATE pega o lock de escrita antes de ler: dois trabalhadores nunca pegam a mesma tarefa
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            resultado = funcao()
+            self._conn.execute("COMMIT")
+            return resultado
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+
+    def semear(self, musicas):
+        """Insere (posicao, titulo, artista, url) na fila; URLs já presentes são ignoradas. Retorna quantas entraram."""
+        def inserir():
+            antes = self._conn.total_changes
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO tarefas (url, ranking_posicao, titulo, artista) VALUES (?, ?, ?, ?)",
+                [(url, posicao, titulo, artista) for posicao, titulo, artista, url in musicas],
+            )
+            return self._conn.total_changes - antes
+        return self._transacao(inserir)
+
+    def pegar(self, trabalhador, quantidade):
+        """
+        Reserva até `quantidade` tarefas pendentes (ou com lease vencido), na ordem do ranking.
+        Lease vencido sem tentativas restantes vira falha: uma música que derruba o trabalhador
+        (crash, falta de memória, travamento) não é entregue para sempre a trabalhadores novos.
+        Retorna [(id, url, titulo, artista, posicao)].
+        """
+        def reservar():
+            agora = time.time()
+            self._conn.execute(
+                """UPDATE tarefas SET estado = ?, lease_ate = NULL, erro = ?
+                   WHERE estado = ? AND lease_ate < ? AND tentativas >= ?""",
+                (FALHOU, f"lease expirado após {self.max_tentativas} tentativas", EM_ANDAMENTO, agora, self.max_tentativas),
+            )
+            linhas = self._conn.execute(
+                """SELECT id, url, titulo, artista, ranking_posicao FROM tarefas
+                   WHERE estado = ? OR (estado = ? AND lease_ate < ?)
+                   ORDER BY ranking_posicao, id LIMIT ?""",
+                (PENDENTE, EM_ANDAMENTO, agora, quantidade),
+            ).fetchall()
+            self._conn.executemany(
+                "UPDATE tarefas SET estado = ?, trabalhador = ?, lease_ate = ?, tentativas = tentativas + 1 WHERE id = ?",
+                [(EM_ANDAMENTO, trabalhador, agora + self.duracao_lease, linha[0]) for linha in linhas],
+            )
+            return linhas
+        return self._transacao(reservar)
+
+    def renovar(self, trabalhador):
+        """Estende o lease de todas as tarefas em andamento deste trabalhador."""
+        self._transacao(lambda: self._conn.execute(
+            "UPDATE tarefas SET lease_ate = ? WHERE estado = ? AND trabalhador = ?",
+            (time.time() + self.duracao_lease, EM_ANDAMENTO, trabalhador),
+        ))
+
+    def concluir(self, id_tarefa, trabalhador):
+        """Marca a tarefa como concluída (se o lease ainda for deste trabalhador)."""
+        self._transacao(lambda: self._conn.execute(
+            "UPDATE tarefas SET estado = ?, lease_ate = NULL, erro = NULL WHERE id = ? AND trabalhador = ?",
+            (CONCLUIDA, id_tarefa, trabalhador),
+        ))
+
+    def falhar(self, id_tarefa, trabalhador, erro, repetir=True):
+        """Devolve a tarefa à fila ou, sem tentativas restantes (ou repetir=False), marca como falha."""
+        def marcar():
+            tentativas = self._conn.execute("SELECT tentativas FROM tarefas WHERE id = ?", (id_tarefa,)).fetchone()[0]
+            estado = PENDENTE if repetir and tentativas < self.max_tentativas else FALHOU
+            self._conn.execute(
+                "UPDATE tarefas SET estado = ?, lease_ate = NULL, erro = ? WHERE id = ? AND trabalhador = ?",
+                (estado, erro, id_tarefa, trabalhador),
+            )
+        self._transacao(marcar)
+
+    def contar(self):
+        """
+        Quantidade de tarefas por estado; leases vencidos contam como pendentes, ou como falha
+        se já não restam tentativas (pegar() vai marcá-los assim).
+        """
+        contagem = {PENDENTE: 0, EM_ANDAMENTO: 0, CONCLUIDA: 0, FALHOU: 0}
+        for estado, vencido, esgotado, qtd in self._conn.execute(
+            """SELECT estado, estado = ? AND lease_ate < ?, tentativas >= ?, COUNT(*)
+               FROM tarefas GROUP BY 1, 2, 3""",
+            (EM_ANDAMENTO, time.time(), self.max_tentativas),
+        ):
+            if vencido:
+                estado = FALHOU if esgotado else PENDENTE
+            contagem[estado] += qtd
+        return contagem
+
+    def manter_leases(self, trabalhador):
+        """
+        Inicia uma thread que renova os leases do trabalhador a cada terço da duração.
+        Retorna um Event: set() encerra a renovação.
+        """
+        parar = threading.Event()
+
+        def renovar_periodicamente():
+            # Conexão própria: conexões sqlite3 não são compartilhadas entre threads
+            fila = FilaTrabalho(self.caminho, self.duracao_lease, self.max_tentativas)
+            while not parar.wait(self.duracao_lease / 3):
+                fila.renovar(trabalhador)
+            fila.fechar()
+
+        threading.Thread(target=renovar_periodicamente, daemon=True).start()
+        return parar
+
+    def fechar(self):
+        self._conn.close()
@@ -0,0 +1,124 @@
+# ================================================================================
+# GRAVADOR DE REGISTROS EM FLUXO
+# Cada música vai para o disco assim que é coletada (JSONL ou CSV, uma linha por
+# música); só as estatísticas do resumo ficam em memória, em tamanho constante
+# ================================================================================
+
+import csv
+import json
+import os
+from collections import Counter
+
+from diario_coleta import CAMPOS_MUSICA, esquema_parquet
+
+FORMATOS = ('csv', 'jsonl', 'parquet')
+
+class EstatisticasCorpus:
+    """Estatísticas do resumo final acumuladas música a música."""
+
+    def __init__(self):
+        self.total = 0
+        self.total_palavras = 0
+        self.total_linhas = 0
+        self.min_palavras = None
+        self.max_palavras = None
+        self.anos = Counter()
+        self.artistas = Counter()
+
+    def adicionar(self, dados):
+        palavras = dados.get('contagem_palavras') or 0
+        self.total += 1
+        self.total_palavras += palavras
+        self.total_linhas += dados.get('contagem_linhas') or 0
+        self.min_palavras = palavras if self.min_palavras is None else min(self.min_palavras, palavras)
+        self.max_palavras = palavras if self.max_palavras is None else max(self.max_palavras, palavras)
+        if dados.get('ano'):
+            self.anos[int(dados['ano'])] += 1
+        self.artistas[dados.get('artista')] += 1
+
+    def como_dict(self):
+        com_ano = sum(self.anos.values())
+        return {
+            'total_musicas': self.total,
+            'total_palavras': self.total_palavras,
+            'media_palavras': self.total_palavras / self.total if self.total else 0.0,
+            'min_palavras': self.min_palavras,
+            'max_palavras': self.max_palavras,
+            'media_linhas': self.total_linhas / self.total if self.total else 0.0,
+            'musicas_com_ano': com_ano,
+            'musicas_sem_ano': self.total - com_ano,
+            'musicas_por_ano': {str(ano): qtd for ano, qtd in sorted(self.anos.items())},
+            'artistas_distintos': len(self.artistas),
+            'top_artistas': dict(self.artistas.most_common(10)),
+        }
+
+class GravadorRegistros:
+    """
+    Grava as músicas em fluxo, sem acumular a lista inteira.
+    - csv / jsonl: uma linha por música, entregue ao SO a cada `tamanho_buffer` linhas (padrão: toda
+      linha, então um crash do processo não perde nada; o diário SQLite guarda a cópia durável).
+    - parquet: as linhas vão para um JSONL temporário e, em finalizar(), são convertidas em
+      row groups de `tamanho_lote` linhas (o Parquet só é válido depois de fechado).
+    finalizar() grava também <arquivo>.resumo.json com as estatísticas do corpus.
+    """
+
+    def __init__(self, caminho, formato='csv', tamanho_buffer=1, tamanho_lote=5000):
+        if formato not in FORMATOS:
+            raise ValueError(f"Formato '{formato}' inválido, use um de {FORMATOS}")
+        self.caminho = caminho
+        self.formato = formato
+        self.tamanho_buffer = tamanho_buffer
+        self.tamanho_lote = tamanho_lote
+        self.estatisticas = EstatisticasCorpus()
+        self._pendentes = 0
+        self._caminho_fluxo = f"{caminho}.parcial.jsonl" if formato == 'parquet' else caminho
+        novo = not os.path.exists(self._caminho_fluxo) or os.path.getsize(self._caminho_fluxo) == 0
+        self._arquivo = open(self._caminho_fluxo, 'a', encoding='utf-8', newline='')
+        self._escritor_csv = None
+        if formato == 'csv':
+            self._escritor_csv = csv.DictWriter(self._arquivo, fieldnames=CAMPOS_MUSICA, extrasaction='ignore')
+            if novo:
+                self._escritor_csv.writeheader()
+
+    def gravar(self, dados):
+        """Acrescenta uma música ao arquivo."""
+        if self._escritor_csv is not None:
+            self._escritor_csv.writerow(dados)
+        else:
+            self._arquivo.write(json.dumps({c: dados.get(c) for c in CAMPOS_MUSICA}, ensure_ascii=False) + '\n')
+        self.estatisticas.adicionar(dados)
+        self._pendentes += 1
+        if self._pendentes >= self.tamanho_buffer:
+            self._arquivo.flush()
+            self._pendentes = 0
+
+    def finalizar(self):
+        """Fecha o arquivo (convertendo para Parquet se for o caso) e grava o resumo. Retorna o resumo."""
+        self._arquivo.flush()
+        self._arquivo.close()
+        if self.formato == 'parquet':
+            self._converter_para_parquet()
+        resumo = self.estatisticas.como_dict()
+        resumo['arquivo'] = self.caminho
+        with open(f"{self.caminho}.resumo.json", 'w', encoding='utf-8') as f:
+            json.dump(resumo, f, ensure_ascii=False, indent=2)
+        return resumo
+
+    def _converter_para_parquet(self):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError(f"Gravar Parquet requer o pacote 'pyarrow'; as músicas estão em {self._caminho_fluxo}")
+
+        esquema = esquema_parquet(pa)
+        with open(self._caminho_fluxo, encoding='utf-8') as entrada, pq.ParquetWriter(self.caminho, esquema) as escritor:
+            lote = []
+            for linha in entrada:
+                lote.append(json.loads(linha))
+                if len(lote) >= self.tamanho_lote:
+                    escritor.write_table(pa.Table.from_pylist(lote, schema=esquema))
+                    lote = []
+            if lote:
+                escritor.write_table(pa.Table.from_pylist(lote, schema=esquema))
+        os.remove(self._caminho_fluxo)
@@ -0,0 +1,139 @@
+# ================================================================================
+# ÍNDICE DE COLETA INCREMENTAL
+# URL -> hash da letra e data da última verificação, para baixar de novo só as
+# músicas novas no ranking ou mais velhas que o TTL e marcar quais letras mudaram
+# ================================================================================
+
+import csv
+import glob
+import hashlib
+import sqlite3
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+from diario_coleta import CAMPOS_MUSICA
+
+# Resultado de registrar uma música no índice
+NOVA = 'nova'
+ALTERADA = 'alterada'
+INALTERADA = 'inalterada'
+
+def hash_letra(letra):
+    """SHA-256 da letra normalizada (espaços colapsados), em hexadecimal."""
+    texto = ' '.join(str(letra or '').split())
+    return hashlib.sha256(texto.encode('utf-8')).hexdigest()
+
+class IndiceColeta:
+    """
+    Retrato atual do corpus: uma linha por URL com a última versão da letra, o hash dela,
+    quando foi verificada pela última vez e quando a letra mudou.
+    """
+
+    def __init__(self, caminho):
+        self.caminho = caminho
+        self._conn = sqlite3.connect(caminho)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        colunas = ",\n".join(f"{c} {'INTEGER' if c in ('ranking_posicao', 'ano', 'contagem_palavras', 'contagem_linhas') else 'TEXT'}"
+                             for c in CAMPOS_MUSICA if c != 'url')
+        with self._conn:
+            self._conn.execute(
+                f"""CREATE TABLE IF NOT EXISTS indice (
+                        url TEXT PRIMARY KEY,
+                        {colunas},
+                        hash_letra TEXT NOT NULL,
+                        verificado_em TEXT NOT NULL,
+                        alterada_em TEXT
+                    )"""
+            )
+
+    def __len__(self):
+        return self._conn.execute("SELECT COUNT(*) FROM indice").fetchone()[0]
+
+    def importar_csvs(self, padrao):
+        """
+        Carrega no índice as músicas de coletas anteriores (CSVs com url, letra e coletado_em).
+        URLs já indexadas são mantidas. Retorna quantas músicas novas entraram.
+        """
+        novas = 0
+        for arquivo in sorted(glob.glob(padrao)):
+            df = pd.read_csv(arquivo, encoding='utf-8')
+            if not {'url', 'letra'}.issubset(df.columns):
+                continue
+            df = df.dropna(subset=['url', 'letra']).astype(object).where(lambda d: d.notna(), None)
+            for registro in df.to_dict('records'):
+                novas += self._inserir_se_ausente(registro)
+        return novas
+
+    def importar_diario(self, diario):
+        """Carrega no índice as músicas concluídas de um DiarioColeta. Retorna quantas entraram."""
+        return sum(self._inserir_se_ausente(musica) for musica in diario.musicas())
+
+    def _inserir_se_ausente(self, dados):
+        verificado_em = dados.get('coletado_em') or datetime.now().isoformat()
+        ano = dados.get('ano')
+        dados = dict(dados, ano=int(ano) if ano is not None else None)
+        colunas = CAMPOS_MUSICA + ['hash_letra', 'verificado_em']
+        valores = [dados.get(c) for c in CAMPOS_MUSICA] + [hash_letra(dados.get('letra')), verificado_em]
+        with self._conn:
+            cursor = self._conn.execute(
+                f"INSERT OR IGNORE INTO indice ({', '.join(colunas)}) VALUES ({', '.join('?' * len(colunas))})",
+                valores,
+            )
+        return cursor.rowcount
+
+    def selecionar_pendentes(self, urls, ttl_dias):
+        """
+        Das URLs do ranking, retorna as que precisam ser baixadas: novas no índice ou
+        verificadas há mais de `ttl_dias` dias. Retorna (pendentes, novas, vencidas).
+        """
+        limite = (datetime.now() - timedelta(days=ttl_dias)).isoformat()
+        verificadas = dict(self._conn.execute("SELECT url, verificado_em FROM indice"))
+        novas = [u for u in urls if u not in verificadas]
+        vencidas = [u for u in urls if u in verificadas and verificadas[u] < limite]
+        pendentes = set(novas) | set(vencidas)
+        return [u for u in urls if u in pendentes], len(novas), len(vencidas)
+
+    def registrar(self, dados):
+        """Grava a versão recém-baixada de uma música. Retorna NOVA, ALTERADA ou INALTERADA."""
+        agora = datetime.now().isoformat()
+        novo_hash = hash_letra(dados.get('letra'))
+        linha = self._conn.execute("SELECT hash_letra, alterada_em FROM indice WHERE url = ?", (dados['url'],)).fetchone()
+        if linha is None:
+            situacao, alterada_em = NOVA, agora
+        elif linha[0] != novo_hash:
+            situacao, alterada_em = ALTERADA, agora
+        else:
+            situacao, alterada_em = INALTERADA, linha[1]
+        colunas = CAMPOS_MUSICA + ['hash_letra', 'verificado_em', 'alterada_em']
+        valores = [dados.get(c) for c in CAMPOS_MUSICA] + [novo_hash, agora, alterada_em]
+        with self._conn:
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO indice ({', '.join(colunas)}) VALUES ({', '.join('?' * len(colunas))})",
+                valores,
+            )
+        return situacao
+
+    def alteradas_desde(self, momento):
+        """URLs novas ou com letra alterada a partir de `momento` (ISO), para reprocessar só essas."""
+        cursor = self._conn.execute(
+            "SELECT url FROM indice WHERE alterada_em >= ? ORDER BY ranking_posicao", (momento,)
+        )
+        return [url for (url,) in cursor]
+
+    def exportar_csv(self, caminho_saida, somente_urls=None):
+        """Exporta o retrato atual do corpus (ou só as URLs dadas) no formato do CSV de coleta."""
+        cursor = self._conn.execute(f"SELECT {', '.join(CAMPOS_MUSICA)} FROM indice ORDER BY ranking_posicao, url")
+        filtro = set(somente_urls) if somente_urls is not None else None
+        total = 0
+        with open(caminho_saida, 'w', encoding='utf-8', newline='') as f:
+            escritor = csv.writer(f)
+            escritor.writerow(CAMPOS_MUSICA)
+            for linha in cursor:
+                if filtro is None or linha[CAMPOS_MUSICA.index('url')] in filtro:
+                    escritor.writerow(linha)
+                    total += 1
+        return total
+
+    def fechar(self):
+        self._conn.close()
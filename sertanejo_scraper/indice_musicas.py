@@ -0,0 +1,181 @@
+# ================================================================================
+# ÍNDICE LOCAL DE MÚSICAS POR ARTISTA
+# Baixa a página de cada artista uma única vez, guarda os slugs reais das músicas
+# e resolve título/artista do ranking por correspondência aproximada, sem 404s
+# ================================================================================
+
+import json
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+from difflib import SequenceMatcher
+from urllib.parse import urlparse
+
+from bs4 import BeautifulSoup
+
+URL_ARTISTA = "https://www.letras.mus.br/{artista}/"
+URL_MUSICA = "https://www.letras.mus.br/{artista}/{musica}/"
+
+# Segundos segmentos de URL que não são músicas
+_SLUGS_RESERVADOS = {'discografia', 'fotos', 'biografia', 'videos', 'traducao', 'mais-acessadas', 'albuns'}
+
+# Como uma música foi resolvida
+EXATA = 'exata'
+APROXIMADA = 'aproximada'
+NAO_RESOLVIDA = 'nao_resolvida'
+ARTISTA_NAO_ENCONTRADO = 'artista_nao_encontrado'
+SEM_INDICE = 'sem_indice'
+
+def trigramas(texto):
+    """Conjunto de trigramas do texto com bordas, para pré-filtrar candidatos."""
+    texto = f"  {texto} "
+    return {texto[i:i + 3] for i in range(len(texto) - 2)}
+
+def similaridade(a, b):
+    """Similaridade entre 0 e 1 derivada da distância de edição (difflib)."""
+    return SequenceMatcher(None, a, b, autojunk=False).ratio()
+
+def extrair_slugs_artista(html, artista):
+    """Slugs das músicas linkadas na página do artista (/artista/musica/)."""
+    soup = BeautifulSoup(html, 'html.parser')
+    slugs = []
+    vistos = set()
+    for link in soup.find_all('a', href=True):
+        partes = [p for p in urlparse(link['href']).path.split('/') if p]
+        if len(partes) == 2 and partes[0] == artista and partes[1] not in _SLUGS_RESERVADOS and partes[1] not in vistos:
+            vistos.add(partes[1])
+            slugs.append(partes[1])
+    return slugs
+
+class IndiceMusicas:
+    """
+    Cache em SQLite artista -> slugs reais das músicas. `baixar(url)` retorna (html, motivo_da_falha).
+    `normalizar(texto)` transforma título/artista em slug (normalizar_nome_url do scraper).
+    """
+
+    def __init__(self, caminho, baixar, normalizar, ttl_dias=30, similaridade_minima=0.8):
+        self.caminho = caminho
+        self.baixar = baixar
+        self.normalizar = normalizar
+        self.ttl_dias = ttl_dias
+        self.similaridade_minima = similaridade_minima
+        self._lock = threading.Lock()
+        self._locks_artista = {}
+        self._memoria = {}
+        self._resolvidas = {}
+        self._conn = sqlite3.connect(caminho, check_same_thread=False)
+        with self._conn:
+            self._conn.execute(
+                """CREATE TABLE IF NOT EXISTS artistas (
+                       artista TEXT PRIMARY KEY,
+                       slugs TEXT,
+                       baixado_em TEXT NOT NULL
+                   )"""
+            )
+        self.contagem = {EXATA: 0, APROXIMADA: 0, NAO_RESOLVIDA: 0, ARTISTA_NAO_ENCONTRADO: 0, SEM_INDICE: 0}
+        self.paginas_baixadas = 0
+
+    def slugs_artista(self, artista):
+        """
+        Slugs das músicas do artista (do disco ou baixando a página dele uma vez).
+        Retorna None se a página do artista não existe e [] se não deu para montar o índice.
+        """
+        with self._lock:
+            if artista in self._memoria:
+                return self._memoria[artista]
+            lock_artista = self._locks_artista.setdefault(artista, threading.Lock())
+
+        with lock_artista:
+            with self._lock:
+                if artista in self._memoria:
+                    return self._memoria[artista]
+                linha = self._conn.execute(
+                    "SELECT slugs, baixado_em FROM artistas WHERE artista = ?", (artista,)
+                ).fetchone()
+            limite = (datetime.now() - timedelta(days=self.ttl_dias)).isoformat()
+            if linha and linha[1] >= limite:
+                slugs = json.loads(linha[0]) if linha[0] is not None else None
+            else:
+                html, motivo = self.baixar(URL_ARTISTA.format(artista=artista))
+                with self._lock:
+                    self.paginas_baixadas += 1
+                if html is not None:
+                    slugs = extrair_slugs_artista(html, artista)
+                elif motivo and motivo.startswith(('HTTP 404', 'HTTP 410')):
+                    slugs = None
+                else:
+                    # Falha de rede: sem índice nesta execução, tenta de novo na próxima
+                    slugs = []
+                if html is not None or slugs is None:
+                    with self._lock, self._conn:
+                        self._conn.execute(
+                            "INSERT OR REPLACE INTO artistas VALUES (?, ?, ?)",
+                            (artista, json.dumps(slugs) if slugs is not None else None, datetime.now().isoformat()),
+                        )
+            with self._lock:
+                self._memoria[artista] = slugs
+            return slugs
+
+    def preparar(self, artistas, executar):
+        """Carrega o índice de vários artistas de uma vez; `executar(funcao, tarefas)` roda em paralelo."""
+        for _ in executar(self.slugs_artista, [(a,) for a in sorted(set(artistas))]):
+            pass
+
+    def resolver(self, titulo, artista):
+        """Retorna (url, como) com a URL real da música, ou (None, motivo) se não der para resolver."""
+        with self._lock:
+            if (titulo, artista) in self._resolvidas:
+                return self._resolvidas[(titulo, artista)]
+        artista_slug = self.normalizar(artista)
+        titulo_slug = self.normalizar(titulo)
+        slugs = self.slugs_artista(artista_slug)
+
+        if slugs is None:
+            como, url = ARTISTA_NAO_ENCONTRADO, None
+        elif not slugs:
+            # Página do artista sem links reconhecíveis: mantém a URL construída
+            como, url = SEM_INDICE, URL_MUSICA.format(artista=artista_slug, musica=titulo_slug)
+        elif titulo_slug in slugs:
+            como, url = EXATA, URL_MUSICA.format(artista=artista_slug, musica=titulo_slug)
+        else:
+            melhor = self._mais_parecido(titulo_slug, slugs)
+            if melhor:
+                como, url = APROXIMADA, URL_MUSICA.format(artista=artista_slug, musica=melhor)
+            else:
+                como, url = NAO_RESOLVIDA, None
+
+        with self._lock:
+            if (titulo, artista) not in self._resolvidas:
+                self.contagem[como] += 1
+                self._resolvidas[(titulo, artista)] = (url, como)
+        return url, como
+
+    def _mais_parecido(self, titulo_slug, slugs):
+        # Trigramas escolhem poucos candidatos; a distância de edição decide entre eles
+        alvo = trigramas(titulo_slug)
+        candidatos = sorted(slugs, key=lambda s: len(alvo & trigramas(s)) / len(alvo | trigramas(s)), reverse=True)[:10]
+        pontuados = [(similaridade(titulo_slug, s), s) for s in candidatos]
+        if not pontuados:
+            return None
+        nota, melhor = max(pontuados)
+        return melhor if nota >= self.similaridade_minima else None
+
+    def requisicoes_evitadas(self):
+        """Requisições a URLs erradas evitadas menos as páginas de artista baixadas."""
+        evitadas = self.contagem[APROXIMADA] + self.contagem[NAO_RESOLVIDA] + self.contagem[ARTISTA_NAO_ENCONTRADO]
+        return evitadas, evitadas - self.paginas_baixadas
+
+    def resumo(self):
+        """Texto com como as músicas foram resolvidas e as requisições desperdiçadas evitadas."""
+        evitadas, liquido = self.requisicoes_evitadas()
+        c = self.contagem
+        return (
+            f"🔎 Índice de músicas: {c[EXATA]} exatas, {c[APROXIMADA]} corrigidas por aproximação, "
+            f"{c[NAO_RESOLVIDA] + c[ARTISTA_NAO_ENCONTRADO]} não resolvidas (puladas sem requisição), "
+            f"{c[SEM_INDICE]} sem índice | {self.paginas_baixadas} páginas de artista baixadas | "
+            f"{evitadas} requisições a URLs erradas evitadas (saldo: {liquido:+d})"
+        )
+
+    def fechar(self):
+        with self._lock:
+            self._conn.close()
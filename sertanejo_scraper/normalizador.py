@@ -0,0 +1,48 @@
+# ================================================================================
+# NORMALIZADOR DE LETRAS
+# Versão de passada única da limpeza feita por limpar_letra, com padrões pré-compilados
+# ================================================================================
+
+import re
+
+import pandas as pd
+
+MINUSCULAS = 'a-záéíóúçãõâêôà'
+MAIUSCULAS = 'A-ZÁÉÍÓÚÇÃÕÂÊÔÀ'
+
+# As regras de separação da limpeza original só inserem um espaço entre dois caracteres,
+# nunca removem nada, e os pontos onde cada regra atua não se sobrepõem. Por isso todas
+# cabem num único regex de largura zero, aplicado numa só varredura:
+#   - minúscula seguida de maiúscula ("amorSaudade" -> "amor Saudade"), regras 1 e 4
+#   - sigla/número seguido de palavra capitalizada ("IPVAQuem" -> "IPVA Quem"), regras 2 e 3
+#   - pontuação seguida de maiúscula ("fim.Começo" -> "fim. Começo"), regra 5
+_RE_FRONTEIRAS = re.compile(
+    rf'(?<=[{MINUSCULAS}])(?=[{MAIUSCULAS}])'
+    rf'|(?<=[0-9{MAIUSCULAS}]{{2}})(?=[{MAIUSCULAS}][{MINUSCULAS}])'
+    rf'|(?<=[.!?;:])(?=[{MAIUSCULAS}])'
+)
+
+def normalizar_letra(letra_bruta):
+    """Separa palavras grudadas e colapsa espaços e quebras de linha (igual a limpar_letra)."""
+    if not letra_bruta:
+        return ""
+    # Remover linhas vazias, espaços nas pontas e espaços duplicados equivale a
+    # juntar as palavras com um único espaço
+    return ' '.join(_RE_FRONTEIRAS.sub(' ', letra_bruta).split())
+
+def normalizar_lote(letras):
+    """
+    Normaliza várias letras de uma vez.
+    Aceita uma pandas Series (retorna Series com o mesmo índice) ou uma lista de strings.
+    Valores ausentes (NaN/None) viram string vazia.
+    """
+    separar = _RE_FRONTEIRAS.sub
+    if isinstance(letras, pd.Series):
+        valores = letras.where(letras.notna(), '')
+        return pd.Series(
+            [' '.join(separar(' ', t).split()) if t else "" for t in valores],
+            index=letras.index,
+            name=letras.name,
+            dtype=object,
+        )
+    return [' '.join(separar(' ', t).split()) if t else "" for t in letras]
@@ -0,0 +1,193 @@
+# ================================================================================
+# PIPELINE DE COLETA EM ESTÁGIOS
+# baixar (threads, I/O) -> analisar (pool de processos, CPU) -> gravar (quem consome)
+# Filas limitadas entre os estágios dão contrapressão e mantêm a memória constante
+# ================================================================================
+
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+
+_FIM = object()
+
+class EstatisticaEstagio:
+    """Contadores de um estágio: itens processados e tempo ocupado."""
+
+    def __init__(self, nome):
+        self.nome = nome
+        self.processados = 0
+        self.tempo_ocupado = 0.0
+        self._lock = threading.Lock()
+
+    def registrar(self, duracao):
+        with self._lock:
+            self.processados += 1
+            self.tempo_ocupado += duracao
+
+    def vazao(self, decorrido):
+        return self.processados / decorrido if decorrido > 0 else 0.0
+
+def executar_pipeline(tarefas, baixar, analisar, n_baixadores=8, n_analisadores=None,
+                      tamanho_fila=32, intervalo_relatorio=30.0, completar=None):
+    """
+    Executa cada tarefa em três estágios e gera (indice, tarefa, resultado, erro) na ordem de conclusão.
+
+    - baixar(*tarefa) roda em `n_baixadores` threads e retorna (conteudo, resultado_se_falhar);
+      quando conteudo é None o resultado de falha segue direto para a saída.
+    - analisar(conteudo, *tarefa) roda num pool de `n_analisadores` processos e deve ser
+      uma função de módulo (picklable).
+    - completar(resultado), se dado, roda em threads sobre cada resultado da análise e devolve o
+      resultado final; serve para trabalho de I/O que depende do parsing sem travar o gravador.
+    - O estágio de gravação é o próprio laço de quem consome este gerador.
+
+    A cada `intervalo_relatorio` segundos imprime a profundidade das filas e a vazão de cada estágio.
+    """
+    n_analisadores = n_analisadores or os.cpu_count() or 1
+    fila_tarefas = queue.Queue(maxsize=tamanho_fila)
+    fila_paginas = queue.Queue(maxsize=tamanho_fila)
+    fila_saida = queue.Queue(maxsize=tamanho_fila)
+    estatisticas = {nome: EstatisticaEstagio(nome) for nome in ('baixar', 'analisar', 'gravar')}
+    parar = threading.Event()
+    inicio = time.monotonic()
+
+    def colocar(fila, item):
+        """put que desiste se o pipeline for interrompido."""
+        while not parar.is_set():
+            try:
+                fila.put(item, timeout=0.5)
+                return
+            except queue.Full:
+                continue
+
+    def retirar(fila):
+        """get que devolve o marcador de fim se o pipeline for interrompido."""
+        while not parar.is_set():
+            try:
+                return fila.get(timeout=0.5)
+            except queue.Empty:
+                continue
+        return _FIM
+
+    def alimentar():
+        for item in enumerate(tarefas):
+            if parar.is_set():
+                break
+            colocar(fila_tarefas, item)
+        for _ in range(n_baixadores):
+            colocar(fila_tarefas, _FIM)
+
+    def baixador():
+        while True:
+            item = retirar(fila_tarefas)
+            if item is _FIM:
+                colocar(fila_paginas, _FIM)
+                return
+            indice, tarefa = item
+            t0 = time.monotonic()
+            try:
+                conteudo, falha = baixar(*tarefa)
+            except Exception as e:
+                colocar(fila_saida, (indice, tarefa, None, e))
+                continue
+            finally:
+                estatisticas['baixar'].registrar(time.monotonic() - t0)
+            if conteudo is None:
+                colocar(fila_saida, (indice, tarefa, falha, None))
+            else:
+                colocar(fila_paginas, (indice, tarefa, conteudo))
+
+    vagas_complemento = threading.BoundedSemaphore(tamanho_fila)
+
+    def complementar(indice, tarefa, resultado):
+        try:
+            colocar(fila_saida, (indice, tarefa, completar(resultado), None))
+        except Exception as e:
+            colocar(fila_saida, (indice, tarefa, None, e))
+        finally:
+            vagas_complemento.release()
+
+    def entregar(complemento, indice, tarefa, futuro):
+        try:
+            resultado = futuro.result()
+        except Exception as e:
+            colocar(fila_saida, (indice, tarefa, None, e))
+            return
+        if complemento is None:
+            colocar(fila_saida, (indice, tarefa, resultado, None))
+            return
+        # Limita os resultados esperando o complemento, como as filas limitam os outros estágios
+        while not vagas_complemento.acquire(timeout=0.5):
+            if parar.is_set():
+                return
+        complemento.submit(complementar, indice, tarefa, resultado)
+
+    def despachante(executor, complemento):
+        # Mantém no máximo 2 páginas por processo em análise; o resto espera na fila limitada
+        em_analise = {}
+        fins = 0
+        while fins < n_baixadores or em_analise:
+            if fins < n_baixadores and len(em_analise) < 2 * n_analisadores:
+                try:
+                    item = fila_paginas.get(timeout=0.05 if em_analise else 0.5)
+                except queue.Empty:
+                    item = None
+                if item is _FIM:
+                    fins += 1
+                elif item is not None:
+                    indice, tarefa, conteudo = item
+                    futuro = executor.submit(analisar, conteudo, *tarefa)
+                    em_analise[futuro] = (indice, tarefa, time.monotonic())
+                    continue
+            if not em_analise:
+                continue
+            prontos, _ = wait(em_analise, timeout=0.05, return_when=FIRST_COMPLETED)
+            for futuro in prontos:
+                indice, tarefa, t0 = em_analise.pop(futuro)
+                estatisticas['analisar'].registrar(time.monotonic() - t0)
+                entregar(complemento, indice, tarefa, futuro)
+        if complemento is not None:
+            complemento.shutdown(wait=True)
+        colocar(fila_saida, _FIM)
+
+    def relatorio():
+        while not parar.wait(intervalo_relatorio):
+            print(f"\n{resumo_pipeline()}")
+
+    def resumo_pipeline():
+        decorrido = time.monotonic() - inicio
+        return (
+            f"🏭 Filas: tarefas={fila_tarefas.qsize()} páginas={fila_paginas.qsize()} resultados={fila_saida.qsize()} | "
+            + " | ".join(f"{e.nome} {e.vazao(decorrido):.1f}/s" for e in estatisticas.values())
+        )
+
+    # 'spawn' evita fork de um processo com threads ativas e funciona igual no Windows
+    executor = ProcessPoolExecutor(max_workers=n_analisadores, mp_context=multiprocessing.get_context('spawn'))
+    complemento = ThreadPoolExecutor(max_workers=n_baixadores) if completar is not None else None
+    threads = [threading.Thread(target=alimentar, daemon=True)]
+    threads += [threading.Thread(target=baixador, daemon=True) for _ in range(n_baixadores)]
+    threads += [threading.Thread(target=despachante, args=(executor, complemento), daemon=True)]
+    threads += [threading.Thread(target=relatorio, daemon=True)]
+    for t in threads:
+        t.start()
+
+    try:
+        while True:
+            item = fila_saida.get()
+            if item is _FIM:
+                break
+            t0 = time.monotonic()
+            yield item
+            estatisticas['gravar'].registrar(time.monotonic() - t0)
+    finally:
+        parar.set()
+        executor.shutdown(wait=True, cancel_futures=True)
+        if complemento is not None:
+            complemento.shutdown(wait=False, cancel_futures=True)
+        decorrido = time.monotonic() - inicio
+        print(f"\n🏭 PIPELINE: {decorrido:.1f}s")
+        for e in estatisticas.values():
+            ocupacao = e.tempo_ocupado / decorrido if decorrido > 0 else 0.0
+            print(f"   {e.nome:<9} {e.processados:6d} itens | {e.vazao(decorrido):6.1f}/s | tempo ocupado somado: {e.tempo_ocupado:.1f}s ({ocupacao:.1f}x o tempo total)")
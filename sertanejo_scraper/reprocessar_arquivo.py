@@ -0,0 +1,90 @@
+# ================================================================================
+# REPROCESSAMENTO OFFLINE DO ARQUIVO DE PÁGINAS
+# Reexecuta a extração (seletores + limpar_letra) sobre as páginas arquivadas,
+# em paralelo em todos os núcleos e sem nenhum acesso à rede
+# ================================================================================
+
+import argparse
+import contextlib
+import csv
+import io
+import os
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+from arquivo_paginas import ArquivoPaginas
+from diario_coleta import CAMPOS_MUSICA
+
+def _reprocessar_lote(pasta, capturas, backend):
+    """Roda num processo do pool: extrai um lote de capturas. Retorna [(dados, motivo, url)]."""
+    # Importado aqui para o processo pai não precisar do scraper só para listar o arquivo
+    import scraper_sertanejo as scraper
+
+    arquivo = ArquivoPaginas(pasta)
+    resultados = []
+    # As mensagens por música do scraper não interessam no reprocessamento em massa
+    with contextlib.redirect_stdout(io.StringIO()):
+        for sha256, url, titulo, artista, posicao, baixado_em in capturas:
+            html = arquivo.ler(sha256)
+            dados, motivo = scraper.extrair_dados_pagina(html, url, titulo, artista, posicao, backend=backend)
+            if dados:
+                # A data da coleta é a do download arquivado, não a do reprocessamento
+                dados['coletado_em'] = baixado_em
+            resultados.append((dados, motivo, url))
+    arquivo.fechar()
+    return resultados
+
+def reprocessar(pasta, processos=None, backend=None, tamanho_lote=50, todas_capturas=False):
+    """Reextrai todas as páginas do arquivo. Retorna (musicas, falhas) na ordem do ranking."""
+    arquivo = ArquivoPaginas(pasta)
+    capturas = arquivo.capturas(somente_recentes=not todas_capturas)
+    arquivo.fechar()
+
+    lotes = [capturas[i:i + tamanho_lote] for i in range(0, len(capturas), tamanho_lote)]
+    musicas, falhas = [], []
+    with ProcessPoolExecutor(max_workers=processos or os.cpu_count()) as executor:
+        for resultados in executor.map(_reprocessar_lote, [pasta] * len(lotes), lotes, [backend] * len(lotes)):
+            for dados, motivo, url in resultados:
+                if dados:
+                    musicas.append(dados)
+                else:
+                    falhas.append((url, motivo))
+    return musicas, falhas
+
+def main():
+    parser = argparse.ArgumentParser(description="Reextrai as letras do arquivo de páginas, sem acessar o site.")
+    parser.add_argument("--arquivo", default="../base_de_dados/arquivo_paginas", help="Pasta do arquivo de páginas.")
+    parser.add_argument("--saida", default=None, help="CSV de saída (padrão: base_de_dados/sertanejo_reprocessado_<data>.csv).")
+    parser.add_argument("--processos", type=int, default=None, help="Processos em paralelo (padrão: todos os núcleos).")
+    parser.add_argument("--backend", default=None, help="Backend de parser (html.parser, lxml, selectolax).")
+    parser.add_argument("--todas-capturas", action="store_true", help="Reprocessa todas as capturas, não só a última de cada URL.")
+    args = parser.parse_args()
+
+    if not os.path.exists(os.path.join(args.arquivo, "manifesto.sqlite")):
+        print(f"❌ Arquivo de páginas não encontrado em {args.arquivo}")
+        return
+
+    arquivo = ArquivoPaginas(args.arquivo)
+    print(arquivo.resumo())
+    arquivo.fechar()
+
+    inicio = time.perf_counter()
+    musicas, falhas = reprocessar(args.arquivo, args.processos, args.backend, todas_capturas=args.todas_capturas)
+    decorrido = time.perf_counter() - inicio
+    total = len(musicas) + len(falhas)
+
+    saida = args.saida or f"../base_de_dados/sertanejo_reprocessado_{time.strftime('%Y%m%d_%H%M%S')}.csv"
+    with open(saida, "w", encoding="utf-8", newline="") as f:
+        escritor = csv.DictWriter(f, fieldnames=CAMPOS_MUSICA)
+        escritor.writeheader()
+        escritor.writerows(musicas)
+
+    print(f"⚡ {total} páginas reprocessadas em {decorrido:.1f}s ({total/decorrido if decorrido else 0:.0f} páginas/s)")
+    print(f"   ✅ Sucessos: {len(musicas)} | ❌ Falhas: {len(falhas)}")
+    for motivo, qtd in Counter(m.split(':')[0] for _, m in falhas).most_common():
+        print(f"      - {motivo}: {qtd}")
+    print(f"💾 Dados salvos em: {saida}")
+
+if __name__ == "__main__":
+    main()
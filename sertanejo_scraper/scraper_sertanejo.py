@@ -5,141 +5,303 @@
 
 import requests
 from bs4 import BeautifulSoup
-import pandas as pd
 import time
-import random
 import re
-import json
+import threading
+import os
 from datetime import datetime
 from urllib.parse import urljoin, quote
 import unidecode
 
-def fazer_request(url):
-    """Faz uma requisição HTTP e retorna o soup."""
+from arquivo_paginas import ArquivoPaginas
+from cache_http import CacheHTTP, criar_sessao
+from coleta_concorrente import LimitadorPorHost, executar_em_paralelo
+from controle_fluxo import (
+    STATUS_TRANSITORIOS, ControladorAIMD, DisjuntorCircuito, calcular_espera, ler_retry_after
+)
+from descoberta import DescobertaURLs
+from diario_coleta import DiarioColeta
+from discografia import ResolvedorAnos
+from extracao_html import analisar_pagina, escolher_backend, extrair_ano_json_ld
+from fila_trabalho import EM_ANDAMENTO, FilaTrabalho, nome_trabalhador_padrao
+from gravador_registros import EstatisticasCorpus, GravadorRegistros
+from indice_coleta import ALTERADA, NOVA, IndiceColeta
+from indice_musicas import IndiceMusicas
+from normalizador import normalizar_letra
+from pipeline_coleta import executar_pipeline
+from telemetria import Telemetria, classificar_motivo
+
+# Orçamento de polidez: requisições por segundo permitidas para cada host
+TAXA_POR_HOST = 2.0
+RAJADA_POR_HOST = 2
+# Quantidade de músicas sendo baixadas ao mesmo tempo
+MAX_EM_VOO = 8
+# Processos dedicados ao parsing + limpeza das letras (0 = parsing nas threads de download).
+# Opcional: no limite de TAXA_POR_HOST o parsing ocupa uma fração de um núcleo e o pool só soma o custo de
+# subir os processos; vale ligar só com um limite de taxa bem mais alto (ex.: servidor local, benchmark)
+PROCESSOS_PARSER = 0
+
+LIMITADOR_HOST = LimitadorPorHost(TAXA_POR_HOST, RAJADA_POR_HOST)
+
+# Retentativas com backoff exponencial + jitter (ou o Retry-After do servidor)
+MAX_TENTATIVAS = 4
+ESPERA_BASE = 1.0
+ESPERA_MAXIMA = 120.0
+# Concorrência efetiva ajustada sozinha entre 1 e MAX_EM_VOO; disjuntor pausa a coleta se o host bloquear
+CONTROLE_AIMD = ControladorAIMD(inicial=MAX_EM_VOO // 2, maximo=MAX_EM_VOO)
+DISJUNTOR = DisjuntorCircuito(limite_falhas=5, pausa=30.0)
+ESTATISTICAS_REDE = {'retentativas': 0, 'desistencias': 0}
+_lock_estatisticas_rede = threading.Lock()
+
+# Latências por etapa, esperas, bytes e resultados; exportados em CAMINHO_METRICAS.prom/.json
+TELEMETRIA = Telemetria()
+CAMINHO_METRICAS = "../base_de_dados/metricas_coleta"
+
+# Sessão com keep-alive compartilhada por todas as threads e cache de GET condicional
+CAMINHO_CACHE_HTTP = "../base_de_dados/cache_http.sqlite"
+SESSAO = criar_sessao(MAX_EM_VOO)
+_cache_http = None
+_lock_cache_http = threading.Lock()
+
+# Arquivo das páginas brutas, para reextrair offline com reprocessar_arquivo.py (None desativa)
+CAMINHO_ARQUIVO_PAGINAS = "../base_de_dados/arquivo_paginas"
+_arquivo_paginas = None
+
+# Anos ausentes no JSON-LD vêm da discografia do artista (uma requisição por artista, cache em disco)
+RESOLVER_ANOS = True
+CAMINHO_DISCOGRAFIAS = "../base_de_dados/discografias.sqlite"
+_resolvedor_anos = None
+
+# Slugs reais das músicas de cada artista (uma requisição por artista): evita montar URLs que dão 404
+RESOLVER_SLUGS = True
+CAMINHO_INDICE_MUSICAS = "../base_de_dados/indice_musicas.sqlite"
+_indice_musicas = None
+
+# Fila compartilhada da coleta distribuída (coordenador_coleta.py); os diários dos trabalhadores ficam ao lado
+CAMINHO_FILA = "../base_de_dados/fila_coleta.sqlite"
+
+# Descoberta de URLs: listagens do estilo ({pagina} marca a paginação) e, se faltar, sitemaps do site
+LISTAGENS_SERTANEJO = [
+    "https://www.letras.mus.br/mais-acessadas/sertanejo/",
+    "https://www.letras.mus.br/top100/sertanejo/",
+    "https://www.letras.mus.br/estilos/sertanejo/?pagina={pagina}",
+    "https://www.letras.mus.br/estilos/sertanejo-universitario/?pagina={pagina}",
+    "https://www.letras.mus.br/estilos/sertanejo-raiz/?pagina={pagina}",
+]
+# Teto de páginas por listagem paginada; a leitura para antes se uma página não trouxer música nova
+PAGINAS_POR_LISTAGEM = 20
+MAX_SITEMAPS = 50
+
+# Parser das páginas de letra: lxml quando instalado (mesmo resultado, bem mais rápido)
+BACKEND_PARSER = escolher_backend()
+
+# Diário append-only da coleta; apagar o arquivo para começar uma coleta do zero
+CAMINHO_DIARIO = "../base_de_dados/diario_coleta.sqlite"
+
+# Modo incremental: índice URL -> hash da letra; só baixa músicas novas ou verificadas há mais de TTL_DIAS
+MODO_INCREMENTAL = True
+TTL_DIAS = 30
+CAMINHO_INDICE = "../base_de_dados/indice_coleta.sqlite"
+
+def configurar_limite_taxa(taxa_por_host, rajada=RAJADA_POR_HOST):
+    """Troca o limite de taxa por host usado por fazer_request."""
+    global LIMITADOR_HOST
+    LIMITADOR_HOST = LimitadorPorHost(taxa_por_host, rajada)
+
+def obter_cache_http():
+    """Abre (uma única vez) o cache HTTP em disco."""
+    global _cache_http
+    with _lock_cache_http:
+        if _cache_http is None:
+            _cache_http = CacheHTTP(CAMINHO_CACHE_HTTP)
+        return _cache_http
+
+def obter_arquivo_paginas():
+    """Abre (uma única vez) o arquivo de páginas brutas."""
+    global _arquivo_paginas
+    with _lock_cache_http:
+        if _arquivo_paginas is None:
+            _arquivo_paginas = ArquivoPaginas(CAMINHO_ARQUIVO_PAGINAS)
+        return _arquivo_paginas
+
+def obter_resolvedor_anos():
+    """Abre (uma única vez) o cache de discografias."""
+    global _resolvedor_anos
+    with _lock_cache_http:
+        if _resolvedor_anos is None:
+            _resolvedor_anos = ResolvedorAnos(CAMINHO_DISCOGRAFIAS, baixar_pagina)
+        return _resolvedor_anos
+
+def arquivar_pagina(conteudo, url_musica, titulo_original, artista_original, ranking_pos):
+    """Guarda o HTML baixado no arquivo de páginas, se estiver ativado."""
+    if CAMINHO_ARQUIVO_PAGINAS:
+        obter_arquivo_paginas().guardar(conteudo, url_musica, titulo_original, artista_original, ranking_pos)
+
+def _tentar_download(url):
+    """Uma tentativa de download. Retorna (conteudo, motivo, transitoria, retry_after)."""
     try:
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        }
-        response = requests.get(url, headers=headers, timeout=10)
-        response.raise_for_status()
-        return BeautifulSoup(response.content, 'html.parser')
+        return obter_cache_http().baixar(SESSAO, url, timeout=10), None, False, None
+    except requests.HTTPError as e:
+        status = e.response.status_code if e.response is not None else None
+        retry_after = ler_retry_after(e.response.headers.get('Retry-After')) if e.response is not None else None
+        return None, f"HTTP {status}", status in STATUS_TRANSITORIOS, retry_after
+    except (requests.ConnectionError, requests.Timeout) as e:
+        return None, type(e).__name__, True, None
     except Exception as e:
+        return None, f"{type(e).__name__}: {e}", False, None
+
+def baixar_pagina_com_motivo(url):
+    """Baixa o HTML bruto com retentativas para falhas transitórias. Retorna (conteudo, motivo_da_falha)."""
+    for tentativa in range(MAX_TENTATIVAS):
+        with TELEMETRIA.medir('espera_segundos', motivo='disjuntor'):
+            DISJUNTOR.aguardar()
+        TELEMETRIA.observar('espera_segundos', LIMITADOR_HOST.aguardar(url), motivo='limite_taxa')
+        with TELEMETRIA.medir('espera_segundos', motivo='aimd'):
+            CONTROLE_AIMD.adquirir()
+        inicio = time.monotonic()
+        try:
+            conteudo, motivo, transitoria, retry_after = _tentar_download(url)
+        finally:
+            CONTROLE_AIMD.liberar()
+        latencia = time.monotonic() - inicio
+        resultado = 'ok' if conteudo is not None else ('transitoria' if transitoria else 'permanente')
+        TELEMETRIA.observar('requisicao_segundos', latencia, resultado=resultado)
+        
+        # Falhas permanentes (ex.: 404) não indicam sobrecarga do servidor: o host respondeu, o disjuntor zera
+        CONTROLE_AIMD.registrar(latencia, sucesso=not transitoria)
+        if not transitoria:
+            DISJUNTOR.registrar_sucesso()
+            if conteudo is not None:
+                TELEMETRIA.somar('bytes_paginas_total', len(conteudo))
+            return conteudo, motivo
+        
+        if DISJUNTOR.registrar_falha():
+            print(f"      🛑 Disjuntor aberto após falhas seguidas ({motivo}): pausando a coleta por {DISJUNTOR.pausa:.0f}s")
+        if tentativa + 1 < MAX_TENTATIVAS:
+            with _lock_estatisticas_rede:
+                ESTATISTICAS_REDE['retentativas'] += 1
+            TELEMETRIA.somar('retentativas_total')
+            espera = retry_after if retry_after is not None else calcular_espera(tentativa, ESPERA_BASE)
+            with TELEMETRIA.medir('espera_segundos', motivo='backoff'):
+                time.sleep(min(espera, ESPERA_MAXIMA))
+    
+    with _lock_estatisticas_rede:
+        ESTATISTICAS_REDE['desistencias'] += 1
+    return None, f"{motivo} após {MAX_TENTATIVAS} tentativas"
+
+def baixar_pagina(url):
+    """Baixa o HTML bruto da URL usando a sessão compartilhada e o cache condicional."""
+    conteudo, _ = baixar_pagina_com_motivo(url)
+    return conteudo
+
+def resumo_controle_fluxo():
+    """Texto com retentativas, concorrência adaptativa e aberturas do disjuntor."""
+    return (
+        f"🔁 Retentativas: {ESTATISTICAS_REDE['retentativas']} | desistências: {ESTATISTICAS_REDE['desistencias']} | "
+        f"concorrência AIMD final: {CONTROLE_AIMD.limite} (reduções: {CONTROLE_AIMD.reducoes}) | "
+        f"disjuntor abriu {DISJUNTOR.aberturas}x"
+    )
+
+def exportar_metricas(caminho_base=None):
+    """Atualiza os medidores de fim de coleta e grava as métricas (.prom e .json)."""
+    TELEMETRIA.definir('concorrencia_aimd', CONTROLE_AIMD.limite)
+    if _cache_http is not None:
+        TELEMETRIA.definir('cache_bytes_economizados', _cache_http.bytes_economizados)
+    return TELEMETRIA.exportar(caminho_base or CAMINHO_METRICAS)
+
+def fazer_request(url):
+    """Faz uma requisição HTTP e retorna o soup."""
+    conteudo = baixar_pagina(url)
+    if conteudo is None:
         return None
+    return BeautifulSoup(conteudo, 'html.parser')
 
 def extrair_ano_melhorado(soup):
     """Extrai o ano da música usando JSON-LD."""
     try:
         scripts_json = soup.find_all('script', type='application/ld+json')
-        for script in scripts_json:
-            try:
-                data = json.loads(script.string)
-                if isinstance(data, dict):
-                    for campo in ['datePublished', 'releaseDate', 'dateCreated', 'uploadDate']:
-                        if campo in data:
-                            ano_match = re.search(r'\b(19|20)\d{2}\b', str(data[campo]))
-                            if ano_match:
-                                return int(ano_match.group())
-                    
-                    if data.get('@type') == 'MusicRecording' and 'inAlbum' in data:
-                        album = data['inAlbum']
-                        if isinstance(album, dict) and 'datePublished' in album:
-                            ano_match = re.search(r'\b(19|20)\d{2}\b', str(album['datePublished']))
-                            if ano_match:
-                                return int(ano_match.group())
-            except:
-                continue
-        return None
+        return extrair_ano_json_ld(script.string for script in scripts_json)
     except:
         return None
 
 def limpar_letra(letra_bruta):
     """Limpa e formata o texto da letra."""
-    if not letra_bruta:
-        return ""
-    
-    # 1. Separar palavras grudadas - minúscula seguida de maiúscula
-    texto_limpo = re.sub(r'([a-záéíóúçãõâêôà])([A-ZÁÉÍÓÚÇÃÕÂÊÔÀ])', r'\1 \2', letra_bruta)
-    
-    # 2. Separar número seguido de letra maiúscula (ex: "IPVAQuem" -> "IPVA Quem")
-    texto_limpo = re.sub(r'([0-9A-ZÁÉÍÓÚÇÃÕÂÊÔÀ]{2,})([A-ZÁÉÍÓÚÇÃÕÂÊÔÀ][a-záéíóúçãõâêôà])', r'\1 \2', texto_limpo)
-    
-    # 3. Separar siglas grudadas em palavras (ex: "IPVAQuem" -> "IPVA Quem")
-    texto_limpo = re.sub(r'([A-ZÁÉÍÓÚÇÃÕÂÊÔÀ]{2,})([A-ZÁÉÍÓÚÇÃÕÂÊÔÀ][a-záéíóúçãõâêôà]+)', r'\1 \2', texto_limpo)
-    
-    # 4. Separar palavra terminada seguida de palavra começada com maiúscula
-    texto_limpo = re.sub(r'([a-záéíóúçãõâêôà])([A-ZÁÉÍÓÚÇÃÕÂÊÔÀ][a-záéíóúçãõâêôà])', r'\1 \2', texto_limpo)
-    
-    # 5. Adicionar espaços após pontuação quando necessário
-    texto_limpo = re.sub(r'([.!?;:])([A-ZÁÉÍÓÚÇÃÕÂÊÔÀ])', r'\1 \2', texto_limpo)
-    
-    # 6. Limpar espaços extras e quebras de linha
-    linhas = [linha.strip() for linha in texto_limpo.split('\n') if linha.strip()]
-    texto_final = '\n'.join(linhas)
-    
-    # 7. Remover espaços duplicados
-    texto_final = re.sub(r'\s+', ' ', texto_final)
-    
-    return texto_final
+    # Separa palavras grudadas (minúscula+Maiúscula, SIGLAPalavra, pontuação+Maiúscula)
+    # e colapsa espaços/quebras de linha numa única passada (ver normalizador.py)
+    return normalizar_letra(letra_bruta)
 
 def extrair_letra_completa_corrigida(url_musica, titulo_original, artista_original, ranking_pos):
     """Extrai letra completa usando seletores atualizados."""
+    dados_musica, _ = extrair_musica(url_musica, titulo_original, artista_original, ranking_pos)
+    return dados_musica
+
+def extrair_musica(url_musica, titulo_original, artista_original, ranking_pos):
+    """Como extrair_letra_completa_corrigida, mas retorna (dados, motivo_da_falha)."""
     
     print(f"[{ranking_pos:3}] 🎵 {artista_original} - {titulo_original}")
     
-    soup = fazer_request(url_musica)
-    if not soup:
-        print(f"      ❌ Erro ao acessar URL")
-        return None
-    
+    conteudo, motivo = baixar_pagina_com_motivo(url_musica)
+    if conteudo is None:
+        print(f"      ❌ Erro ao acessar URL ({motivo})")
+        return None, f'erro_acesso: {motivo}'
+    
+    arquivar_pagina(conteudo, url_musica, titulo_original, artista_original, ranking_pos)
+    tempos = {}
+    dados, motivo = extrair_dados_pagina(conteudo, url_musica, titulo_original, artista_original, ranking_pos, tempos=tempos)
+    registrar_tempos(tempos)
+    completar_ano(dados)
+    return dados, motivo
+
+def completar_ano(dados):
+    """Preenche o ano ausente pela discografia do artista (roda na thread de download, não no gravador)."""
+    if dados and not dados.get('ano') and RESOLVER_ANOS:
+        dados['ano'] = obter_resolvedor_anos().resolver(dados['url'])
+
+def registrar_tempos(tempos):
+    """Passa para a telemetria os tempos de parsing/limpeza medidos por extrair_dados_pagina."""
+    for etapa, segundos in tempos.items():
+        TELEMETRIA.observar(f'{etapa}_segundos', segundos)
+
+def extrair_dados_pagina(html, url_musica, titulo_original, artista_original, ranking_pos, backend=None, tempos=None):
+    """
+    Monta o registro da música a partir do HTML já baixado. Retorna (dados, motivo_da_falha).
+    Se `tempos` for um dict, recebe a duração do parsing ('parse') e da limpeza ('limpeza').
+    """
+    tempos = tempos if tempos is not None else {}
     try:
-        # Novos seletores baseados na análise
-        # Título: h1 dentro de textStyle-primary
-        titulo_elem = soup.find('h1', class_='textStyle-primary')
-        if not titulo_elem:
-            # Fallback para outros seletores
-            titulo_elem = soup.find('h1')
+        # Título (h1.textStyle-primary ou primeiro h1), link do artista, letra e JSON-LD
+        inicio = time.perf_counter()
+        pagina = analisar_pagina(html, backend or BACKEND_PARSER)
+        tempos['parse'] = time.perf_counter() - inicio
         
-        if not titulo_elem:
+        if pagina['titulo'] is None:
             print(f"      ❌ Título não encontrado")
-            return None
+            return None, 'titulo_nao_encontrado'
         
-        titulo = titulo_elem.get_text(strip=True)
+        titulo = pagina['titulo']
         
         # Artista: link para artista (geralmente próximo ao título)
-        artista_elem = titulo_elem.find_next('a')
-        if artista_elem and '/henrique-e-juliano/' in artista_elem.get('href', ''):
-            artista = artista_elem.get_text(strip=True)
+        if '/henrique-e-juliano/' in (pagina['artista_href'] or ''):
+            artista = pagina['artista_texto']
         else:
             # Fallback para artista original
             artista = artista_original
         
-        # Letra: procurar diferentes classes
-        seletores_letra = [
-            '.lyric-original',
-            '[class*="lyric"]',
-            'div.lyric',
-            '.letra'
-        ]
-        
-        letra_elem = None
-        for seletor in seletores_letra:
-            letra_elem = soup.select_one(seletor)
-            if letra_elem and len(letra_elem.get_text().strip()) > 100:
-                break
-        
-        if not letra_elem:
+        if pagina['letra_bruta'] is None:
             print(f"      ❌ Letra não encontrada")
-            return None
+            return None, 'letra_nao_encontrada'
         
-        letra_bruta = letra_elem.get_text()
+        letra_bruta = pagina['letra_bruta']
+        inicio = time.perf_counter()
         letra_limpa = limpar_letra(letra_bruta)
+        tempos['limpeza'] = time.perf_counter() - inicio
         
         if len(letra_limpa.split()) < 10:
             print(f"      ⚠️ Letra muito curta")
-            return None
+            return None, 'letra_curta'
         
         # Extrair ano
-        ano = extrair_ano_melhorado(soup)
+        ano = extrair_ano_json_ld(pagina['json_ld'])
         
         # FILTRO REMOVIDO: Coletando músicas de todos os anos
         # if ano and ano < 2023:
@@ -167,11 +329,32 @@ def extrair_letra_completa_corrigida(url_musica, titulo_original, artista_origin
         
         ano_str = f", ano: {ano}" if ano else ", ano: não identificado"
         print(f"      ✅ Sucesso! ({dados_musica['contagem_palavras']} palavras{ano_str})")
-        return dados_musica
+        return dados_musica, None
         
     except Exception as e:
         print(f"      ❌ Erro: {str(e)}")
-        return None
+        return None, f'erro_extracao: {e}'
+
+def analisar_para_pipeline(html, url_musica, titulo_original, artista_original, ranking_pos):
+    """Estágio de parsing do pipeline: retorna (dados, motivo, tempos), já que a telemetria do processo filho se perde."""
+    tempos = {}
+    dados, motivo = extrair_dados_pagina(html, url_musica, titulo_original, artista_original, ranking_pos, tempos=tempos)
+    return dados, motivo, tempos
+
+def completar_analise(resultado):
+    """Estágio de complemento do pipeline: ano pela discografia, só quando o parsing não achou."""
+    completar_ano(resultado[0])
+    return resultado
+
+def baixar_para_analise(url_musica, titulo_original, artista_original, ranking_pos):
+    """Estágio de download do pipeline: retorna (html, resultado_se_falhar)."""
+    print(f"[{ranking_pos:3}] 🎵 {artista_original} - {titulo_original}")
+    conteudo, motivo = baixar_pagina_com_motivo(url_musica)
+    if conteudo is None:
+        print(f"      ❌ Erro ao acessar URL ({motivo})")
+    else:
+        arquivar_pagina(conteudo, url_musica, titulo_original, artista_original, ranking_pos)
+    return conteudo, (None, f'erro_acesso: {motivo}')
 
 def normalizar_nome_url(texto):
     """Normaliza nome para URL do Letras.mus.br."""
@@ -197,131 +380,99 @@ def construir_url_musica(titulo, artista):
     titulo_url = normalizar_nome_url(titulo)
     return f"https://www.letras.mus.br/{artista_url}/{titulo_url}/"
 
+def obter_indice_musicas():
+    """Abre (uma única vez) o índice local de músicas por artista."""
+    global _indice_musicas
+    with _lock_cache_http:
+        if _indice_musicas is None:
+            _indice_musicas = IndiceMusicas(CAMINHO_INDICE_MUSICAS, baixar_pagina_com_motivo, normalizar_nome_url)
+        return _indice_musicas
+
+def resolver_urls(musicas_lista, max_em_voo=MAX_EM_VOO):
+    """
+    Resolve a URL real de cada (posicao, titulo, artista) pelo índice de músicas do artista.
+    Entradas (posicao, titulo, artista, url) vindas da descoberta já têm a URL real e são mantidas.
+    Retorna [(posicao, titulo, artista, url, resolvida)]; quando não resolvida, url é a construída
+    (só para registro) e a música não deve ser baixada.
+    """
+    sem_url = [m for m in musicas_lista if len(m) < 4 or not m[3]]
+    if RESOLVER_SLUGS and sem_url:
+        # Páginas dos artistas baixadas em paralelo, respeitando o mesmo limite por host
+        obter_indice_musicas().preparar(
+            [normalizar_nome_url(m[2]) for m in sem_url],
+            lambda funcao, tarefas: executar_em_paralelo(funcao, tarefas, max_em_voo),
+        )
+    
+    resolvidas = []
+    for musica in musicas_lista:
+        posicao, titulo, artista = musica[:3]
+        if len(musica) > 3 and musica[3]:
+            resolvidas.append((posicao, titulo, artista, musica[3], True))
+        elif not RESOLVER_SLUGS:
+            resolvidas.append((posicao, titulo, artista, construir_url_musica(titulo, artista), True))
+        else:
+            url, _ = obter_indice_musicas().resolver(titulo, artista)
+            if url is None:
+                resolvidas.append((posicao, titulo, artista, construir_url_musica(titulo, artista), False))
+            else:
+                resolvidas.append((posicao, titulo, artista, url, True))
+    return resolvidas
+
 def buscar_musicas_mais_acessadas(limite=1000):
-    """Busca a lista real de músicas mais acessadas do sertanejo no site."""
+    """
+    Busca a lista de músicas mais acessadas do sertanejo no site.
+    O ranking e as listagens de estilo vêm primeiro, na ordem em que aparecem; se faltar música
+    para o limite, os sitemaps do site completam a lista com outras músicas dos mesmos artistas.
+    Retorna [(posicao, titulo, artista, url_canonica)].
+    """
     
     print(f"🔍 Buscando músicas mais acessadas do sertanejo (limite: {limite})...")
     print(f"⏱️  EXECUÇÃO LONGA: Preparado para coleta extensiva...")
-    url_ranking = "https://www.letras.mus.br/mais-acessadas/sertanejo/"
     
-    soup = fazer_request(url_ranking)
-    if not soup:
-        print(f"❌ Erro ao acessar página de ranking")
-        return []
-    
-    musicas_encontradas = []
-    urls_processadas = set()  # Evitar duplicatas
+    descoberta = DescobertaURLs(baixar_pagina, lambda funcao, tarefas: executar_em_paralelo(funcao, tarefas, MAX_EM_VOO))
     
     try:
-        # Procurar pela lista de músicas na página
-        # Vamos tentar diferentes seletores baseados na estrutura comum do site
-        
-        # Seletor 1: Links que contêm títulos de músicas
-        links_musicas = soup.find_all('a', href=True)
-        
-        contador = 0
-        for link in links_musicas:
-            if contador >= limite:
-                break
-                
-            href = link.get('href', '')
-            texto = link.get_text(strip=True)
-            
-            # Filtrar apenas links que parecem ser de músicas
-            # Links de músicas geralmente têm o padrão: /artista/titulo/
-            if (href.count('/') >= 3 and 
-                not any(x in href.lower() for x in ['mais-acessadas', 'artista', 'album', 'biografia', 'playlists', 'estilos']) and
-                href not in urls_processadas and
-                href.startswith('/') and
-                len(href.split('/')) >= 3):
-                
-                # Extrair artista e título do link ou texto
-                if texto and len(texto) > 3:  # Evitar textos muito curtos
-                    # Tentar extrair informações do próprio link
-                    partes_url = href.strip('/').split('/')
-                    if len(partes_url) >= 2:
-                        artista_url = partes_url[-2]
-                        titulo_url = partes_url[-1]
-                        
-                        # Filtrar URLs que não parecem ser de música
-                        if any(x in titulo_url.lower() for x in ['biografia', 'discografia', 'fotos']):
-                            continue
-                        
-                        # Converter de volta para texto legível
-                        artista = artista_url.replace('-', ' ').title()
-                        titulo = titulo_url.replace('-', ' ').title()
-                        
-                        # Evitar títulos muito curtos ou suspeitos
-                        if len(titulo) < 2 or titulo.isdigit():
-                            continue
-                        
-                        urls_processadas.add(href)
-                        contador += 1
-                        musicas_encontradas.append((contador, titulo, artista))
-                        
-                        if contador <= 15:  # Mostrar os primeiros 15
-                            print(f"   {contador:2d}. {artista} - {titulo}")
-        
-        if contador > 15:
-            print(f"   ... e mais {contador-15} músicas encontradas")
-        
-        # Para listas grandes, sempre tentar estratégia expandida
-        if len(musicas_encontradas) < limite * 0.8:  # Se não conseguiu 80% do limite
-            print(f"🔍 Expandindo busca... ({len(musicas_encontradas)} encontradas, buscando mais)")
-            
-            # Buscar em múltiplas páginas de sertanejo
-            urls_adicionais = [
-                "https://www.letras.mus.br/estilos/sertanejo/",
-                "https://www.letras.mus.br/top100/sertanejo/",
-                "https://www.letras.mus.br/estilos/sertanejo-universitario/",
-                "https://www.letras.mus.br/estilos/sertanejo-raiz/",
-            ]
-            
-            for url_adicional in urls_adicionais:
-                if len(musicas_encontradas) >= limite:
-                    break
-                    
-                print(f"🔍 Buscando em: {url_adicional}")
-                soup_adicional = fazer_request(url_adicional)
-                if soup_adicional:
-                    links_adicionais = soup_adicional.find_all('a', href=True)
-                    
-                    for link in links_adicionais:
-                        if len(musicas_encontradas) >= limite:
-                            break
-                            
-                        href = link.get('href', '')
-                        if (href.count('/') >= 3 and 
-                            href not in urls_processadas and
-                            not any(x in href.lower() for x in ['mais-acessadas', 'artista', 'album', 'biografia'])):
-                            
-                            partes_url = href.strip('/').split('/')
-                            if len(partes_url) >= 2:
-                                artista_url = partes_url[-2]
-                                titulo_url = partes_url[-1]
-                                
-                                if not titulo_url.isdigit() and len(titulo_url) > 2:
-                                    artista = artista_url.replace('-', ' ').title()
-                                    titulo = titulo_url.replace('-', ' ').title()
-                                    
-                                    urls_processadas.add(href)
-                                    musicas_encontradas.append((len(musicas_encontradas) + 1, titulo, artista))
-            
-        print(f"✅ Total encontrado: {len(musicas_encontradas)} músicas")
+        novas = descoberta.ler_listagens(LISTAGENS_SERTANEJO, paginas=PAGINAS_POR_LISTAGEM)
+        print(f"📃 Listagens: {novas} músicas de {len(descoberta.artistas)} artistas")
         
+        if len(descoberta.fronteira) < limite and MAX_SITEMAPS:
+            print(f"🔍 Expandindo busca pelos sitemaps... ({len(descoberta.fronteira)} encontradas, buscando mais)")
+            sitemaps = descoberta.descobrir_sitemaps()
+            novas = descoberta.ler_sitemaps(sitemaps, somente_artistas=descoberta.artistas, max_sitemaps=MAX_SITEMAPS)
+            print(f"🗺️  Sitemaps: {novas} músicas novas dos mesmos artistas")
     except Exception as e:
         print(f"❌ Erro ao extrair lista: {str(e)}")
-        return []
+    
+    fronteira = descoberta.fronteira
+    print(f"🧭 Fronteira: {len(fronteira)} URLs candidatas em {descoberta.requisicoes} requisições "
+          f"({fronteira.repetidas} repetidas descartadas, {fronteira.bytes_usados()/1024:.0f} KB na fronteira)")
+    
+    musicas_encontradas = []
+    for url in fronteira.retirar(limite):
+        artista_url, titulo_url = url.rstrip('/').split('/')[-2:]
+        # Converter de volta para texto legível
+        artista = artista_url.replace('-', ' ').title()
+        titulo = titulo_url.replace('-', ' ').title()
+        musicas_encontradas.append((len(musicas_encontradas) + 1, titulo, artista, url))
+        if len(musicas_encontradas) <= 15:  # Mostrar os primeiros 15
+            print(f"   {len(musicas_encontradas):2d}. {artista} - {titulo}")
+    
+    if len(musicas_encontradas) > 15:
+        print(f"   ... e mais {len(musicas_encontradas)-15} músicas encontradas")
+    print(f"✅ Total encontrado: {len(musicas_encontradas)} músicas")
     
     return musicas_encontradas
 
-def coletar_hits_automatico(limite=1000):
-    """Coleta hits automaticamente da página mais acessadas."""
+def coletar_hits_automatico(limite=1000, incremental=False, ttl_dias=TTL_DIAS):
+    """
+    Coleta hits automaticamente da página mais acessadas.
+    Com incremental=True, baixa só as músicas novas no ranking ou verificadas há mais de ttl_dias.
+    """
     
     print(f"🚀 COLETA AUTOMÁTICA MEGA - SERTANEJO MAIS ACESSADO")
     print("=" * 70)
     print(f"🎯 META AMBICIOSA: {limite} músicas")
-    print(f"⏱️  Tempo estimado: {limite * 2.5 / 60:.0f} minutos (~{limite * 2.5 / 3600:.1f} horas)")
+    print(f"⏱️  Tempo estimado: {limite / LIMITADOR_HOST.taxa_por_host / 60:.0f} minutos (limite de {LIMITADOR_HOST.taxa_por_host:g} req/s por host)")
     print(f"💤 EXECUÇÃO LONGA: Pode deixar rodando...")
     
     # Buscar lista real do site
@@ -338,8 +489,61 @@ def coletar_hits_automatico(limite=1000):
     elif len(musicas_lista) >= 800:
         print(f"🎉 EXCELENTE! Lista com {len(musicas_lista)} músicas encontradas!")
     
+    if incremental:
+        return coletar_incremental(musicas_lista, ttl_dias)
     return coletar_letras_da_lista(musicas_lista)
 
+def carregar_indice(caminho_indice=CAMINHO_INDICE, caminho_diario=CAMINHO_DIARIO):
+    """Abre o índice incremental; na primeira vez, preenche com as coletas já salvas em base_de_dados."""
+    indice = IndiceColeta(caminho_indice)
+    if len(indice) == 0:
+        importadas = indice.importar_csvs("../base_de_dados/sertanejo_*.csv")
+        if os.path.exists(caminho_diario):
+            diario = DiarioColeta(caminho_diario)
+            importadas += indice.importar_diario(diario)
+            diario.fechar()
+        print(f"🗂️  Índice criado a partir de base_de_dados: {importadas} músicas")
+    return indice
+
+def coletar_incremental(musicas_lista, ttl_dias=TTL_DIAS, caminho_indice=CAMINHO_INDICE):
+    """
+    Recoleta incremental: carrega o índice de URLs e hashes, baixa só as URLs novas no ranking
+    ou mais velhas que o TTL e registra se o hash da letra mudou. Salva o corpus atualizado
+    e um CSV só com as músicas novas/alteradas, para as etapas seguintes reprocessarem apenas elas.
+    """
+    inicio_rodada = datetime.now().isoformat()
+    indice = carregar_indice(caminho_indice)
+    
+    urls = [url for _, _, _, url, _ in resolver_urls(musicas_lista)]
+    pendentes, novas, vencidas = indice.selecionar_pendentes(urls, ttl_dias)
+    urls_pendentes = set(pendentes)
+    lista_pendente = [m for m, url in zip(musicas_lista, urls) if url in urls_pendentes]
+    
+    print(f"\n🔁 MODO INCREMENTAL (TTL: {ttl_dias} dias, índice com {len(indice)} músicas)")
+    print(f"   🆕 Novas no ranking: {novas}")
+    print(f"   ⌛ Vencidas (verificadas há mais de {ttl_dias} dias): {vencidas}")
+    print(f"   ⏭️  Puladas (ainda válidas): {len(musicas_lista) - len(lista_pendente)}")
+    
+    # Diário próprio da rodada (auditoria); quem já foi verificado fica fresco no índice,
+    # então uma recoleta interrompida retoma sozinha na próxima execução
+    carimbo = datetime.now().strftime('%Y%m%d_%H%M%S')
+    caminho_diario = f"../base_de_dados/diario_incremental_{carimbo}.sqlite"
+    resumo = coletar_letras_da_lista(lista_pendente, caminho_diario=caminho_diario, indice_incremental=indice)
+    
+    alteradas = indice.alteradas_desde(inicio_rodada)
+    arquivo_corpus = f"../base_de_dados/sertanejo_incremental_{carimbo}.csv"
+    total = indice.exportar_csv(arquivo_corpus)
+    print(f"💾 Corpus atualizado ({total} músicas): {arquivo_corpus}")
+    if alteradas:
+        arquivo_alteradas = f"../base_de_dados/musicas_alteradas_{carimbo}.csv"
+        indice.exportar_csv(arquivo_alteradas, somente_urls=alteradas)
+        print(f"🔄 {len(alteradas)} músicas novas/alteradas para reprocessar: {arquivo_alteradas}")
+    else:
+        print("🔄 Nenhuma letra nova ou alterada nesta rodada")
+    
+    indice.fechar()
+    return resumo
+
 def coletar_hits_corrigido():
     """Coleta hits usando lista manual (backup)."""
     
@@ -365,86 +569,141 @@ def coletar_hits_corrigido():
     
     return coletar_letras_da_lista(musicas_teste)
 
-def salvar_dados_parciais(musicas_coletadas, posicao_atual):
-    """Salva dados parciais para evitar perda em execuções longas."""
-    if musicas_coletadas:
-        import os
-        df = pd.DataFrame(musicas_coletadas)
-        
-        # Criar nome do arquivo parcial
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        arquivo_parcial = f"../base_de_dados/sertanejo_parcial_{timestamp}_pos{posicao_atual}.csv"
-        
-        df.to_csv(arquivo_parcial, index=False, encoding='utf-8')
-        print(f"     📁 Backup salvo: {os.path.basename(arquivo_parcial)}")
-
-def coletar_letras_da_lista(musicas_lista):
-    """Coleta letras de uma lista de músicas de todos os anos."""
+def coletar_letras_da_lista(musicas_lista, max_em_voo=MAX_EM_VOO, caminho_diario=CAMINHO_DIARIO, formato_saida='csv',
+                            processos_parser=PROCESSOS_PARSER, indice_incremental=None):
+    """
+    Coleta letras de uma lista de músicas de todos os anos.
+    Com processos_parser > 0, o parsing roda num pool de processos separado dos downloads (pipeline).
+    Com indice_incremental, cada música coletada atualiza o índice e a exportação fica a cargo de quem chamou.
+    Sem ele, cada música vai para o arquivo de saída assim que é coletada (formato_saida: csv, jsonl ou parquet).
+    Retorna o resumo do corpus (total_musicas, palavras, anos, ...).
+    """
     
     print(f"🎵 Coletando {len(musicas_lista)} músicas sertanejas populares...")
     print(f"📅 SEM FILTRO: Coletando músicas de todos os anos!")
     print(f"💾 Dados serão salvos em: ../base_de_dados/")
-    print(f"⏱️  Tempo estimado: {(len(musicas_lista) * 3 / 60):.1f} minutos")
     
-    musicas_coletadas = []
+    # O diário registra cada tentativa na hora; músicas já concluídas numa execução anterior são puladas
+    diario = DiarioColeta(caminho_diario)
+    urls_concluidas = diario.urls_concluidas()
+    pendentes = []
+    nao_resolvidas = 0
+    for posicao, titulo, artista, url, resolvida in resolver_urls(musicas_lista, max_em_voo):
+        if url in urls_concluidas:
+            continue
+        if not resolvida:
+            # Sem slug correspondente na página do artista: registra a falha sem gastar uma requisição
+            diario.registrar_falha(url, posicao, titulo, artista, 'slug_nao_resolvido')
+            TELEMETRIA.somar('musicas_total', resultado='slug_nao_resolvido')
+            nao_resolvidas += 1
+            continue
+        pendentes.append((url, titulo, artista, posicao))
+    
+    if nao_resolvidas:
+        print(f"🔎 {nao_resolvidas} músicas sem URL real no índice do artista: puladas sem requisição")
+    if len(pendentes) + nao_resolvidas < len(musicas_lista):
+        print(f"⏭️  Retomando coleta: {len(musicas_lista) - len(pendentes) - nao_resolvidas} músicas já estão no diário ({os.path.basename(caminho_diario)})")
+    
+    print(f"⚡ {max_em_voo} requisições em paralelo, limite de {LIMITADOR_HOST.taxa_por_host:g} req/s por host")
+    print(f"⏱️  Tempo estimado: {(len(pendentes) / LIMITADOR_HOST.taxa_por_host / 60):.1f} minutos")
+    
+    # As músicas vão direto para o disco; na memória ficam só as estatísticas do resumo
+    gravador = None
+    estatisticas = EstatisticasCorpus()
+    if indice_incremental is None:
+        arquivo = f"../base_de_dados/sertanejo_mais_acessadas_todos_anos_{datetime.now():%Y%m%d_%H%M%S}.{formato_saida}"
+        gravador = GravadorRegistros(arquivo, formato_saida)
+        estatisticas = gravador.estatisticas
+        # Numa retomada, o arquivo começa com o que execuções anteriores já deixaram no diário
+        for musica in diario.musicas():
+            gravador.gravar(musica)
+    
     sucessos = 0
     falhas = 0
     filtradas = 0
+    situacoes = {NOVA: 0, ALTERADA: 0}
     
     # Progresso visual otimizado para listas grandes
-    if len(musicas_lista) > 500:
+    if len(pendentes) > 500:
         checkpoint = 50  # A cada 50 músicas para listas muito grandes
-    elif len(musicas_lista) > 200:
+    elif len(pendentes) > 200:
         checkpoint = 25  # A cada 25 músicas para listas grandes
     else:
         checkpoint = 10  # A cada 10 músicas para listas pequenas
     
     inicio_tempo = time.time()
     
-    for i, (posicao, titulo, artista) in enumerate(musicas_lista, 1):
+    # O controle AIMD decide quantas das `max_em_voo` threads podem estar baixando ao mesmo tempo
+    CONTROLE_AIMD.maximo = max_em_voo
+    
+    # O limite de taxa por host (em fazer_request) substitui os delays fixos entre músicas
+    if processos_parser:
+        print(f"🏭 Pipeline: {max_em_voo} threads de download -> {processos_parser} processos de parsing -> diário")
+        concluidas = executar_pipeline(
+            pendentes, baixar_para_analise, analisar_para_pipeline,
+            n_baixadores=max_em_voo, n_analisadores=processos_parser, completar=completar_analise,
+        )
+    else:
+        concluidas = executar_em_paralelo(extrair_musica, pendentes, max_em_voo)
+    
+    for i, (_, tarefa, resultado, erro) in enumerate(concluidas, 1):
+        url, titulo, artista, posicao = tarefa
+        if erro is not None:
+            print(f"      ❌ Erro inesperado: {str(erro)}")
+            dados, motivo = None, f'erro_inesperado: {erro}'
+        else:
+            # No pipeline, o parsing devolve também os tempos medidos no processo filho
+            dados, motivo = resultado[:2]
+            if len(resultado) > 2:
+                registrar_tempos(resultado[2])
+        
+        if dados:
+            diario.registrar_sucesso(dados)
+            if gravador is not None:
+                gravador.gravar(dados)
+            else:
+                estatisticas.adicionar(dados)
+            sucessos += 1
+            if indice_incremental is not None:
+                situacao = indice_incremental.registrar(dados)
+                if situacao in situacoes:
+                    situacoes[situacao] += 1
+        else:
+            diario.registrar_falha(url, posicao, titulo, artista, motivo)
+            falhas += 1
+        TELEMETRIA.somar('musicas_total', resultado=classificar_motivo(None if dados else motivo))
+        
         # Mostrar progresso detalhado
-        if i % checkpoint == 0 or i == len(musicas_lista):
-            progresso = (i / len(musicas_lista)) * 100
+        if i % checkpoint == 0 or i == len(pendentes):
+            progresso = (i / len(pendentes)) * 100
             tempo_decorrido = time.time() - inicio_tempo
             tempo_por_musica = tempo_decorrido / i
-            tempo_restante = (len(musicas_lista) - i) * tempo_por_musica
+            tempo_restante = (len(pendentes) - i) * tempo_por_musica
             
-            print(f"\n📊 PROGRESSO: {progresso:.1f}% ({i}/{len(musicas_lista)})")
+            print(f"\n📊 PROGRESSO: {progresso:.1f}% ({i}/{len(pendentes)})")
             print(f"   ✅ Sucessos: {sucessos} | ❌ Falhas: {falhas} | 📈 Taxa: {sucessos/i*100:.1f}%")
             print(f"   ⏱️  Tempo decorrido: {tempo_decorrido/60:.1f}min | Restante: ~{tempo_restante/60:.0f}min")
-            
-            # Salvar progresso parcial a cada checkpoint
-            if sucessos > 0 and i % (checkpoint * 2) == 0:
-                print(f"   💾 Salvando progresso parcial...")
-                salvar_dados_parciais(musicas_coletadas, i)
-        
-        url = construir_url_musica(titulo, artista)
-        
-        try:
-            dados = extrair_letra_completa_corrigida(url, titulo, artista, posicao)
-            
-            if dados:
-                musicas_coletadas.append(dados)
-                sucessos += 1
-            else:
-                falhas += 1
-        except Exception as e:
-            print(f"      ❌ Erro inesperado: {str(e)}")
-            falhas += 1
-        
-        # Delay otimizado para execuções longas
-        if len(musicas_lista) > 500:
-            time.sleep(random.uniform(1.0, 2.0))  # Delay mais rápido para listas muito grandes
-        elif len(musicas_lista) > 100:
-            time.sleep(random.uniform(1.5, 2.5))  # Delay moderado para listas grandes
-        else:
-            time.sleep(random.uniform(2, 4))  # Delay normal para listas pequenas
+            print(f"   💾 Diário: {len(urls_concluidas) + sucessos} músicas registradas")
+            exportar_metricas()
     
     print(f"\n" + "=" * 70)
     print(f"📊 RESULTADO FINAL:")
     print(f"   ✅ Sucessos: {sucessos}")
     print(f"   ❌ Falhas: {falhas}")
-    print(f"   📈 Taxa de sucesso: {(sucessos/(sucessos+falhas)*100):.1f}%")
+    if sucessos + falhas:
+        print(f"   📈 Taxa de sucesso: {(sucessos/(sucessos+falhas)*100):.1f}%")
+    print(f"   {obter_cache_http().resumo()}")
+    print(f"   {resumo_controle_fluxo()}")
+    print(f"   {TELEMETRIA.resumo()}")
+    if CAMINHO_ARQUIVO_PAGINAS:
+        print(f"   {obter_arquivo_paginas().resumo()}")
+    if RESOLVER_ANOS:
+        print(f"   {obter_resolvedor_anos().resumo()}")
+    if RESOLVER_SLUGS:
+        print(f"   {obter_indice_musicas().resumo()}")
+    if indice_incremental is not None:
+        print(f"   🔁 Índice: {situacoes[NOVA]} novas, {situacoes[ALTERADA]} com letra alterada, "
+              f"{sucessos - situacoes[NOVA] - situacoes[ALTERADA]} sem mudança")
     
     if len(musicas_lista) >= 200:
         if sucessos >= 200:
@@ -456,80 +715,134 @@ def coletar_letras_da_lista(musicas_lista):
         else:
             print(f"   ⚠️  Resultado abaixo do esperado para lista grande")
     
-    if musicas_coletadas:
-        # Salvar dados na pasta base_de_dados com numeração sequencial
-        df = pd.DataFrame(musicas_coletadas)
-        
-        # Encontrar o próximo número disponível
-        import os
-        base_nome = "sertanejo_mais_acessadas_todos_anos"
-        contador = 1
-        while os.path.exists(f"../base_de_dados/{base_nome}_{contador}.csv"):
-            contador += 1
-        
-        arquivo = f"../base_de_dados/{base_nome}_{contador}.csv"
-        df.to_csv(arquivo, index=False, encoding='utf-8')
-        
-        print(f"💾 Dados salvos em: {arquivo}")
-        
-        # Análises detalhadas
-        total_palavras = df['contagem_palavras'].sum()
-        musicas_com_ano = df[df['ano'].notna()]
-        
+    diario.fechar()
+    arquivo_prom, arquivo_json = exportar_metricas()
+    print(f"📈 Métricas: {arquivo_prom} (Prometheus) e {os.path.basename(arquivo_json)}")
+    if gravador is not None:
+        resumo = gravador.finalizar()
+        print(f"💾 Dados salvos em: {resumo['arquivo']} (resumo em {os.path.basename(resumo['arquivo'])}.resumo.json)")
+    else:
+        resumo = estatisticas.como_dict()
+    
+    if resumo['total_musicas']:
         print(f"\n📊 ANÁLISE DETALHADA:")
-        print(f"   📝 Total de palavras: {total_palavras:,}")
-        print(f"   📊 Média por música: {df['contagem_palavras'].mean():.0f} palavras")
-        print(f"   📅 Músicas com ano: {len(musicas_com_ano)}")
-        print(f"   📈 Músicas sem ano: {len(df) - len(musicas_com_ano)} (incluídas como possivelmente modernas)")
+        print(f"   📝 Total de palavras: {resumo['total_palavras']:,}")
+        print(f"   📊 Média por música: {resumo['media_palavras']:.0f} palavras")
+        print(f"   📅 Músicas com ano: {resumo['musicas_com_ano']}")
+        print(f"   📈 Músicas sem ano: {resumo['musicas_sem_ano']} (incluídas como possivelmente modernas)")
         
-        if len(musicas_com_ano) > 0:
-            anos = musicas_com_ano['ano'].value_counts().sort_index()
-            print(f"   🗓️  Anos encontrados: {list(anos.index)}")
+        if resumo['musicas_por_ano']:
+            print(f"   🗓️  Anos encontrados: {[int(ano) for ano in resumo['musicas_por_ano']]}")
             
             # Estatísticas por ano
-            for ano in sorted(anos.index):
-                qtd = anos[ano]
+            for ano, qtd in resumo['musicas_por_ano'].items():
                 print(f"      - {ano}: {qtd} músicas")
     
-    return musicas_coletadas
+    return resumo
+
+def trabalhar_da_fila(caminho_fila=CAMINHO_FILA, nome_trabalhador=None, max_em_voo=MAX_EM_VOO, espera_ociosa=30.0):
+    """
+    Laço de um trabalhador da coleta distribuída: pega lotes da fila compartilhada, coleta
+    e registra cada música no diário do próprio trabalhador. Termina quando não sobra tarefa
+    pendente nem em andamento em outro trabalhador.
+    """
+    nome = nome_trabalhador or nome_trabalhador_padrao()
+    fila = FilaTrabalho(caminho_fila)
+    caminho_diario = os.path.join(os.path.dirname(caminho_fila) or '.', f"diario_trabalhador_{nome}.sqlite")
+    diario = DiarioColeta(caminho_diario)
+    renovacao = fila.manter_leases(nome)
+    # Um arquivo por trabalhador: o textfile collector junta todos
+    caminho_metricas = f"{CAMINHO_METRICAS}_{nome}"
+    sucessos = 0
+    falhas = 0
+    inicio_tempo = time.time()
+    
+    print(f"👷 Trabalhador {nome}: fila {caminho_fila}, diário {os.path.basename(caminho_diario)}")
+    CONTROLE_AIMD.maximo = max_em_voo
+    try:
+        while True:
+            lote = fila.pegar(nome, max_em_voo * 4)
+            if not lote:
+                if fila.contar()[EM_ANDAMENTO] == 0:
+                    break
+                # Outros trabalhadores ainda estão coletando; se algum morrer, o lease vence e as músicas voltam
+                time.sleep(espera_ociosa)
+                continue
+            
+            ids = {url: id_tarefa for id_tarefa, url, _, _, _ in lote}
+            tarefas = [(url, titulo, artista, posicao) for _, url, titulo, artista, posicao in lote]
+            for _, (url, titulo, artista, posicao), resultado, erro in executar_em_paralelo(extrair_musica, tarefas, max_em_voo):
+                if erro is not None:
+                    dados, motivo = None, f'erro_inesperado: {erro}'
+                else:
+                    dados, motivo = resultado
+                
+                if dados:
+                    diario.registrar_sucesso(dados)
+                    fila.concluir(ids[url], nome)
+                    sucessos += 1
+                else:
+                    diario.registrar_falha(url, posicao, titulo, artista, motivo)
+                    # Falhas de acesso podem dar certo depois (ou em outro trabalhador); página sem letra não
+                    fila.falhar(ids[url], nome, motivo, repetir=motivo.startswith(('erro_acesso', 'erro_inesperado')))
+                    falhas += 1
+                TELEMETRIA.somar('musicas_total', resultado=classificar_motivo(None if dados else motivo))
+            
+            tempo_decorrido = time.time() - inicio_tempo
+            contagem = fila.contar()
+            print(f"\n📊 {nome}: ✅ {sucessos} | ❌ {falhas} | {(sucessos + falhas) / (tempo_decorrido / 60):.1f} músicas/min")
+            print(f"   🗂️  Fila: {contagem['pendente']} pendentes, {contagem['em_andamento']} em andamento, "
+                  f"{contagem['concluida']} concluídas, {contagem['falhou']} falharam")
+            exportar_metricas(caminho_metricas)
+    finally:
+        renovacao.set()
+        fila.fechar()
+        diario.fechar()
+    
+    print(f"\n🏁 Trabalhador {nome} terminou: {sucessos} sucessos, {falhas} falhas")
+    print(f"   {resumo_controle_fluxo()}")
+    print(f"   {TELEMETRIA.resumo()}")
+    exportar_metricas(caminho_metricas)
+    return sucessos, falhas
 
 if __name__ == "__main__":
     print("🚀 SCRAPER MEGA - SERTANEJO DE TODOS OS ANOS")
     print("🎯 META AMBICIOSA: Coletar até 1000 músicas")
     print("⏱️  EXECUÇÃO LONGA: Pode levar algumas horas")
-    print("💾 BACKUP AUTOMÁTICO: Salvamento periódico habilitado")
+    print("💾 DIÁRIO DE COLETA: Cada música é registrada assim que coletada")
     print("🔄 ROBUSTO: Resistente a falhas e interrupções")
     print()
     
     inicio_execucao = time.time()
     
     # Usar a nova função automática com limite máximo
-    musicas = coletar_hits_automatico(limite=1000)
+    resumo = coletar_hits_automatico(limite=1000, incremental=MODO_INCREMENTAL)
+    total_coletado = resumo['total_musicas']
     
     tempo_total = time.time() - inicio_execucao
     
     print(f"\n" + "="*70)
     print(f"🏁 EXECUÇÃO FINALIZADA!")
     print(f"⏱️  Tempo total: {tempo_total/60:.1f} minutos ({tempo_total/3600:.1f} horas)")
-    print(f"📊 Total coletado: {len(musicas)} músicas")
+    print(f"📊 Total coletado: {total_coletado} músicas")
     
     # Avaliação dos resultados
-    if len(musicas) >= 800:
+    if total_coletado >= 800:
         print(f"   � EXCEPCIONAL! Mais de 800 músicas coletadas!")
         print(f"   🎯 Dataset mega robusto para análises!")
-    elif len(musicas) >= 500:
+    elif total_coletado >= 500:
         print(f"   🎉 EXCELENTE! Mais de 500 músicas coletadas!")
         print(f"   ✅ Dataset muito bom para análises profundas!")
-    elif len(musicas) >= 300:
+    elif total_coletado >= 300:
         print(f"   ✅ MUITO BOM! Mais de 300 músicas coletadas!")
         print(f"   📊 Dataset sólido para análises!")
-    elif len(musicas) >= 200:
+    elif total_coletado >= 200:
         print(f"   ✅ BOM! Mais de 200 músicas coletadas!")
-    elif len(musicas) >= 100:
+    elif total_coletado >= 100:
         print(f"   ⚠️ Moderado. Mais de 100 músicas obtidas.")
     else:
         print(f"   ⚠️ Resultado abaixo do esperado.")
     
-    if len(musicas) > 0:
-        taxa_por_minuto = len(musicas) / (tempo_total / 60)
+    if total_coletado > 0:
+        taxa_por_minuto = total_coletado / (tempo_total / 60)
         print(f"📈 Velocidade média: {taxa_por_minuto:.1f} músicas/minuto")
\ No newline at end of file
@@ -0,0 +1,214 @@
+# ================================================================================
+# TELEMETRIA DA COLETA
+# Histogramas de latência por etapa, contadores de bytes e de resultados por motivo;
+# exportados como textfile do Prometheus (node_exporter) e resumo em JSON
+# ================================================================================
+
+import json
+import os
+import re
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+PREFIXO = "sertanejo_coleta"
+
+LIMITES_REDE = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+LIMITES_CPU = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+
+# nome -> (tipo, ajuda, limites do histograma)
+METRICAS = {
+    'requisicao_segundos': ('histogram', "Latência de cada tentativa de download (resultado: ok, permanente, transitoria).", LIMITES_REDE),
+    'espera_segundos': ('histogram', "Tempo parado antes de uma tentativa (motivo: limite_taxa, aimd, disjuntor, backoff).", LIMITES_REDE),
+    'parse_segundos': ('histogram', "Tempo de parsing do HTML de uma página.", LIMITES_CPU),
+    'limpeza_segundos': ('histogram', "Tempo de limpeza e normalização de uma letra.", LIMITES_CPU),
+    'bytes_paginas_total': ('counter', "Bytes das páginas recebidas (inclui as respondidas pelo cache com 304).", None),
+    'musicas_total': ('counter', "Músicas processadas por resultado (sucesso ou o tipo da falha).", None),
+    'retentativas_total': ('counter', "Tentativas de download repetidas por falha transitória.", None),
+    'cache_bytes_economizados': ('gauge', "Bytes que o GET condicional deixou de baixar.", None),
+    'concorrencia_aimd': ('gauge', "Limite de requisições simultâneas do controle AIMD.", None),
+    'duracao_segundos': ('gauge', "Duração da coleta até a exportação.", None),
+    'musicas_por_minuto': ('gauge', "Músicas coletadas com sucesso por minuto.", None),
+}
+
+def classificar_motivo(motivo):
+    """
+    Tipo da falha com poucos valores possíveis, para virar rótulo:
+    'erro_acesso: HTTP 404 após 4 tentativas' -> 'erro_acesso_http_404', 'erro_extracao: ...' -> 'erro_extracao'.
+    """
+    if not motivo:
+        return 'sucesso'
+    tipo, _, detalhe = motivo.partition(':')
+    if tipo == 'erro_acesso' and detalhe.strip():
+        causa = detalhe.split(' após ')[0].split(':')[0].strip()
+        return f"{tipo}_{re.sub(r'[^a-z0-9]+', '_', causa.lower()).strip('_')}"
+    return tipo.strip()
+
+class Histograma:
+    """Histograma cumulativo no formato do Prometheus (contagens por limite superior)."""
+
+    def __init__(self, limites):
+        self.limites = tuple(limites)
+        self.contagens = [0] * (len(self.limites) + 1)
+        self.soma = 0.0
+        self.total = 0
+
+    def observar(self, valor):
+        self.contagens[bisect_left(self.limites, valor)] += 1
+        self.soma += valor
+        self.total += 1
+
+    def quantil(self, q):
+        """Quantil aproximado: limite superior do bucket onde ele cai (None se cair no +Inf)."""
+        if not self.total:
+            return None
+        alvo = q * self.total
+        acumulado = 0
+        for limite, qtd in zip(self.limites, self.contagens):
+            acumulado += qtd
+            if acumulado >= alvo:
+                return limite
+        return None
+
+    def acumulados(self):
+        acumulado = 0
+        for limite, qtd in zip(self.limites + ('+Inf',), self.contagens):
+            acumulado += qtd
+            yield limite, acumulado
+
+def _escapar(valor):
+    return str(valor).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _rotulos_texto(rotulos, extra=()):
+    pares = list(rotulos) + list(extra)
+    if not pares:
+        return ''
+    return '{' + ','.join(f'{k}="{_escapar(v)}"' for k, v in pares) + '}'
+
+class Telemetria:
+    """Registro de métricas da coleta, seguro entre threads."""
+
+    def __init__(self, prefixo=PREFIXO):
+        self.prefixo = prefixo
+        self.inicio = time.time()
+        self._valores = {}
+        self._lock = threading.Lock()
+
+    def _chave(self, nome, rotulos):
+        if nome not in METRICAS:
+            raise KeyError(f"Métrica desconhecida: {nome}")
+        return nome, tuple(sorted(rotulos.items()))
+
+    def observar(self, nome, valor, **rotulos):
+        chave = self._chave(nome, rotulos)
+        with self._lock:
+            histograma = self._valores.get(chave)
+            if histograma is None:
+                histograma = self._valores[chave] = Histograma(METRICAS[nome][2])
+            histograma.observar(valor)
+
+    def somar(self, nome, valor=1, **rotulos):
+        chave = self._chave(nome, rotulos)
+        with self._lock:
+            self._valores[chave] = self._valores.get(chave, 0) + valor
+
+    def definir(self, nome, valor, **rotulos):
+        chave = self._chave(nome, rotulos)
+        with self._lock:
+            self._valores[chave] = valor
+
+    @contextmanager
+    def medir(self, nome, **rotulos):
+        """Observa a duração do bloco no histograma `nome`."""
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observar(nome, time.perf_counter() - inicio, **rotulos)
+
+    def _atualizar_derivadas(self):
+        duracao = time.time() - self.inicio
+        with self._lock:
+            sucessos = self._valores.get(('musicas_total', (('resultado', 'sucesso'),)), 0)
+        self.definir('duracao_segundos', duracao)
+        self.definir('musicas_por_minuto', sucessos / (duracao / 60) if duracao > 0 else 0.0)
+
+    def texto_prometheus(self):
+        """Métricas no formato de exposição em texto do Prometheus."""
+        self._atualizar_derivadas()
+        with self._lock:
+            itens = sorted(self._valores.items())
+            linhas = []
+            ultimo = None
+            for (nome, rotulos), valor in itens:
+                completo = f"{self.prefixo}_{nome}"
+                if nome != ultimo:
+                    tipo, ajuda, _ = METRICAS[nome]
+                    linhas.append(f"# HELP {completo} {ajuda}")
+                    linhas.append(f"# TYPE {completo} {tipo}")
+                    ultimo = nome
+                if isinstance(valor, Histograma):
+                    for limite, acumulado in valor.acumulados():
+                        linhas.append(f"{completo}_bucket{_rotulos_texto(rotulos, [('le', limite)])} {acumulado}")
+                    linhas.append(f"{completo}_sum{_rotulos_texto(rotulos)} {valor.soma:.6f}")
+                    linhas.append(f"{completo}_count{_rotulos_texto(rotulos)} {valor.total}")
+                else:
+                    linhas.append(f"{completo}{_rotulos_texto(rotulos)} {valor if isinstance(valor, int) else repr(float(valor))}")
+        return '\n'.join(linhas) + '\n'
+
+    def como_dict(self):
+        """Resumo em JSON: contadores, medidores e, por histograma, total, soma, média e p50/p95/p99."""
+        self._atualizar_derivadas()
+        saida = {'inicio': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(self.inicio)), 'metricas': {}}
+        with self._lock:
+            for (nome, rotulos), valor in sorted(self._valores.items()):
+                if isinstance(valor, Histograma):
+                    valor = {
+                        'total': valor.total, 'soma_segundos': round(valor.soma, 6),
+                        'media_segundos': round(valor.soma / valor.total, 6) if valor.total else None,
+                        'p50': valor.quantil(0.5), 'p95': valor.quantil(0.95), 'p99': valor.quantil(0.99),
+                    }
+                if rotulos:
+                    saida['metricas'].setdefault(nome, {})[','.join(f"{k}={v}" for k, v in rotulos)] = valor
+                else:
+                    saida['metricas'][nome] = valor
+        saida['tempo_somado_segundos'] = self.tempo_por_etapa()
+        return saida
+
+    def tempo_por_etapa(self):
+        """Tempo somado (entre threads) em rede, parsing, limpeza e cada tipo de espera."""
+        etapas = {}
+        with self._lock:
+            for (nome, rotulos), valor in self._valores.items():
+                if not isinstance(valor, Histograma):
+                    continue
+                if nome == 'espera_segundos':
+                    etapa = f"espera_{dict(rotulos).get('motivo')}"
+                else:
+                    etapa = nome.replace('_segundos', '')
+                etapas[etapa] = etapas.get(etapa, 0.0) + valor.soma
+        return {etapa: round(segundos, 3) for etapa, segundos in sorted(etapas.items())}
+
+    def resumo(self):
+        """Uma linha com o tempo somado de cada etapa, para ver onde a coleta gastou o tempo."""
+        etapas = self.tempo_por_etapa()
+        if not etapas:
+            return "⏱️  Telemetria: nenhuma medição"
+        return "⏱️  Tempo somado: " + " | ".join(f"{etapa} {segundos:.1f}s" for etapa, segundos in etapas.items())
+
+    def exportar(self, caminho_base):
+        """
+        Grava <caminho_base>.prom (textfile do Prometheus) e <caminho_base>.json.
+        Escreve num temporário e renomeia, para o coletor nunca ler um arquivo pela metade.
+        """
+        pasta = os.path.dirname(caminho_base)
+        if pasta:
+            os.makedirs(pasta, exist_ok=True)
+        for extensao, conteudo in (('.prom', self.texto_prometheus()),
+                                   ('.json', json.dumps(self.como_dict(), ensure_ascii=False, indent=2))):
+            temporario = f"{caminho_base}{extensao}.tmp"
+            with open(temporario, 'w', encoding='utf-8') as f:
+                f.write(conteudo)
+            os.replace(temporario, caminho_base + extensao)
+        return caminho_base + '.prom', caminho_base + '.json'